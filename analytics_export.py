@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+실행 기록 컬럼형 내보내기 (Parquet / Arrow) + 기본 리포트
+AutoVideoCreator.save_result(output/results/)와 YouTubeAutomation.save_metadata(output/optimized/)의
+JSON 파일들을 두 테이블로 펼쳐서 output/analytics/ 아래에 language / month 파티션으로 저장
+  - videos: 생성한 비디오(버전) 1개 = 1행 (품질, 스타일, 톤, CTR 후킹, 렌더링 시간 ...)
+  - keywords: 사용한 키워드 1개 = 1행 (키워드 유형, 순서)
+이미 내보낸 파일은 _state.json에 기록해 두고 새 실행만 추가 (증분)
+내보낸 뒤 수정된 파일은 증분으로 다시 읽지 않음 (이전 행과 중복되므로 --full로 다시 내보내기)
+pyarrow 필요 (선택사항): pip install pyarrow
+
+    python analytics_export.py export               # 새 실행만 추가
+    python analytics_export.py export --full        # 처음부터 다시
+    python analytics_export.py report all --since 30d
+    python analytics_export.py report render_time --csv render.csv
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import unicodedata
+from datetime import datetime
+from pathlib import Path
+
+from run_catalog import parse_since
+from output_layout import get_layout
+from serialization import read_json, write_json
+
+DEFAULT_ANALYTICS_CONFIG = {
+    'dir': 'output/analytics',
+    # parquet / arrow
+    'format': 'parquet',
+    # 이 개수만큼 JSON을 읽을 때마다 파일로 기록 (메모리 사용량 제한)
+    'batch_size': 5000
+}
+
+# (파이프라인, 디렉터리, 파일 이름 접두사, 접미사)
+SOURCES = (
+    ('auto', 'output/results', 'result_', '.json'),
+    ('main', 'output/optimized', '', '_metadata.json')
+)
+
+EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+STATE_FILE = '_state.json'
+
+
+def load_analytics_config(config_path='config/config.json'):
+    """config.json의 analytics 섹션 로드 (없으면 기본값)"""
+    settings = dict(DEFAULT_ANALYTICS_CONFIG)
+    try:
+        settings.update(read_json(config_path).get('analytics', {}))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+def _pyarrow():
+    """pyarrow는 선택사항이라 실제로 쓸 때만 import"""
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+    except ImportError:
+        raise SystemExit("❌ 분석 내보내기에는 pyarrow가 필요합니다: pip install pyarrow")
+    return pyarrow
+
+
+def _schemas(pa):
+    partition = [('language', pa.string()), ('month', pa.string())]
+    videos = pa.schema([
+        ('source', pa.string()),
+        ('pipeline', pa.string()),
+        ('created_at', pa.timestamp('ms')),
+        ('topic', pa.string()),
+        ('title', pa.string()),
+        ('title_hook', pa.string()),
+        ('ctr_score', pa.float64()),
+        ('version_id', pa.string()),
+        ('style', pa.string()),
+        ('tone', pa.string()),
+        ('quality', pa.string()),
+        ('target_seconds', pa.float64()),
+        ('render_seconds', pa.float64()),
+        ('rendered', pa.bool_())
+    ] + partition)
+    keywords = pa.schema([
+        ('source', pa.string()),
+        ('pipeline', pa.string()),
+        ('created_at', pa.timestamp('ms')),
+        ('keyword', pa.string()),
+        ('keyword_type', pa.string()),
+        ('position', pa.int32())
+    ] + partition)
+    return {'videos': videos, 'keywords': keywords}
+
+
+def _number(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _created_at(value, fallback):
+    try:
+        return datetime.fromisoformat(str(value)) if value else fallback
+    except ValueError:
+        return fallback
+
+
+def _rows_auto(path, data, fallback_time):
+    """save_result JSON → (videos 행들, keywords 행들)"""
+    created = _created_at(data.get('created_at'), fallback_time)
+    base = {
+        'source': str(path),
+        'pipeline': 'auto',
+        'created_at': created,
+        'language': data.get('language') or 'unknown',
+        'month': created.strftime('%Y-%m')
+    }
+    videos = []
+    for video in data.get('videos', []):
+        videos.append({
+            **base,
+            'topic': data.get('topic'),
+            'title': video.get('title') or data.get('title'),
+            'title_hook': data.get('title_hook'),
+            'ctr_score': _number(data.get('ctr_score')),
+            'version_id': video.get('version_id'),
+            'style': video.get('style'),
+            'tone': video.get('tone'),
+            # 예전 결과에는 비디오별 화질이 없음
+            'quality': video.get('quality') or data.get('quality'),
+            'target_seconds': _number(video.get('duration')),
+            'render_seconds': _number(video.get('render_seconds')),
+            'rendered': get_layout().resolve(video.get('video_path')) is not None
+        })
+    types = data.get('keyword_types') or []
+    keywords = [{**base, 'keyword': str(keyword), 'position': position,
+                 'keyword_type': types[position] if position < len(types) else None}
+                for position, keyword in enumerate(data.get('keywords', []))]
+    return videos, keywords
+
+
+def _rows_main(path, data, fallback_time):
+    """save_metadata JSON → (videos 1행, keywords 행들)"""
+    created = _created_at(data.get('timestamp'), fallback_time)
+    optimized = data.get('optimized') or {}
+    analysis = data.get('analysis') or {}
+    base = {
+        'source': str(path),
+        'pipeline': 'main',
+        'created_at': created,
+        'language': data.get('language') or 'unknown',
+        'month': created.strftime('%Y-%m')
+    }
+    video = data.get('video')
+    videos = [{
+        **base,
+        'topic': analysis.get('main_topic'),
+        'title': optimized.get('title'),
+        'title_hook': None,
+        'ctr_score': None,
+        'version_id': None,
+        'style': None,
+        'tone': None,
+        'quality': None,
+        'target_seconds': None,
+        'render_seconds': _number(data.get('render_seconds')),
+        'rendered': get_layout().resolve(video) is not None
+    }]
+    keywords = []
+    for keyword_type, items in (('hashtag', optimized.get('hashtags')),
+                                ('high_revenue', analysis.get('high_revenue_keywords'))):
+        for position, keyword in enumerate(items or []):
+            keywords.append({**base, 'keyword': str(keyword), 'keyword_type': keyword_type, 'position': position})
+    return videos, keywords
+
+
+ROW_BUILDERS = {'auto': _rows_auto, 'main': _rows_main}
+
+
+def _scan_sources(root='.'):
+    """(파이프라인, 경로, mtime) 목록 (디렉터리 항목만 읽고 파일은 열지 않음, output_layout 샤드 폴더 포함)"""
+    found = []
+    for pipeline, directory, prefix, suffix in SOURCES:
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            try:
+                entries = os.scandir(os.path.join(root, current))
+            except FileNotFoundError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir():
+                        stack.append(os.path.join(current, entry.name))
+                    elif entry.name.startswith(prefix) and entry.name.endswith(suffix):
+                        found.append((pipeline, os.path.join(current, entry.name), entry.stat().st_mtime))
+    return found
+
+
+class AnalyticsExporter:
+    """JSON 결과 → language / month 파티션 컬럼형 파일 (증분)"""
+
+    def __init__(self, settings=None):
+        self.settings = settings or load_analytics_config()
+        self.directory = Path(self.settings['dir'])
+        self.format = self.settings['format']
+        if self.format not in EXTENSIONS:
+            raise ValueError(f"지원하지 않는 형식: {self.format} (parquet / arrow)")
+
+    # 증분 상태 -------------------------------------------------------------
+
+    def _load_state(self):
+        try:
+            return read_json(self.directory / STATE_FILE)
+        except (OSError, ValueError):
+            return {'format': self.format, 'exported': {}}
+
+    def _save_state(self, state):
+        """원자적 저장 (중간에 죽어도 상태 파일이 깨지지 않게)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        write_json(self.directory / STATE_FILE, state)
+
+    # 내보내기 ---------------------------------------------------------------
+
+    def _write_batch(self, pa, schemas, videos, keywords, batch_name):
+        import pyarrow.dataset as ds
+        for name, rows in (('videos', videos), ('keywords', keywords)):
+            if not rows:
+                continue
+            table = pa.Table.from_pylist(rows, schema=schemas[name])
+            ds.write_dataset(
+                table, self.directory / name,
+                format='parquet' if self.format == 'parquet' else 'ipc',
+                partitioning=['language', 'month'], partitioning_flavor='hive',
+                basename_template=f"part-{batch_name}-{{i}}.{EXTENSIONS[self.format]}",
+                existing_data_behavior='overwrite_or_ignore'
+            )
+
+    def export(self, full=False, root='.'):
+        """
+        새 결과 파일만 읽어서 추가
+
+        이미 내보낸 파일이 그 뒤에 수정됐으면 행을 추가하지 않고 modified로만 셈
+        (배치 파일에 여러 결과가 섞여 있어 그 파일의 예전 행만 지울 수 없으므로 --full 필요)
+
+        Args:
+            full: True면 기존 내보내기를 지우고 처음부터
+
+        Returns:
+            dict: files / videos / keywords / skipped / modified 개수
+        """
+        pa = _pyarrow()
+        schemas = _schemas(pa)
+        state = self._load_state()
+        if full or state.get('format') != self.format:
+            for name in schemas:
+                shutil.rmtree(self.directory / name, ignore_errors=True)
+            state = {'format': self.format, 'exported': {}}
+
+        exported = state['exported']
+        pending, modified = [], 0
+        for pipeline, path, mtime in _scan_sources(root):
+            if path not in exported:
+                pending.append((pipeline, path, mtime))
+            elif exported[path] != mtime:
+                modified += 1
+        counts = {'files': 0, 'videos': 0, 'keywords': 0, 'skipped': 0, 'modified': modified}
+        batch_size = max(1, self.settings['batch_size'])
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+        for start in range(0, len(pending), batch_size):
+            videos, keywords = [], []
+            for pipeline, path, mtime in pending[start:start + batch_size]:
+                try:
+                    data = read_json(os.path.join(root, path))
+                except (OSError, ValueError):
+                    counts['skipped'] += 1
+                    continue
+                rows = ROW_BUILDERS[pipeline](path, data, datetime.fromtimestamp(mtime))
+                videos += rows[0]
+                keywords += rows[1]
+                exported[path] = mtime
+                counts['files'] += 1
+            self._write_batch(pa, schemas, videos, keywords, f"{stamp}-{start // batch_size}")
+            counts['videos'] += len(videos)
+            counts['keywords'] += len(keywords)
+            # 배치마다 상태 저장 (중단돼도 다음 실행은 이어서)
+            self._save_state(state)
+        return counts
+
+    # 읽기 / 리포트 ----------------------------------------------------------
+
+    def read(self, name, columns=None, since=None):
+        """
+        테이블 읽기 (since는 epoch, 파일 단위로 걸러서 필요한 행만 로드)
+        """
+        pa = _pyarrow()
+        import pyarrow.dataset as ds
+        path = self.directory / name
+        if not path.exists():
+            raise SystemExit(f"❌ {path}가 없습니다. 먼저 python analytics_export.py export")
+        # 내보낼 때 쓴 형식으로 읽음 (config를 바꿨어도 --full 전까지는 예전 형식)
+        written_format = self._load_state().get('format', self.format)
+        dataset = ds.dataset(path, format='parquet' if written_format == 'parquet' else 'ipc',
+                             partitioning='hive')
+        row_filter = None
+        if since is not None:
+            row_filter = ds.field('created_at') >= pa.scalar(datetime.fromtimestamp(since), pa.timestamp('ms'))
+        return dataset.to_table(columns=columns, filter=row_filter)
+
+
+def _count_by(table, keys, count_column='source'):
+    return table.group_by(keys).aggregate([(count_column, 'count')]).rename_columns(keys + ['count']) \
+        .sort_by([('count', 'descending')])
+
+
+def report_keywords(exporter, since=None, top=20):
+    """키워드 유형별 / 키워드별 사용 횟수"""
+    table = exporter.read('keywords', ['source', 'keyword', 'keyword_type'], since)
+    return [('키워드 유형', _count_by(table, ['keyword_type'])),
+            (f'키워드 상위 {top}', _count_by(table, ['keyword', 'keyword_type']).slice(0, top))]
+
+
+def report_render_time(exporter, since=None):
+    """화질별 렌더링 시간 (초)"""
+    import pyarrow.compute as pc
+    table = exporter.read('videos', ['pipeline', 'quality', 'render_seconds'], since)
+    stats = table.group_by(['pipeline', 'quality']).aggregate([
+        ('render_seconds', 'count'),
+        ('render_seconds', 'mean'),
+        ('render_seconds', 'approximate_median'),
+        ('render_seconds', 'tdigest', pc.TDigestOptions(q=0.95)),
+        ('render_seconds', 'max')
+    ])
+    stats = stats.set_column(stats.schema.get_field_index('render_seconds_tdigest'), 'p95',
+                             pc.list_element(stats['render_seconds_tdigest'], 0))
+    stats = stats.rename_columns(['pipeline', 'quality', 'videos', 'mean', 'p50', 'p95', 'max'])
+    return [('화질별 렌더링 시간 (초)', stats.sort_by([('videos', 'descending')]))]
+
+
+def report_languages(exporter, since=None):
+    """언어별 실행 수 / 버전 수"""
+    table = exporter.read('videos', ['source', 'language', 'rendered'], since)
+    stats = table.group_by('language').aggregate([
+        ('source', 'count_distinct'),
+        ('source', 'count'),
+        ('rendered', 'sum')
+    ]).rename_columns(['language', 'runs', 'versions', 'rendered'])
+    return [('언어별 버전 수', stats.sort_by([('versions', 'descending')]))]
+
+
+def report_hooks(exporter, since=None):
+    """CTR 후킹 / 스타일 / 톤별 버전 수"""
+    table = exporter.read('videos', ['source', 'title_hook', 'style', 'tone'], since)
+    return [('CTR 후킹', _count_by(table, ['title_hook'])),
+            ('스타일', _count_by(table, ['style'])),
+            ('톤', _count_by(table, ['tone']))]
+
+
+REPORTS = {
+    'keywords': report_keywords,
+    'render_time': report_render_time,
+    'languages': report_languages,
+    'hooks': report_hooks
+}
+
+
+def _format_table(title, table):
+    """pandas 없이 표 출력"""
+    columns = table.column_names
+    rows = [[_format_cell(value) for value in row.values()] for row in table.to_pylist()]
+    widths = [max([_width(column)] + [_width(row[i]) for row in rows]) for i, column in enumerate(columns)]
+    lines = [f"\n📊 {title}",
+             '   ' + '  '.join(_pad(column, width) for column, width in zip(columns, widths))]
+    lines += ['   ' + '  '.join(_pad(cell, width) for cell, width in zip(row, widths)) for row in rows]
+    return '\n'.join(lines)
+
+
+def _width(text):
+    """터미널 표시 폭 (한글 / 한자는 2칸)"""
+    return sum(2 if unicodedata.east_asian_width(char) in 'WF' else 1 for char in text)
+
+
+def _pad(text, width):
+    return text + ' ' * (width - _width(text))
+
+
+def _format_cell(value):
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='실행 기록 Parquet/Arrow 내보내기 + 리포트')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    export = sub.add_parser('export', help='새 실행 추가 (증분)')
+    export.add_argument('--full', action='store_true', help='기존 내보내기를 지우고 처음부터')
+    export.add_argument('--format', choices=list(EXTENSIONS), help='config의 analytics.format 대신 사용')
+
+    report = sub.add_parser('report', help='기본 리포트')
+    report.add_argument('name', choices=list(REPORTS) + ['all'], nargs='?', default='all')
+    report.add_argument('--since', type=parse_since, help='7d / 12h / 2024-05-01')
+    report.add_argument('--csv', help='결과 표를 CSV로 저장 (여러 표면 이름 뒤에 번호)')
+
+    args = parser.parse_args(argv)
+    settings = load_analytics_config()
+    if getattr(args, 'format', None):
+        settings['format'] = args.format
+    exporter = AnalyticsExporter(settings)
+
+    if args.command == 'export':
+        start = time.perf_counter()
+        counts = exporter.export(full=args.full)
+        print(f"📦 {counts['files']}개 결과 파일 → videos {counts['videos']}행, keywords {counts['keywords']}행 "
+              f"({time.perf_counter() - start:.1f}초, {exporter.directory})")
+        if counts['skipped']:
+            print(f"⚠️  읽지 못한 파일 {counts['skipped']}개")
+        if counts['modified']:
+            print(f"⚠️  내보낸 뒤 수정된 파일 {counts['modified']}개는 반영하지 않음 (export --full로 다시 내보내기)")
+        return 0
+
+    names = list(REPORTS) if args.name == 'all' else [args.name]
+    tables = []
+    for name in names:
+        tables += REPORTS[name](exporter, since=args.since)
+    for title, table in tables:
+        print(_format_table(title, table))
+    if args.csv:
+        import pyarrow.csv
+        for i, (title, table) in enumerate(tables):
+            path = args.csv if len(tables) == 1 else f"{Path(args.csv).with_suffix('')}_{i + 1}.csv"
+            pyarrow.csv.write_csv(table, path)
+            print(f"💾 {title}: {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,9 +11,8 @@
   python auto_video_creator.py --lang th
 """
 
-import os
 import sys
-import json
+import time
 import argparse
 from pathlib import Path
 from datetime import datetime
@@ -21,118 +20,189 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-# 다국어 키워드 선택기 import
-from multilingual_selector import MultilingualKeywordSelector
+from providers import (get_api_key, gemini_generate, openai_chat, did_request, download,
+                       GEMINI_MODEL, OPENAI_MODEL)
+from provider_router import get_router
+from did_webhook import get_receiver, wait_for_talk
+from retry_policy import format_retry_stats
+from concurrency import stage_slot, map_concurrently
+from metrics import stage, observe_item, start_exporter, write_run_summary, format_stage_summary
+from cost_accounting import usage_scope, enforce_budget, downgrade_quality, get_ledger
+from tracing import span, annotate, get_exporter
+from profiling import add_profile_argument, start_profiling, stop_profiling
+from event_bus import event_scope, progress, warning, report_error, flush_events
+from run_catalog import catalog_transaction
+from input_index import get_input_index
+from work_claims import get_claims
+from output_layout import get_layout
+from retention import get_retention
+from run_journal import record, get_compactor
+from serialization import read_json, write_json, loads
+from schemas import VideoRecord
 
 class AutoVideoCreator:
     """완전 자동 비디오 생성기"""
     
-    def __init__(self, language='ko', quality='high', ai_provider='gemini'):
+    def __init__(self, language='ko', quality='high', ai_provider='gemini', hedge=False):
         self.language = language
         self.quality = quality
         self.ai_provider = ai_provider.lower()
-        self.selector = MultilingualKeywordSelector(language, ai_provider=self.ai_provider)
+        self.hedge = hedge
+        # 다국어 키워드 선택기는 생성할 때 import (모듈만 불러오는 도구 / 벤치마크의 시작 시간 절약)
+        from multilingual_selector import MultilingualKeywordSelector
+        self.selector = MultilingualKeywordSelector(language, ai_provider=self.ai_provider, hedge=hedge)
         self.load_configs()
         
     def load_configs(self):
         """설정 로드"""
-        with open('config/did_integration.json', 'r', encoding='utf-8') as f:
-            self.did_config = json.load(f)
-        with open('config/languages.json', 'r', encoding='utf-8') as f:
-            self.lang_config = json.load(f)
+        self.did_config = read_json('config/did_integration.json')
+        self.lang_config = read_json('config/languages.json')
             
         self.current_lang = self.lang_config['supported_languages'][self.language]
         
-    def auto_generate_from_image(self, image_path):
+    def auto_generate_from_image(self, image_path, source_path=None):
         """
         이미지에서 자동으로 비디오 생성
         
         Args:
             image_path: 이미지 파일 경로
+            source_path: 결과에 기록할 원래 경로 (선점으로 processing 폴더에 옮긴 경우)
         
         Returns:
             dict: 생성된 비디오 정보
         """
-        print("\n" + "="*80)
-        print(f"🎬 자동 숏폼 비디오 생성 시작 ({self.current_lang['name']})")
-        print("="*80)
+        # 이미지 1장 = 트레이스 1개, 이 안의 공급자 호출은 이미지 / 언어별로 비용 집계
+        image_name = Path(image_path).name
+        start = time.monotonic()
+        with usage_scope(pipeline='auto', image=image_name, language=self.language), \
+                event_scope(pipeline='auto', image=image_name, language=self.language), \
+                span('image', kind='image', image=image_name, language=self.language, quality=self.quality):
+            try:
+                quality = self.apply_budget(image_path, self.quality)
+                result = self._generate_from_image(Path(image_path), source_path, quality)
+            except Exception as e:
+                record('image', 'failed', pipeline='auto', image=image_name, language=self.language,
+                       seconds=round(time.monotonic() - start, 3), error=f"{type(e).__name__}: {e}")
+                raise
+            record('image', 'ok', pipeline='auto', image=image_name, language=self.language,
+                   seconds=round(time.monotonic() - start, 3), videos=len(result['videos']))
+            return result
+    
+    def apply_budget(self, image_path, quality):
+        """
+        예산 확인: 초과 시 BudgetExceeded, 경고 구간이면 한 단계 낮은 화질 반환
+
+        공용 생성기(self.quality)는 바꾸지 않음 (동시에 처리 중인 다른 이미지에 번지지 않도록)
+        """
+        if enforce_budget(Path(image_path).name) == 'downgrade':
+            lower = downgrade_quality(quality)
+            if lower != quality:
+                progress(f"   💸 예산 절약: 화질 {quality.upper()} → {lower.upper()}")
+                return lower
+        return quality
+    
+    def _generate_from_image(self, image_path, source_path=None, quality=None):
+        """auto_generate_from_image 본체 (quality: 예산을 반영한 이 이미지의 화질)"""
+        quality = quality or self.quality
+        progress("\n" + "="*80)
+        progress(f"🎬 자동 숏폼 비디오 생성 시작 ({self.current_lang['name']})")
+        progress("="*80)
         
         # 1. 이미지 분석 (Gemini Vision)
-        print("\n📸 1단계: 이미지 분석 중...")
-        image_analysis = self.analyze_image_with_gemini(image_path)
+        progress("\n📸 1단계: 이미지 분석 중...")
+        with stage('analysis'), stage_slot('analysis'):
+            image_analysis = self.analyze_image_with_gemini(image_path)
         
         # 2. 키워드 자동 추출
-        print("\n🔍 2단계: 고수익 키워드 자동 추출 중...")
+        progress("\n🔍 2단계: 고수익 키워드 자동 추출 중...")
         topic = image_analysis.get('detected_subject', '제품 리뷰')
-        keyword_analysis = self.selector.analyze_topic(topic)
+        with stage('keywords'), stage_slot('keywords'):
+            keyword_analysis = self.selector.analyze_topic(topic)
         
         # 3. 최적 키워드 자동 선택 (상위 3개)
-        print("\n✨ 3단계: 최적 키워드 자동 선택...")
-        all_keywords = []
-        for kw in keyword_analysis['keywords'][:3]:
-            all_keywords.append(kw['text'])
+        progress("\n✨ 3단계: 최적 키워드 자동 선택...")
+        all_keywords = keyword_analysis.keyword_texts(range(3))
         
         # 4. 최적 제목 자동 선택 (CTR 점수 가장 높은 것)
-        best_title = max(keyword_analysis['titles'], key=lambda x: x['ctr_score'])
-        selected_title = best_title['text']
+        best_title = keyword_analysis.best_title()
+        selected_title = best_title.text
         
-        print(f"   ✓ 선택된 키워드: {', '.join(all_keywords)}")
-        print(f"   ✓ 선택된 제목: {selected_title} (CTR: {best_title['ctr_score']})")
+        progress(f"   ✓ 선택된 키워드: {', '.join(all_keywords)}")
+        progress(f"   ✓ 선택된 제목: {selected_title} (CTR: {best_title.ctr_score})")
         
         # 5. 스크립트 자동 생성 (여러 버전)
-        print("\n📝 4단계: 다양한 버전 스크립트 생성 중...")
-        versions = self.selector.generate_versions(
-            topic, all_keywords, selected_title, num_versions=3
-        )
+        progress("\n📝 4단계: 다양한 버전 스크립트 생성 중...")
+        with stage('versions'):
+            versions = self.selector.generate_versions(
+                topic, all_keywords, selected_title, num_versions=3
+            )
         
         # 6. YouTube 설명란 자동 생성
-        print("\n📄 5단계: YouTube 설명란 자동 생성 중...")
-        descriptions = []
+        progress("\n📄 5단계: YouTube 설명란 자동 생성 중...")
         for version in versions:
-            description = self.generate_description(
-                version, all_keywords, image_analysis
-            )
-            descriptions.append(description)
-            print(f"   ✓ {version['version_id']} 설명란 생성 완료")
+            with stage('description'):
+                version.description = self.generate_description(
+                    version, all_keywords, image_analysis
+                )
+            progress(f"   ✓ {version.version_id} 설명란 생성 완료")
         
         # 7. 고화질 비디오 생성
-        print(f"\n🎥 6단계: {self.quality.upper()} 화질 비디오 생성 중...")
+        progress(f"\n🎥 6단계: {quality.upper()} 화질 비디오 생성 중...")
         videos = []
-        for i, version in enumerate(versions):
-            video_path = self.create_high_quality_video(
-                image_path, version, image_analysis
-            )
-            videos.append({
-                'version_id': version['version_id'],
-                'video_path': video_path,
-                'title': version['title'],
-                'script': version['script'],
-                'description': descriptions[i]  # 설명란 추가
-            })
-            print(f"   ✓ {version['version_id']} 생성 완료: {video_path}")
+        for version in versions:
+            quality = self.apply_budget(image_path, quality)
+            render_start = time.monotonic()
+            with stage('render'), stage_slot('render'):
+                video_path = self.create_high_quality_video(
+                    image_path, version, image_analysis, quality
+                )
+            render_seconds = round(time.monotonic() - render_start, 3)
+            rendered = Path(video_path).exists()
+            if rendered:
+                get_ledger().note_video()
+            record('version', 'rendered' if rendered else 'simulated', pipeline='auto', image=image_path.name,
+                   language=self.language, version_id=version.version_id, quality=quality,
+                   path=str(video_path), render_seconds=render_seconds)
+            videos.append(VideoRecord(
+                version_id=version.version_id,
+                video_path=video_path,
+                title=version.title,
+                script=version.script,
+                description=version.description,
+                style=version.style,
+                tone=version.tone,
+                duration=version.duration,
+                quality=quality,
+                render_seconds=render_seconds
+            ))
+            progress(f"   ✓ {version.version_id} 생성 완료: {video_path}")
         
         # 8. 결과 저장
         result = {
             'language': self.language,
-            'quality': self.quality,
-            'source_image': str(image_path),
+            'quality': quality,
+            'source_image': str(source_path or image_path),
             'topic': topic,
             'keywords': all_keywords,
+            'keyword_types': [kw.type for kw in keyword_analysis.keywords[:3]],
             'title': selected_title,
+            'title_hook': best_title.hook,
+            'ctr_score': best_title.ctr_score,
             'videos': videos,
             'created_at': datetime.now().isoformat()
         }
         
-        self.save_result(result)
+        with stage('save'):
+            self.save_result(result)
         
-        print("\n" + "="*80)
-        print("✅ 완성! 아래 파일들이 생성되었습니다:")
+        progress("\n" + "="*80)
+        progress("✅ 완성! 아래 파일들이 생성되었습니다:")
         for video in videos:
-            print(f"\n📹 {video['version_id']}:")
-            print(f"   - 비디오: {video['video_path']}")
-            print(f"   - 제목: {video['title']}")
-            print(f"   - 설명: (자동 생성됨 - 메타데이터 확인)")
-        print("="*80 + "\n")
+            progress(f"\n📹 {video.version_id}:")
+            progress(f"   - 비디오: {video.video_path}")
+            progress(f"   - 제목: {video.title}")
+            progress(f"   - 설명: (자동 생성됨 - 메타데이터 확인)")
+        progress("="*80 + "\n")
         
         return result
     
@@ -141,7 +211,7 @@ class AutoVideoCreator:
         YouTube 영상 설명란 자동 생성
         
         Args:
-            version: 버전 정보 (title, script, duration 등)
+            version: Version (title, script, duration 등)
             keywords: 선택된 키워드 리스트
             image_analysis: 이미지 분석 결과
         
@@ -151,7 +221,7 @@ class AutoVideoCreator:
         # 언어별 설명란 템플릿
         templates = {
             'ko': {
-                'intro': f"📱 {version['title']}\n\n",
+                'intro': f"📱 {version.title}\n\n",
                 'product_desc': f"💡 {image_analysis.get('description', '제품 소개')}",
                 'keywords_section': f"\n\n🔍 핵심 키워드: {', '.join(keywords)}",
                 'cta_buy': "\n\n🛒 구매 링크:",
@@ -160,7 +230,7 @@ class AutoVideoCreator:
                 'hashtags': f"\n\n{' '.join([f'#{kw.replace(' ', '')}' for kw in keywords])} #숏폼 #쇼핑 #리뷰"
             },
             'zh': {
-                'intro': f"📱 {version['title']}\n\n",
+                'intro': f"📱 {version.title}\n\n",
                 'product_desc': f"💡 {image_analysis.get('description', '产品介绍')}",
                 'keywords_section': f"\n\n🔍 关键词: {', '.join(keywords)}",
                 'cta_buy': "\n\n🛒 购买链接:",
@@ -169,7 +239,7 @@ class AutoVideoCreator:
                 'hashtags': f"\n\n{' '.join([f'#{kw.replace(' ', '')}' for kw in keywords])} #短视频 #购物 #测评"
             },
             'en': {
-                'intro': f"📱 {version['title']}\n\n",
+                'intro': f"📱 {version.title}\n\n",
                 'product_desc': f"💡 {image_analysis.get('description', 'Product introduction')}",
                 'keywords_section': f"\n\n🔍 Keywords: {', '.join(keywords)}",
                 'cta_buy': "\n\n🛒 Buy Here:",
@@ -178,7 +248,7 @@ class AutoVideoCreator:
                 'hashtags': f"\n\n{' '.join([f'#{kw.replace(' ', '')}' for kw in keywords])} #Shorts #Shopping #Review"
             },
             'ja': {
-                'intro': f"📱 {version['title']}\n\n",
+                'intro': f"📱 {version.title}\n\n",
                 'product_desc': f"💡 {image_analysis.get('description', '商品紹介')}",
                 'keywords_section': f"\n\n🔍 キーワード: {', '.join(keywords)}",
                 'cta_buy': "\n\n🛒 購入リンク:",
@@ -187,7 +257,7 @@ class AutoVideoCreator:
                 'hashtags': f"\n\n{' '.join([f'#{kw.replace(' ', '')}' for kw in keywords])} #ショート動画 #ショッピング #レビュー"
             },
             'th': {
-                'intro': f"📱 {version['title']}\n\n",
+                'intro': f"📱 {version.title}\n\n",
                 'product_desc': f"💡 {image_analysis.get('description', 'รายละเอียดสินค้า')}",
                 'keywords_section': f"\n\n🔍 คำหลัก: {', '.join(keywords)}",
                 'cta_buy': "\n\n🛒 ลิงก์ซื้อ:",
@@ -212,13 +282,13 @@ class AutoVideoCreator:
         )
         
         # 버전별 정보 추가
-        if version.get('duration'):
+        if version.duration:
             duration_info = {
-                'ko': f"\n\n⏱️ 영상 길이: 약 {version['duration']}초",
-                'zh': f"\n\n⏱️ 视频时长: 约{version['duration']}秒",
-                'en': f"\n\n⏱️ Duration: ~{version['duration']}s",
-                'ja': f"\n\n⏱️ 動画の長さ: 約{version['duration']}秒",
-                'th': f"\n\n⏱️ ความยาววิดีโอ: ประมาณ{version['duration']}วินาที"
+                'ko': f"\n\n⏱️ 영상 길이: 약 {version.duration}초",
+                'zh': f"\n\n⏱️ 视频时长: 约{version.duration}秒",
+                'en': f"\n\n⏱️ Duration: ~{version.duration}s",
+                'ja': f"\n\n⏱️ 動画の長さ: 約{version.duration}秒",
+                'th': f"\n\n⏱️ ความยาววิดีโอ: ประมาณ{version.duration}วินาที"
             }
             description += duration_info.get(self.language, "")
         
@@ -237,8 +307,6 @@ class AutoVideoCreator:
     def analyze_image_with_gemini(self, image_path):
         """AI로 이미지 분석 (Gemini 또는 GPT-4o Vision)"""
         try:
-            from PIL import Image
-            
             # 언어별 프롬프트
             prompts = {
                 'ko': "이 이미지를 분석하고 숏폼 쇼핑 채널용 정보를 JSON으로 제공하세요: detected_subject(제품명), is_product(제품 여부), description(상세 설명), suggested_category(카테고리), key_features(특징 3개)",
@@ -249,64 +317,37 @@ class AutoVideoCreator:
             }
             prompt = prompts.get(self.language, prompts['ko'])
             
-            if self.ai_provider == 'openai':
-                # OpenAI GPT-4o Vision
-                import openai
-                import base64
-                
-                api_key = os.getenv('OPENAI_API_KEY')
-                if not api_key:
-                    print("   ⚠️  OpenAI API 키가 없습니다. 기본 분석 사용...")
+            handlers = self._vision_handlers(prompt, image_path)
+            
+            if self.ai_provider == 'auto':
+                # 지연/오류율 기준으로 가장 빠른 공급자 선택
+                if not handlers:
+                    warning("   ⚠️  AI API 키가 없습니다. 기본 분석 사용...")
                     return self._default_analysis(image_path)
                 
-                openai.api_key = api_key
-                
-                # 이미지를 base64로 인코딩
-                with open(image_path, 'rb') as f:
-                    image_base64 = base64.b64encode(f.read()).decode()
+                result_text = get_router().call(handlers, hedge=self.hedge)
                 
-                response = openai.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {"type": "text", "text": prompt},
-                                {
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": f"data:image/jpeg;base64,{image_base64}"
-                                    }
-                                }
-                            ]
-                        }
-                    ],
-                    max_tokens=500
-                )
+            elif self.ai_provider == 'openai':
+                # OpenAI GPT-4o Vision
+                if 'openai' not in handlers:
+                    warning("   ⚠️  OpenAI API 키가 없습니다. 기본 분석 사용...")
+                    return self._default_analysis(image_path)
                 
-                result_text = response.choices[0].message.content
+                result_text = handlers['openai'][1]()
                 
             else:
                 # Gemini Vision (기본)
-                import google.generativeai as genai
-                
-                api_key = os.getenv('GEMINI_API_KEY')
-                if not api_key:
-                    print("   ⚠️  Gemini API 키가 없습니다. 기본 분석 사용...")
+                if 'gemini' not in handlers:
+                    warning("   ⚠️  Gemini API 키가 없습니다. 기본 분석 사용...")
                     return self._default_analysis(image_path)
                 
-                genai.configure(api_key=api_key)
-                model = genai.GenerativeModel('gemini-1.5-flash')
-                
-                img = Image.open(image_path)
-                response = model.generate_content([prompt, img])
-                result_text = response.text
+                result_text = handlers['gemini'][1]()
             
             # JSON 파싱
             import re
             json_match = re.search(r'\{[\s\S]*\}', result_text)
             if json_match:
-                return json.loads(json_match.group())
+                return loads(json_match.group())
             
             return {
                 'detected_subject': image_path.stem,
@@ -316,9 +357,48 @@ class AutoVideoCreator:
             }
             
         except Exception as e:
-            print(f"   ⚠️  분석 실패: {e}")
+            warning(f"   ⚠️  분석 실패: {e}")
             return self._default_analysis(image_path)
     
+    def _vision_handlers(self, prompt, image_path):
+        """API 키가 있는 공급자별 이미지 분석 함수 {provider: (model, fn)}"""
+        handlers = {}
+        
+        if get_api_key('OPENAI_API_KEY'):
+            def openai_vision():
+                import base64
+                
+                # 이미지를 base64로 인코딩
+                with open(image_path, 'rb') as f:
+                    image_base64 = base64.b64encode(f.read()).decode()
+                
+                return openai_chat(
+                    [
+                        {
+                            "role": "user",
+                            "content": [
+                                {"type": "text", "text": prompt},
+                                {
+                                    "type": "image_url",
+                                    "image_url": {
+                                        "url": f"data:image/jpeg;base64,{image_base64}"
+                                    }
+                                }
+                            ]
+                        }
+                    ],
+                    max_tokens=500
+                )
+            handlers['openai'] = (OPENAI_MODEL, openai_vision)
+        
+        if get_api_key('GEMINI_API_KEY'):
+            def gemini_vision():
+                from PIL import Image
+                return gemini_generate([prompt, Image.open(image_path)])
+            handlers['gemini'] = (GEMINI_MODEL, gemini_vision)
+        
+        return handlers
+    
     def _default_analysis(self, image_path):
         """기본 분석 결과"""
         return {
@@ -328,44 +408,41 @@ class AutoVideoCreator:
             'suggested_category': 'general'
         }
     
-    def create_high_quality_video(self, image_path, version, image_analysis):
-        """고화질 비디오 생성"""
-        import requests
+    def create_high_quality_video(self, image_path, version, image_analysis, quality=None):
+        """고화질 비디오 생성 (quality를 주지 않으면 생성기 기본 화질)"""
+        quality = quality or self.quality
         import base64
-        import time
         
-        api_key = os.getenv('DID_API_KEY')
+        annotate(version_id=version.version_id, quality=quality)
+        
+        api_key = get_api_key('DID_API_KEY')
         if not api_key:
-            print(f"      ⚠️  D-ID API 키가 없습니다. 시뮬레이션 모드...")
+            warning(f"      ⚠️  D-ID API 키가 없습니다. 시뮬레이션 모드...")
             # 시뮬레이션: 정보만 저장
-            output_dir = Path('output/videos')
-            output_dir.mkdir(parents=True, exist_ok=True)
-            output_path = output_dir / f"{image_path.stem}_{version['version_id']}_HD.mp4"
+            output_path = self._video_path(image_path, version)
             
             # 메타데이터만 저장
             metadata = {
                 'version': version,
-                'quality': self.quality,
-                'resolution': '1920x1080' if self.quality == 'high' else '3840x2160',
+                'quality': quality,
+                'resolution': '1920x1080' if quality == 'high' else '3840x2160',
                 'status': 'simulated',
-                'description': version.get('description', '')  # 설명란 저장
+                'description': version.description  # 설명란 저장
             }
             
-            with open(output_path.with_suffix('.json'), 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
+            write_json(self._video_path(image_path, version, '.json'), metadata, human=True)
             
             # 설명란을 별도 텍스트 파일로도 저장
-            desc_path = output_path.with_suffix('.txt')
+            desc_path = self._video_path(image_path, version, '.txt')
             with open(desc_path, 'w', encoding='utf-8') as f:
-                f.write(version.get('description', ''))
+                f.write(version.description)
             
-            print(f"      💡 실제 고화질 비디오를 생성하려면 D-ID API 키가 필요합니다.")
-            print(f"      📄 설명란 저장됨: {desc_path}")
+            progress(f"      💡 실제 고화질 비디오를 생성하려면 D-ID API 키가 필요합니다.")
+            progress(f"      📄 설명란 저장됨: {desc_path}")
             return str(output_path)
         
         try:
             # D-ID API 호출
-            url = "https://api.d-id.com/talks"
             headers = {
                 "Authorization": f"Basic {base64.b64encode(api_key.encode()).decode()}",
                 "Content-Type": "application/json"
@@ -376,16 +453,16 @@ class AutoVideoCreator:
                 image_base64 = base64.b64encode(f.read()).decode()
             
             # 화질 설정
-            quality_settings = self.did_config['video_generation']['quality_options'][self.quality]
+            quality_settings = self.did_config['video_generation']['quality_options'][quality]
             
             payload = {
                 "source_url": f"data:image/jpeg;base64,{image_base64}",
                 "script": {
                     "type": "text",
-                    "input": version['script'],
+                    "input": version.script,
                     "provider": {
                         "type": "microsoft",
-                        "voice_id": version['voice_id']
+                        "voice_id": version.voice_id
                     }
                 },
                 "config": {
@@ -400,67 +477,84 @@ class AutoVideoCreator:
                 "result_format": "mp4"
             }
             
-            print(f"      📤 D-ID API 호출 중 ({quality_settings['description']})...")
-            response = requests.post(url, headers=headers, json=payload)
+            # 웹훅 모드: 완료 콜백을 받을 URL 전달
+            receiver = get_receiver()
+            if receiver:
+                payload["webhook"] = receiver.webhook_url()
+            
+            progress(f"      📤 D-ID API 호출 중 ({quality_settings['description']})...")
+            response = did_request('POST', '/talks', headers=headers, json=payload)
             
             if response.status_code == 201:
                 talk_id = response.json()['id']
-                print(f"      ⏳ 비디오 생성 중... (ID: {talk_id})")
+                annotate(talk_id=talk_id)
+                progress(f"      ⏳ 비디오 생성 중... (ID: {talk_id})")
+                
+                # 비디오 생성 완료 대기 (웹훅 콜백 또는 폴링)
+                status_path = f"/talks/{talk_id}"
+                polls = []
+                
+                def on_status(data):
+                    polls.append(data.get('status'))
+                    progress(f"      ⏳ 진행 중... ({data.get('status')}, {len(polls)}회 확인)")
+                
+                status_data = wait_for_talk(
+                    talk_id,
+                    lambda: did_request('GET', status_path, headers=headers).json(),
+                    max_wait=300,  # 최대 5분
+                    on_status=on_status
+                )
                 
-                # 비디오 생성 완료 대기
-                status_url = f"{url}/{talk_id}"
-                max_attempts = 60  # 최대 5분
-                for i in range(max_attempts):
-                    time.sleep(5)
-                    status_response = requests.get(status_url, headers=headers)
-                    status_data = status_response.json()
+                if status_data and status_data['status'] == 'done':
+                    video_url = status_data['result_url']
                     
-                    if status_data['status'] == 'done':
-                        video_url = status_data['result_url']
-                        
-                        # 비디오 다운로드
-                        output_dir = Path('output/videos')
-                        output_dir.mkdir(parents=True, exist_ok=True)
-                        output_path = output_dir / f"{image_path.stem}_{version['version_id']}_HD.mp4"
-                        
-                        video_response = requests.get(video_url)
-                        with open(output_path, 'wb') as f:
-                            f.write(video_response.content)
-                        
-                        print(f"      ✅ 고화질 비디오 생성 완료!")
-                        return str(output_path)
+                    # 비디오 다운로드
+                    output_path = self._video_path(image_path, version)
                     
-                    elif status_data['status'] == 'error':
-                        print(f"      ❌ 오류 발생: {status_data.get('error')}")
-                        break
+                    get_retention().ensure_space()
+                    video_content = download(video_url)
+                    with open(output_path, 'wb') as f:
+                        f.write(video_content)
                     
-                    print(f"      ⏳ 진행 중... ({i+1}/{max_attempts})")
+                    progress(f"      ✅ 고화질 비디오 생성 완료!")
+                    return str(output_path)
                 
-                print("      ⚠️  타임아웃")
+                elif status_data:
+                    report_error(f"      ❌ 오류 발생: {status_data.get('error')}")
+                
+                else:
+                    warning("      ⚠️  타임아웃")
             else:
-                print(f"      ❌ API 오류: {response.status_code}")
-                print(f"         {response.text}")
+                report_error(f"      ❌ API 오류: {response.status_code}")
+                report_error(f"         {response.text}")
             
         except Exception as e:
-            print(f"      ❌ 비디오 생성 실패: {e}")
+            report_error(f"      ❌ 비디오 생성 실패: {e}")
         
         # 실패시 시뮬레이션 경로 반환
-        output_dir = Path('output/videos')
-        output_dir.mkdir(parents=True, exist_ok=True)
-        return str(output_dir / f"{image_path.stem}_{version['version_id']}_HD.mp4")
+        return str(self._video_path(image_path, version))
+    
+    def _video_path(self, image_path, version, suffix='.mp4'):
+        """버전별 비디오 / 설명란 경로 (output_layout이 샤드 폴더 + 매니페스트 처리)"""
+        return get_layout().path_for('videos', f"{image_path.stem}_{version.version_id}_HD{suffix}",
+                                     stem=image_path.stem, version_id=version.version_id,
+                                     language=self.language)
     
     def save_result(self, result):
         """결과 저장"""
         output_dir = Path('output/results')
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        filename = f"result_{result['language']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        # 여러 이미지를 동시에 처리하므로 이미지 이름을 넣어 파일명 충돌 방지
+        image_stem = Path(result['source_image']).stem
+        filename = f"result_{result['language']}_{image_stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         filepath = output_dir / filename
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        with catalog_transaction() as catalog:
+            write_json(filepath, result, human=True)
+            catalog.add('result', filepath, result)
         
-        print(f"\n💾 결과 저장: {filepath}")
+        progress(f"\n💾 결과 저장: {filepath}")
     
     def process_all_images(self):
         """input/images/ 폴더의 모든 이미지 처리"""
@@ -469,38 +563,65 @@ class AutoVideoCreator:
             print(f"❌ {image_dir} 폴더가 없습니다.")
             return []
         
-        image_files = list(image_dir.glob('*.jpg')) + list(image_dir.glob('*.png')) + list(image_dir.glob('*.jpeg'))
+        # 죽은 작업자가 선점했던 파일부터 되돌린 뒤 스캔
+        claims = get_claims().start()
+        
+        # 증분 인덱스: 새로 들어왔거나 바뀐 이미지만 (확장자 대소문자 무시)
+        index = get_input_index()
+        pending = index.pending_images(image_dir)
+        image_files = [item['image'] for item in pending]
         
         if not image_files:
-            print(f"❌ {image_dir}에 이미지 파일이 없습니다.")
+            print(f"❌ {image_dir}에 새 이미지 파일이 없습니다. ({index.format_scan()})")
             return []
         
-        print(f"\n📂 {len(image_files)}개의 이미지 발견")
-        
-        results = []
-        for i, image_path in enumerate(image_files, 1):
-            print(f"\n{'='*80}")
-            print(f"처리 중: [{i}/{len(image_files)}] {image_path.name}")
-            print(f"{'='*80}")
+        print(f"\n📂 {len(image_files)}개의 이미지 발견 ({index.format_scan()})")
+        
+        def process_one(indexed):
+            i, image_path = indexed
+            # 처리 직전에 input/processing/<작업자>/로 옮겨 선점 (다른 프로세스가 먼저 가져갔으면 건너뜀)
+            claim = claims.claim(image_path)
+            if claim is None:
+                progress("⏭️  다른 작업자가 처리 중이라 건너뜀", image=image_path.name)
+                return None
+            image_path = claim.paths[0]
+            progress(f"\n{'='*80}")
+            progress(f"처리 중: [{i}/{len(image_files)}] {image_path.name}")
+            progress(f"{'='*80}")
             
             try:
-                result = self.auto_generate_from_image(image_path)
-                results.append(result)
-                
-                # 처리 완료된 이미지 이동
-                completed_dir = Path('input/completed')
-                completed_dir.mkdir(parents=True, exist_ok=True)
-                import shutil
-                shutil.move(str(image_path), str(completed_dir / image_path.name))
-                print(f"\n✅ 완료! 이미지를 {completed_dir}로 이동")
-                
-            except Exception as e:
-                print(f"\n❌ 오류: {e}")
+                result = self.auto_generate_from_image(image_path, source_path=claim.originals[0])
+            except BaseException:
+                claims.release(claim)
+                raise
+            
+            # 처리 완료된 이미지 이동
+            completed_dir = Path('input/completed')
+            completed_dir.mkdir(parents=True, exist_ok=True)
+            import shutil
+            shutil.move(str(image_path), str(completed_dir / image_path.name))
+            claims.finish(claim)
+            progress(f"\n✅ 완료! 이미지를 {completed_dir}로 이동", image=image_path.name)
+            return result
+        
+        # 이미지 단위 병렬 처리 (단계별 적응형 동시성 제어)
+        results = []
+        outcomes = map_concurrently(process_one, enumerate(image_files, 1))
+        flush_events()
+        for item, outcome in zip(pending, outcomes):
+            if outcome is None:
+                print(f"\n⏭️  {item['name']}: 다른 작업자가 처리함")
                 continue
+            observe_item('auto', not isinstance(outcome, Exception))
+            if isinstance(outcome, Exception):
+                print(f"\n❌ 오류 ({item['name']}): {outcome}")
+            else:
+                index.mark_done(item)
+                results.append(outcome)
         
         return results
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description='완전 자동 숏폼 비디오 생성기')
     parser.add_argument('--lang', type=str, default='ko', 
                        choices=['ko', 'zh', 'en', 'ja', 'th'],
@@ -509,24 +630,33 @@ def main():
                        choices=['high', 'ultra'],
                        help='비디오 화질 (high=1080p, ultra=4K)')
     parser.add_argument('--ai', type=str, default='gemini',
-                       choices=['gemini', 'openai', 'gpt'],
-                       help='AI Provider (gemini=Gemini AI [저렴], openai/gpt=GPT-4o [고품질])')
+                       choices=['gemini', 'openai', 'gpt', 'auto'],
+                       help='AI Provider (gemini=Gemini AI [저렴], openai/gpt=GPT-4o [고품질], auto=지연 기반 자동 선택)')
+    parser.add_argument('--hedge', action='store_true',
+                       help='auto 모드에서 1순위 공급자가 p95보다 늦으면 2순위도 동시 호출')
     parser.add_argument('--image', type=str, help='특정 이미지 파일 경로 (선택사항)')
+    add_profile_argument(parser)
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    start_profiling('auto', args.profile)
     
     # gpt -> openai로 변환
-    ai_provider = 'openai' if args.ai in ['openai', 'gpt'] else 'gemini'
+    ai_provider = 'openai' if args.ai in ['openai', 'gpt'] else args.ai
     
     print("\n" + "="*80)
     print("🎬 완전 자동 숏폼 비디오 생성기")
     print("="*80)
     print(f"언어: {args.lang}")
     print(f"화질: {args.quality.upper()}")
-    print(f"AI: {ai_provider.upper()} {'(GPT-4o Vision)' if ai_provider == 'openai' else '(Gemini 1.5)'}")
+    ai_labels = {'openai': '(GPT-4o Vision)', 'gemini': '(Gemini 1.5)',
+                 'auto': '(지연 기반 라우팅' + (' + 헤징)' if args.hedge else ')')}
+    print(f"AI: {ai_provider.upper()} {ai_labels[ai_provider]}")
     print("="*80)
     
-    creator = AutoVideoCreator(language=args.lang, quality=args.quality, ai_provider=ai_provider)
+    creator = AutoVideoCreator(language=args.lang, quality=args.quality, ai_provider=ai_provider, hedge=args.hedge)
+    start_exporter()
+    get_retention().start()
+    get_compactor().start()
     
     if args.image:
         # 특정 이미지만 처리
@@ -549,6 +679,30 @@ def main():
                 print(f"\n📁 {result['source_image']}")
                 print(f"   제목: {result['title']}")
                 print(f"   비디오: {len(result['videos'])}개 버전")
+    
+    # 공급자 재시도 요약 (재시도가 있었던 경우만)
+    retry_summary = format_retry_stats()
+    if retry_summary:
+        print("\n🔁 공급자 재시도 요약:")
+        print(retry_summary)
+    
+    # 단계별 소요 시간 (어디서 시간이 쓰였는지)
+    stage_summary = format_stage_summary()
+    if stage_summary:
+        print("\n⏱️  단계별 소요 시간:")
+        print(stage_summary)
+        print(f"   📄 상세: {write_run_summary('auto')}")
+        if get_exporter().path:
+            print(f"   🧭 트레이스: {get_exporter().path} (chrome://tracing / ui.perfetto.dev)")
+    
+    # 공급자 사용량 / 비용 (호출이 있었던 경우만)
+    cost_summary = get_ledger().format_summary()
+    if cost_summary:
+        print("\n💰 비용 요약:")
+        print(cost_summary)
+        print(f"   📄 상세: {get_ledger().write('auto')}")
+    
+    stop_profiling()
 
 if __name__ == "__main__":
     main()
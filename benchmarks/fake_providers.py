@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+벤치마크용 로컬 공급자 대체 서버
+Gemini (REST generateContent) / OpenAI (chat.completions) / D-ID (talks + 결과 다운로드)를
+하나의 HTTP 서버에서 흉내냄. 지연은 로그정규 분포, 실패는 503/429 비율, 렌더링은 고정 시간
+talk 생성 요청에 webhook URL이 있으면 렌더링이 끝날 때 {id, status, result_url}을 그 URL로 POST
+
+단독 실행:
+    python benchmarks/fake_providers.py --port 9100 --gemini-latency 0.8 --render-seconds 5
+"""
+
+import json
+import math
+import time
+import random
+import argparse
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 파이프라인별로 기대하는 응답 형태 (프롬프트 내용으로 구분)
+IMAGE_ANALYSIS = {
+    'main_topic': '벤치마크 제품 리뷰',
+    'category': 'tech',
+    'high_revenue_keywords': ['최저가', '할인', '리뷰', '추천', '비교'],
+    'top_tier_keywords': ['1분만에', '꿀팁', '대박']
+}
+VISION_ANALYSIS = {
+    'detected_subject': 'Benchmark Gadget',
+    'is_product': True,
+    'description': 'Synthetic product image used for throughput benchmarks',
+    'suggested_category': 'tech',
+    'key_features': ['fast', 'light', 'cheap']
+}
+OPTIMIZED_METADATA = {
+    'title': '벤치마크 제품 | 1분만에 보는 꿀팁',
+    'hashtags': ['#shorts', '#벤치마크', '#리뷰'],
+    'description': '벤치마크용 설명'
+}
+TOPIC_KEYWORDS = {
+    'main_keyword': 'Benchmark Gadget',
+    'keywords': [
+        {'text': f'Benchmark Gadget {word}', 'type': 'action', 'cpc': 'high', 'competition': 'low'}
+        for word in ('review', 'discount', 'coupon')
+    ],
+    'titles': [
+        {'text': 'Benchmark Gadget lowest price', 'ctr_score': 90, 'hook': 'price'},
+        {'text': 'Benchmark Gadget honest review', 'ctr_score': 85, 'hook': 'review'}
+    ],
+    'content_strategy': {'intro': 'hook', 'body': 'info', 'conclusion': 'cta'}
+}
+
+
+def canned_text(prompt):
+    """프롬프트 종류에 맞는 JSON 응답 텍스트"""
+    if '최적화된 제목' in prompt:
+        body = OPTIMIZED_METADATA
+    elif 'detected_subject' in prompt:
+        body = VISION_ANALYSIS
+    elif 'main_topic' in prompt or 'image_description' in prompt or '이미지 분석' in prompt:
+        body = IMAGE_ANALYSIS
+    else:
+        body = TOPIC_KEYWORDS
+    return '```json\n' + json.dumps(body, ensure_ascii=False) + '\n```'
+
+
+class FakeProviderState:
+    """지연 / 실패 / 렌더링 설정과 요청 통계"""
+
+    def __init__(self, latencies=None, latency_sigma=0.3, failure_rate=0.0, render_seconds=5.0):
+        self.latencies = latencies or {'gemini': 0.8, 'openai': 1.2, 'did': 0.3}
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self.render_seconds = render_seconds
+        self.talks = {}
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._talk_ids = 0
+
+    def count(self, endpoint, status):
+        with self._lock:
+            stats = self.requests.setdefault(endpoint, {})
+            stats[str(status)] = stats.get(str(status), 0) + 1
+
+    def delay(self, provider):
+        """로그정규 분포 지연 (중앙값 = 설정값)"""
+        median = self.latencies.get(provider, 0)
+        if median > 0:
+            time.sleep(random.lognormvariate(math.log(median), self.latency_sigma))
+
+    def failure(self):
+        """실패 주입: 503 또는 429 (없으면 None)"""
+        if self.failure_rate and random.random() < self.failure_rate:
+            return random.choice((429, 503))
+        return None
+
+    def new_talk(self):
+        with self._lock:
+            self._talk_ids += 1
+            talk_id = f"tlk_bench_{self._talk_ids}"
+            self.talks[talk_id] = time.time()
+        return talk_id
+
+    def schedule_webhook(self, url, talk_id, result_url):
+        """렌더링 시간이 지나면 완료 콜백 전송 (실제 D-ID처럼 1회만, 실패해도 재시도 없음)"""
+        timer = threading.Timer(self.render_seconds, self._send_webhook, (url, talk_id, result_url))
+        timer.daemon = True
+        timer.start()
+
+    def _send_webhook(self, url, talk_id, result_url):
+        data = json.dumps({'id': talk_id, 'status': 'done', 'duration': 20.5,
+                           'result_url': result_url}).encode('utf-8')
+        request = urllib.request.Request(url, data=data, method='POST',
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except OSError:
+            status = 'unreachable'
+        self.count('did_webhook', status)
+
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    """경로별 공급자 흉내"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length) if length else b''
+        try:
+            return json.loads(raw) if raw else {}
+        except ValueError:
+            return {}
+
+    def _reply(self, endpoint, code, body, content_type='application/json'):
+        data = body if isinstance(body, bytes) else json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        if code == 429:
+            self.send_header('Retry-After', '1')
+        self.end_headers()
+        self.wfile.write(data)
+        self.state.count(endpoint, code)
+
+    def _fail(self, endpoint, provider):
+        self.state.delay(provider)
+        status = self.state.failure()
+        if status:
+            self._reply(endpoint, status, {'error': {'code': status, 'message': 'injected failure'}})
+            return True
+        return False
+
+    def do_POST(self):
+        body = self._body()
+
+        if ':generateContent' in self.path:
+            if self._fail('gemini', 'gemini'):
+                return
+            prompt = ' '.join(part.get('text', '') for content in body.get('contents', [])
+                              for part in content.get('parts', []))
+            self._reply('gemini', 200, {
+                'candidates': [{
+                    'content': {'parts': [{'text': canned_text(prompt)}], 'role': 'model'},
+                    'finishReason': 'STOP',
+                    'index': 0
+                }],
+                'usageMetadata': {'promptTokenCount': len(prompt) // 4 + 258,
+                                  'candidatesTokenCount': len(canned_text(prompt)) // 4}
+            })
+
+        elif self.path.endswith('/chat/completions'):
+            if self._fail('openai', 'openai'):
+                return
+            prompt = json.dumps(body.get('messages', []), ensure_ascii=False)
+            self._reply('openai', 200, {
+                'id': 'chatcmpl-bench',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': body.get('model', 'gpt-4o'),
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': canned_text(prompt)},
+                    'finish_reason': 'stop'
+                }],
+                'usage': {'prompt_tokens': len(prompt) // 4,
+                          'completion_tokens': len(canned_text(prompt)) // 4,
+                          'total_tokens': len(prompt) // 4 + len(canned_text(prompt)) // 4}
+            })
+
+        elif self.path.rstrip('/') == '/talks':
+            if self._fail('did_create', 'did'):
+                return
+            talk_id = self.state.new_talk()
+            if body.get('webhook'):
+                host = self.headers.get('Host')
+                self.state.schedule_webhook(body['webhook'], talk_id,
+                                            f"http://{host}/results/{talk_id}.mp4")
+            self._reply('did_create', 201, {'id': talk_id, 'status': 'created'})
+
+        else:
+            self._reply('unknown', 404, {'error': 'not found'})
+
+    def do_GET(self):
+        if self.path.startswith('/talks/'):
+            if self._fail('did_status', 'did'):
+                return
+            talk_id = self.path.split('/')[2].split('?')[0]
+            created = self.state.talks.get(talk_id)
+            if created is None:
+                self._reply('did_status', 404, {'error': 'talk not found'})
+            elif time.time() - created < self.state.render_seconds:
+                self._reply('did_status', 200, {'id': talk_id, 'status': 'started'})
+            else:
+                host = self.headers.get('Host')
+                self._reply('did_status', 200, {
+                    'id': talk_id,
+                    'status': 'done',
+                    'duration': 20.5,
+                    'result_url': f"http://{host}/results/{talk_id}.mp4"
+                })
+
+        elif self.path.startswith('/results/'):
+            self._reply('download', 200, b'\x00\x00\x00\x18ftypmp42' + b'\x00' * 4096, 'video/mp4')
+
+        else:
+            self._reply('unknown', 404, {'error': 'not found'})
+
+
+def start_fake_providers(host='127.0.0.1', port=0, **settings):
+    """
+    백그라운드 스레드로 대체 서버 시작
+
+    Returns:
+        (server, base_url): server.state에 요청 통계, server.shutdown()으로 종료
+    """
+    server = ThreadingHTTPServer((host, port), FakeProviderHandler)
+    server.daemon_threads = True
+    server.state = FakeProviderState(**settings)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='벤치마크용 Gemini / OpenAI / D-ID 대체 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--gemini-latency', type=float, default=0.8, help='Gemini 응답 지연 중앙값 (초)')
+    parser.add_argument('--openai-latency', type=float, default=1.2, help='OpenAI 응답 지연 중앙값 (초)')
+    parser.add_argument('--did-latency', type=float, default=0.3, help='D-ID API 응답 지연 중앙값 (초)')
+    parser.add_argument('--latency-sigma', type=float, default=0.3, help='로그정규 분포 sigma')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='503/429 주입 비율 (0~1)')
+    parser.add_argument('--render-seconds', type=float, default=5.0, help='D-ID 렌더링 시간 (초)')
+    args = parser.parse_args()
+
+    server, base_url = start_fake_providers(
+        args.host, args.port,
+        latencies={'gemini': args.gemini_latency, 'openai': args.openai_latency, 'did': args.did_latency},
+        latency_sigma=args.latency_sigma,
+        failure_rate=args.failure_rate,
+        render_seconds=args.render_seconds
+    )
+    print(f"🧪 대체 공급자 서버 실행 중: {base_url}")
+    print(f"   GEMINI_API_URL={base_url}")
+    print(f"   OPENAI_BASE_URL={base_url}/v1")
+    print(f"   DID_API_URL={base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(json.dumps(server.state.requests, indent=2))
+
+
+if __name__ == '__main__':
+    main()
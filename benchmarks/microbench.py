@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+CPU 핫패스 마이크로벤치마크
+스크립트 / 설명란 생성, AI 응답 파싱, save_* 저장 함수를 실제 배치 크기로 반복 실행해
+항목당 시간(timeit)과 메모리 할당(tracemalloc)을 측정하고 임계값을 넘으면 실패 처리
+
+사용법:
+    python benchmarks/microbench.py                 # 측정 + 임계값 검사 (초과 시 종료 코드 1)
+    python benchmarks/microbench.py --only parse    # 이름에 parse가 들어간 케이스만
+    python benchmarks/microbench.py --update-thresholds   # 현재 측정값 x 여유 배율로 임계값 갱신
+
+임계값: benchmarks/microbench_thresholds.json
+결과: output/benchmarks/microbench_<시각>.json
+"""
+
+import os
+import sys
+import gc
+import json
+import random
+import shutil
+import timeit
+import argparse
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+THRESHOLDS_PATH = Path(__file__).resolve().parent / 'microbench_thresholds.json'
+LANGUAGES = ('ko', 'zh', 'en', 'ja', 'th')
+SEED = 20240601
+
+
+def sample_ai_response(rng, index):
+    """Gemini/GPT가 실제로 돌려주는 형태: 설명 문장 + ```json 블록"""
+    keywords = [
+        {'text': f"제품{index} 키워드{k}", 'type': rng.choice(['action', 'finance']),
+         'cpc': 'high', 'competition': rng.choice(['low', 'medium'])}
+        for k in range(8)
+    ]
+    titles = [{'text': f"제품{index} 제목{k} | 최저가 쿠폰", 'ctr_score': rng.randint(80, 95), 'hook': '가격'}
+              for k in range(5)]
+    body = json.dumps({
+        'main_keyword': f"제품{index}",
+        'keywords': keywords,
+        'titles': titles,
+        'content_strategy': {'intro': '후킹', 'body': '핵심 정보', 'conclusion': '구매 유도'}
+    }, ensure_ascii=False, indent=2)
+    return f"다음은 요청하신 분석 결과입니다.\n\n```json\n{body}\n```\n\n추가 질문이 있으면 알려주세요."
+
+
+def build_cases(batch):
+    """
+    케이스 목록: (이름, 항목 수, 실행 함수)
+    객체 생성 / 입력 데이터 준비는 측정에서 제외
+    """
+    from multilingual_selector import MultilingualKeywordSelector
+    from auto_video_creator import AutoVideoCreator
+    from keyword_selector import KeywordSelector
+    from shorts_creator import ShortFormCreator
+    from main import YouTubeAutomation
+    from schemas import VideoRecord
+
+    rng = random.Random(SEED)
+    topics = [f"테스트 제품 {i}" for i in range(batch)]
+    keywords = [[f"{topic} 최저가", f"{topic} 쿠폰", f"{topic} 후기"] for topic in topics]
+    cases = []
+
+    for lang in LANGUAGES:
+        selector = MultilingualKeywordSelector(lang)
+        creator = AutoVideoCreator(language=lang)
+        image_analysis = {'detected_subject': '테스트 제품', 'description': '벤치마크용 제품 설명'}
+
+        def run_versions(selector=selector):
+            for topic, kws in zip(topics, keywords):
+                selector.generate_versions(topic, kws, f"{topic} 추천", num_versions=3)
+
+        versions = [selector.generate_versions(topic, kws, f"{topic} 추천", num_versions=3)
+                    for topic, kws in zip(topics, keywords)]
+
+        def run_descriptions(creator=creator, versions=versions):
+            for item_versions, kws in zip(versions, keywords):
+                for version in item_versions:
+                    creator.generate_description(version, kws, image_analysis)
+
+        cases.append((f"generate_versions[{lang}]", batch, run_versions))
+        cases.append((f"generate_description[{lang}]", batch * 3, run_descriptions))
+
+    selector = MultilingualKeywordSelector('ko')
+    responses = [sample_ai_response(rng, i) for i in range(batch * 10)]
+
+    def run_parse():
+        for text in responses:
+            selector._parse_ai_response(text)
+
+    cases.append(('_parse_ai_response', len(responses), run_parse))
+
+    for lang in LANGUAGES:
+        shorts = ShortFormCreator('youtube', lang)
+        selling_points = ['가격 경쟁력', '품질 보증', '빠른 배송']
+
+        def run_shorts_script(shorts=shorts):
+            for topic in topics:
+                shorts._create_script(topic, selling_points)
+
+        cases.append((f"_create_script[{lang}]", batch, run_shorts_script))
+
+    # save_* 저장 함수 (임시 작업 디렉터리 안에서 실행)
+    creator = AutoVideoCreator(language='ko')
+    results = [{
+        'language': 'ko', 'quality': 'high', 'source_image': f"input/images/item{i}.jpg",
+        'topic': topic, 'keywords': kws, 'title': f"{topic} 추천",
+        'videos': [VideoRecord(version_id=v.version_id, video_path=f"output/videos/item{i}_{v.version_id}.mp4",
+                               title=v.title, script=v.script, description='설명 ' * 100,
+                               style=v.style, tone=v.tone, duration=v.duration, quality='high')
+                   for v in item_versions],
+        'created_at': datetime.now().isoformat()
+    } for i, (topic, kws, item_versions) in enumerate(zip(topics, keywords, versions))]
+
+    def run_save_result():
+        for result in results:
+            creator.save_result(result)
+
+    ml_selector = MultilingualKeywordSelector('ko')
+
+    def run_save_versions():
+        for item_versions in versions:
+            ml_selector.save_versions(item_versions)
+
+    # YouTubeAutomation()은 API 키 확인(input 대기)을 하므로 생성자 없이 저장 함수만 사용
+    automation = YouTubeAutomation.__new__(YouTubeAutomation)
+    metadata = [({'title': f"{topic} 꿀팁", 'hashtags': ['#shorts'] * 15, 'description': '설명 ' * 50},
+                 {'main_topic': topic, 'high_revenue_keywords': kws, 'category': 'tech'})
+                for topic, kws in zip(topics, keywords)]
+
+    def run_save_metadata():
+        for i, (optimized, analysis) in enumerate(metadata):
+            automation.save_metadata(f"item{i}", optimized, analysis, None)
+
+    kw_selector = KeywordSelector()
+
+    def run_save_script():
+        for i, (topic, kws) in enumerate(zip(topics, keywords)):
+            kw_selector.save_script({'title': topic, 'keywords': kws, 'script_text': '대본 ' * 100},
+                                    filename=f"bench_{i}.json")
+
+    shorts = ShortFormCreator('youtube', 'ko')
+    shorts_results = [{
+        'product': f"item{i}", 'platform': 'youtube', 'language': 'ko',
+        'chinese_keywords': '测试', 'selling_points': ['가격'],
+        'script': shorts._create_script(topic, ['가격', '품질', '배송']),
+        'thumbnail': '썸네일', 'video_length': 60, 'quality': 'high',
+        'youtube_upload_url': 'https://studio.youtube.com/'
+    } for i, topic in enumerate(topics)]
+
+    def run_shorts_save():
+        for result in shorts_results:
+            shorts._save_result(result)
+
+    cases.extend([
+        ('save_result', batch, run_save_result),
+        ('save_versions', batch * 3, run_save_versions),
+        ('save_metadata', batch, run_save_metadata),
+        ('save_script', batch, run_save_script),
+        ('shorts_save_result', batch, run_shorts_save),
+    ])
+    return cases
+
+
+def measure(fn, items, repeat, number):
+    """
+    Returns:
+        dict: 항목당 최소/중앙 시간(µs), 최대 메모리(KB), 순증 할당 블록 수
+    """
+    from event_bus import flush_events
+
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        fn()  # 예열 (지연 import / 캐시)
+        timings = sorted(timeit.repeat(fn, repeat=repeat, number=number))
+        # 앞에서 쌓인 진행 이벤트를 비운 뒤 메모리 측정 (콘솔 출력도 devnull로)
+        flush_events()
+
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        flush_events()
+
+    net_blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+    per_item = [t / number / items * 1e6 for t in timings]
+    return {
+        'items': items,
+        'best_us_per_item': round(per_item[0], 2),
+        'median_us_per_item': round(per_item[len(per_item) // 2], 2),
+        'peak_kb': round(peak / 1024, 1),
+        'net_blocks': net_blocks
+    }
+
+
+def load_thresholds():
+    try:
+        with open(THRESHOLDS_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def check(results, thresholds):
+    """임계값 초과 항목 목록"""
+    failures = []
+    for name, result in results.items():
+        limit = thresholds.get('cases', {}).get(name)
+        if not limit:
+            continue
+        if result['best_us_per_item'] > limit['max_us_per_item']:
+            failures.append(f"{name}: {result['best_us_per_item']}µs/항목 > {limit['max_us_per_item']}µs")
+        if result['peak_kb'] > limit['max_peak_kb']:
+            failures.append(f"{name}: 최대 메모리 {result['peak_kb']}KB > {limit['max_peak_kb']}KB")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CPU 핫패스 마이크로벤치마크')
+    parser.add_argument('--batch', type=int, default=100, help='케이스당 항목 수 (기본 100)')
+    parser.add_argument('--repeat', type=int, default=5, help='timeit 반복 횟수')
+    parser.add_argument('--number', type=int, default=3, help='반복당 실행 횟수')
+    parser.add_argument('--only', help='이름에 이 문자열이 들어간 케이스만 실행')
+    parser.add_argument('--update-thresholds', action='store_true', help='현재 측정값으로 임계값 파일 갱신')
+    parser.add_argument('--time-headroom', type=float, default=3.0, help='임계값 갱신 시 시간 여유 배율')
+    parser.add_argument('--memory-headroom', type=float, default=1.5, help='임계값 갱신 시 메모리 여유 배율')
+    parser.add_argument('--output', default=str(ROOT / 'output' / 'benchmarks'), help='결과 저장 폴더')
+    args = parser.parse_args()
+
+    # 저장소 input/output을 건드리지 않도록 설정만 복사한 임시 디렉터리에서 실행
+    workdir = Path(tempfile.mkdtemp(prefix='microbench_'))
+    for name in ('config', 'prompts'):
+        shutil.copytree(ROOT / name, workdir / name)
+    os.chdir(workdir)
+
+    print("\n" + "=" * 80)
+    print("🔬 CPU 핫패스 마이크로벤치마크")
+    print("=" * 80)
+
+    results = {}
+    try:
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            cases = build_cases(args.batch)
+        for name, items, fn in cases:
+            if args.only and args.only not in name:
+                continue
+            random.seed(SEED)
+            results[name] = measure(fn, items, args.repeat, args.number)
+            result = results[name]
+            print(f"   {name:<28} {result['best_us_per_item']:>10.2f}µs/항목 "
+                  f"(중앙 {result['median_us_per_item']:.2f}) "
+                  f"최대 {result['peak_kb']:>8.1f}KB, 블록 {result['net_blocks']:+d}")
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'settings': {'batch': args.batch, 'repeat': args.repeat, 'number': args.number},
+        'results': results
+    }
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"microbench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 결과 저장: {output_path}")
+
+    thresholds = load_thresholds()
+    if args.update_thresholds:
+        cases = thresholds.get('cases', {})
+        for name, result in results.items():
+            cases[name] = {
+                'max_us_per_item': round(result['best_us_per_item'] * args.time_headroom, 1),
+                # 작은 값은 인터프리터 내부 할당 편차가 크므로 최소 16KB
+                'max_peak_kb': round(max(result['peak_kb'] * args.memory_headroom, 16.0), 1)
+            }
+        thresholds = {
+            'description': "항목당 최선 시간(µs)과 1회 실행 최대 메모리(KB) 상한. "
+                           "--update-thresholds로 갱신 (시간은 기기 편차를 고려해 여유 있게)",
+            'batch': args.batch,
+            'cases': dict(sorted(cases.items()))
+        }
+        with open(THRESHOLDS_PATH, 'w', encoding='utf-8') as f:
+            json.dump(thresholds, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"📝 임계값 갱신: {THRESHOLDS_PATH}")
+        return
+
+    failures = check(results, thresholds)
+    if failures:
+        print("\n❌ 임계값 초과:")
+        for failure in failures:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("✅ 모든 케이스가 임계값 이내입니다.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+명령별 시작 시간 벤치마크
+cli.py 명령마다 새 인터프리터를 띄워 필요한 모듈을 import하는 데 걸린 시간(cli.load)과
+프로세스 전체 시간을 측정하고, -X importtime으로 가장 무거운 최상위 import를 기록.
+임계값을 넘으면 실패 처리 (지연 import가 다시 즉시 import로 바뀌는 회귀 감지)
+
+사용법:
+    python benchmarks/startup.py                    # 측정 + 임계값 검사 (초과 시 종료 코드 1)
+    python benchmarks/startup.py --only catalog     # 이름에 catalog가 들어간 명령만
+    python benchmarks/startup.py --update-thresholds      # 현재 측정값 x 여유 배율로 임계값 갱신
+
+임계값: benchmarks/startup_thresholds.json
+결과: output/benchmarks/startup_<시각>.json
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from cli import COMMANDS
+
+THRESHOLDS_PATH = Path(__file__).resolve().parent / 'startup_thresholds.json'
+
+# 자식 프로세스: cli import 이후 명령 모듈 import 시간만 따로 출력
+LOAD_SNIPPET = (
+    "import time, cli\n"
+    "start = time.perf_counter()\n"
+    "cli.load({name!r})\n"
+    "print(round((time.perf_counter() - start) * 1000, 2))\n"
+)
+
+
+def run_python(code, workdir, importtime=False):
+    """새 인터프리터에서 코드 실행 → (전체 ms, stdout, stderr)"""
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    start = time.perf_counter()
+    completed = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"종료 코드 {completed.returncode}")
+    return elapsed, completed.stdout, completed.stderr
+
+
+def heaviest_imports(stderr, top):
+    """
+    -X importtime 출력에서 cli 이후 최상위 import를 누적 시간 순으로
+    형식: 'import time: self [us] | cumulative | imported package' (들여쓰기 = 깊이)
+    """
+    entries, after_cli = [], False
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2]
+        if name.startswith('  '):
+            continue
+        name = name.strip()
+        if name == 'cli':
+            after_cli = True
+            continue
+        if after_cli:
+            entries.append((name, int(parts[1])))
+    entries.sort(key=lambda entry: entry[1], reverse=True)
+    return [{'module': name, 'cumulative_ms': round(us / 1000, 2)} for name, us in entries[:top]]
+
+
+def measure(name, workdir, repeat, top):
+    """명령 1개: repeat번 새 프로세스로 import (최선 / 중앙값) + importtime 1회"""
+    load_ms, wall_ms = [], []
+    for _ in range(repeat):
+        elapsed, stdout, _ = run_python(LOAD_SNIPPET.format(name=name), workdir)
+        load_ms.append(float(stdout.strip().splitlines()[-1]))
+        wall_ms.append(elapsed)
+    _, _, stderr = run_python(LOAD_SNIPPET.format(name=name), workdir, importtime=True)
+    load_ms.sort()
+    wall_ms.sort()
+    return {
+        'modules': list(COMMANDS[name][0]),
+        'best_load_ms': load_ms[0],
+        'median_load_ms': load_ms[len(load_ms) // 2],
+        'best_wall_ms': round(wall_ms[0], 2),
+        'median_wall_ms': round(wall_ms[len(wall_ms) // 2], 2),
+        'heaviest': heaviest_imports(stderr, top)
+    }
+
+
+def load_thresholds():
+    try:
+        with open(THRESHOLDS_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def check(results, thresholds):
+    """임계값 초과 항목 목록"""
+    failures = []
+    for name, result in results.items():
+        limit = thresholds.get('commands', {}).get(name)
+        if not limit:
+            continue
+        if result['best_load_ms'] > limit['max_load_ms']:
+            failures.append(f"{name}: import {result['best_load_ms']}ms > {limit['max_load_ms']}ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='명령별 시작 시간 벤치마크')
+    parser.add_argument('--repeat', type=int, default=5, help='명령당 프로세스 실행 횟수')
+    parser.add_argument('--top', type=int, default=5, help='기록할 무거운 import 개수')
+    parser.add_argument('--only', help='이름에 이 문자열이 들어간 명령만 실행')
+    parser.add_argument('--update-thresholds', action='store_true', help='현재 측정값으로 임계값 파일 갱신')
+    parser.add_argument('--time-headroom', type=float, default=2.0, help='임계값 갱신 시 시간 여유 배율')
+    parser.add_argument('--output', default=str(ROOT / 'output' / 'benchmarks'), help='결과 저장 폴더')
+    args = parser.parse_args()
+
+    print("\n" + "=" * 80)
+    print("🚀 명령별 시작 시간")
+    print("=" * 80)
+
+    # import 중에 설정을 읽는 모듈이 있어도 저장소 output을 건드리지 않도록 임시 디렉터리에서 실행
+    workdir = Path(tempfile.mkdtemp(prefix='startup_'))
+    for name in ('config', 'prompts'):
+        shutil.copytree(ROOT / name, workdir / name)
+
+    results = {}
+    try:
+        baseline = sorted(run_python('import cli', workdir)[0] for _ in range(args.repeat))
+        print(f"   {'(인터프리터 + cli)':<28} {baseline[0]:>8.1f}ms")
+        for name in COMMANDS:
+            if args.only and args.only not in name:
+                continue
+            results[name] = result = measure(name, workdir, args.repeat, args.top)
+            heaviest = ', '.join(f"{item['module']} {item['cumulative_ms']:.0f}ms" for item in result['heaviest'][:3])
+            print(f"   {name:<28} {result['best_load_ms']:>8.1f}ms (중앙 {result['median_load_ms']:.1f}, "
+                  f"프로세스 {result['best_wall_ms']:.0f}ms)  {heaviest}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'settings': {'repeat': args.repeat},
+        'baseline_wall_ms': round(baseline[0], 2),
+        'results': results
+    }
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"startup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 결과 저장: {output_path}")
+
+    thresholds = load_thresholds()
+    if args.update_thresholds:
+        commands = thresholds.get('commands', {})
+        for name, result in results.items():
+            # 아주 가벼운 명령은 디스크 캐시 편차가 더 크므로 최소 20ms
+            commands[name] = {'max_load_ms': round(max(result['best_load_ms'] * args.time_headroom, 20.0), 1)}
+        thresholds = {
+            'description': "명령별 모듈 import 시간(cli.load, 최선 ms) 상한. "
+                           "--update-thresholds로 갱신 (기기 편차를 고려해 여유 있게)",
+            'commands': dict(sorted(commands.items()))
+        }
+        with open(THRESHOLDS_PATH, 'w', encoding='utf-8') as f:
+            json.dump(thresholds, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"📝 임계값 갱신: {THRESHOLDS_PATH}")
+        return
+
+    failures = check(results, thresholds)
+    if failures:
+        print("\n❌ 임계값 초과:")
+        for failure in failures:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("✅ 모든 명령이 임계값 이내입니다.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+엔드투엔드 처리량 벤치마크
+로컬 대체 공급자 서버(fake_providers.py)를 띄우고 합성 이미지 배치로
+YouTubeAutomation.run / AutoVideoCreator.process_all_images 를 실행해
+시간당 처리 이미지 수, 단계별 지연 백분위, 최대 RSS를 측정하고 JSON으로 저장
+(ShortFormCreator는 공급자 호출 없이 템플릿만 채우므로 제외, microbench.py에서 측정)
+
+사용법:
+    python benchmarks/throughput.py                          # 10/100/1000장, 두 파이프라인 전부
+    python benchmarks/throughput.py --sizes 10,100 --pipelines run,auto --failure-rate 0.05
+    python benchmarks/throughput.py --render-seconds 2 --poll-interval 1
+    python benchmarks/throughput.py --webhook                # D-ID 완료를 웹훅 콜백으로 수신
+
+결과: output/benchmarks/throughput_<시각>.json (직전 결과와 처리량 비교 출력)
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import argparse
+import resource
+import tempfile
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+PIPELINES = ('run', 'auto')
+STAGES = ('analysis', 'keywords', 'render')
+RESULT_FILE = 'bench_result.json'
+
+
+def percentiles(values):
+    """p50 / p95 / p99 / 최대 (초)"""
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))], 4)
+
+    return {
+        'count': len(ordered),
+        'p50': pick(0.50),
+        'p95': pick(0.95),
+        'p99': pick(0.99),
+        'max': round(ordered[-1], 4)
+    }
+
+
+def prepare_workdir(pipeline, size, args):
+    """설정 복사 + 합성 이미지/스크립트 생성 (저장소 input/output은 건드리지 않음)"""
+    from PIL import Image
+
+    workdir = Path(tempfile.mkdtemp(prefix=f"bench_{pipeline}_{size}_"))
+    for name in ('config', 'prompts', 'workflows'):
+        shutil.copytree(ROOT / name, workdir / name)
+
+    config_path = workdir / 'config' / 'config.json'
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    if not args.keep_rate_limits:
+        # 대체 서버 대상이므로 실제 공급자 한도는 해제 (동시성 자체를 측정)
+        config.setdefault('rate_limits', {})['providers'] = {}
+    config.setdefault('rate_limits', {})['shared_state'] = 'output/.state/rate_limits.db'
+    if args.poll_interval is not None:
+        config.setdefault('did_webhook', {})['poll_interval'] = args.poll_interval
+    if args.webhook:
+        # 대체 서버가 같은 기기에서 콜백하므로 루프백 + OS 할당 포트
+        config.setdefault('did_webhook', {}).update(enabled=True, host='127.0.0.1', port=0, public_url='')
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+    images_dir = workdir / 'input' / 'images'
+    scripts_dir = workdir / 'input' / 'scripts'
+    images_dir.mkdir(parents=True)
+    scripts_dir.mkdir(parents=True)
+    rng = random.Random(size)
+    for i in range(size):
+        name = f"bench_{i:05d}"
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        Image.new('RGB', (args.image_size, args.image_size), color).save(images_dir / f"{name}.jpg", quality=85)
+        if pipeline == 'run':
+            with open(scripts_dir / f"{name}.json", 'w', encoding='utf-8') as f:
+                json.dump({
+                    'title': f"벤치마크 {i}",
+                    'script_text': '안녕하세요! 벤치마크용 대본입니다.',
+                    'duration': 15,
+                    'voice_id': 'ko-KR-SunHiNeural',
+                    'category': 'tech',
+                    'description': '벤치마크'
+                }, f, ensure_ascii=False)
+    return workdir
+
+
+def run_worker(pipeline, size, lang):
+    """
+    작업 디렉터리(cwd)에서 파이프라인 1회 실행 후 bench_result.json 기록
+    (최대 RSS를 실행별로 측정하기 위해 별도 프로세스에서 호출됨)
+    """
+    start = time.monotonic()
+    completed = 0
+
+    if pipeline == 'run':
+        from main import YouTubeAutomation
+        automation = YouTubeAutomation()
+        automation.run()
+        completed = len(list(Path('input/completed').glob('*.json')))
+
+    elif pipeline == 'auto':
+        from auto_video_creator import AutoVideoCreator
+        completed = len(AutoVideoCreator(language=lang).process_all_images())
+
+    wall = time.monotonic() - start
+
+    from concurrency import get_controller
+    stages = {}
+    for stage in STAGES:
+        controller = get_controller(stage)
+        if controller.latencies:
+            stages[stage] = dict(percentiles(list(controller.latencies)), final_limit=round(controller.limit, 2))
+
+    from retry_policy import get_retry_policy
+    from cost_accounting import get_ledger
+    cost = get_ledger().totals()
+    result = {
+        'pipeline': pipeline,
+        'size': size,
+        'completed': completed,
+        'wall_seconds': round(wall, 3),
+        'images_per_hour': round(size / wall * 3600, 1) if wall > 0 else None,
+        'stages': stages,
+        # Linux ru_maxrss 단위는 KB
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'retries': get_retry_policy().stats.snapshot(),
+        # 대체 서버 응답의 사용량을 config 단가로 환산한 추정 비용
+        'cost_usd': round(cost['cost_usd'], 6),
+        'cost_per_completed_usd': round(cost['cost_usd'] / completed, 6) if completed else None,
+        'did_credits': cost['credits']
+    }
+    with open(RESULT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+def run_one(pipeline, size, base_url, server, args):
+    """작업 디렉터리 준비 → 워커 프로세스 실행 → 결과 수집"""
+    workdir = prepare_workdir(pipeline, size, args)
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get('PYTHONPATH')])),
+        GEMINI_API_KEY='bench', OPENAI_API_KEY='bench', DID_API_KEY='bench',
+        GEMINI_API_URL=base_url, OPENAI_BASE_URL=f"{base_url}/v1", DID_API_URL=base_url,
+        PROVIDER_MODE='live'
+    )
+    env.pop('RATE_LIMIT_STATE', None)
+    before = {endpoint: dict(stats) for endpoint, stats in server.state.requests.items()}
+
+    print(f"\n⏱️  {pipeline} × {size}장 실행 중... ({workdir})")
+    with open(workdir / 'bench.log', 'w', encoding='utf-8') as log:
+        process = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), '--worker', pipeline,
+             '--count', str(size), '--lang', args.lang],
+            cwd=workdir, env=env, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT
+        )
+
+    result_path = workdir / RESULT_FILE
+    if process.returncode != 0 or not result_path.exists():
+        print(f"   ❌ 실패 (종료 코드 {process.returncode}), 로그: {workdir / 'bench.log'}")
+        return {'pipeline': pipeline, 'size': size, 'error': f"exit {process.returncode}",
+                'log': str(workdir / 'bench.log')}
+
+    with open(result_path, 'r', encoding='utf-8') as f:
+        result = json.load(f)
+
+    # 이번 실행 동안의 대체 서버 요청 수 (엔드포인트 → 상태 코드별)
+    requests_made = {}
+    for endpoint, stats in server.state.requests.items():
+        delta = {code: count - before.get(endpoint, {}).get(code, 0) for code, count in stats.items()}
+        delta = {code: count for code, count in delta.items() if count}
+        if delta:
+            requests_made[endpoint] = delta
+    result['provider_requests'] = requests_made
+
+    print(f"   ✓ {result['wall_seconds']}초, {result['images_per_hour']}장/시간, "
+          f"최대 RSS {result['peak_rss_mb']}MB")
+    if result.get('cost_usd'):
+        per_item = result['cost_per_completed_usd']
+        print(f"     비용: ${result['cost_usd']:.4f}"
+              + (f" (완료 1건당 ${per_item:.4f})" if per_item is not None else '')
+              + f", D-ID 크레딧 {result['did_credits']}")
+    for stage, stats in result['stages'].items():
+        print(f"     {stage}: p50 {stats['p50']}s / p95 {stats['p95']}s / p99 {stats['p99']}s "
+              f"(한도 {stats['final_limit']})")
+
+    if not args.keep_workdirs:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare_with_previous(report, output_dir, current_path):
+    """직전 결과 파일과 같은 (파이프라인, 크기) 처리량 비교"""
+    previous_files = sorted(p for p in output_dir.glob('throughput_*.json') if p != current_path)
+    if not previous_files:
+        return
+    with open(previous_files[-1], 'r', encoding='utf-8') as f:
+        previous_report = json.load(f)
+    previous = {(r['pipeline'], r['size']): r for r in previous_report.get('runs', [])}
+
+    print(f"\n📈 직전 결과와 비교 ({previous_files[-1].name}: "
+          f"{previous_report.get('git_commit')} → {report['git_commit']})")
+    for run in report['runs']:
+        old = previous.get((run['pipeline'], run['size']))
+        if not old or not old.get('images_per_hour') or not run.get('images_per_hour'):
+            continue
+        change = (run['images_per_hour'] / old['images_per_hour'] - 1) * 100
+        print(f"   {run['pipeline']} × {run['size']}: {old['images_per_hour']} → "
+              f"{run['images_per_hour']}장/시간 ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='엔드투엔드 처리량 벤치마크')
+    parser.add_argument('--sizes', default='10,100,1000', help='배치 크기 목록 (쉼표 구분)')
+    parser.add_argument('--pipelines', default=','.join(PIPELINES), help='run,auto 중 선택')
+    parser.add_argument('--lang', default='ko', choices=['ko', 'zh', 'en', 'ja', 'th'])
+    parser.add_argument('--gemini-latency', type=float, default=0.8, help='Gemini 응답 지연 중앙값 (초)')
+    parser.add_argument('--openai-latency', type=float, default=1.2, help='OpenAI 응답 지연 중앙값 (초)')
+    parser.add_argument('--did-latency', type=float, default=0.3, help='D-ID API 응답 지연 중앙값 (초)')
+    parser.add_argument('--latency-sigma', type=float, default=0.3, help='지연 로그정규 분포 sigma')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='503/429 주입 비율 (0~1)')
+    parser.add_argument('--render-seconds', type=float, default=5.0, help='D-ID 렌더링 시간 (초)')
+    parser.add_argument('--poll-interval', type=float, help='D-ID 상태 폴링 간격 덮어쓰기 (초)')
+    parser.add_argument('--webhook', action='store_true', help='did_webhook 수신기를 켜고 완료 콜백으로 대기')
+    parser.add_argument('--image-size', type=int, default=512, help='합성 이미지 한 변 (px)')
+    parser.add_argument('--keep-rate-limits', action='store_true', help='config의 공급자 속도 제한 유지')
+    parser.add_argument('--keep-workdirs', action='store_true', help='임시 작업 디렉터리 보존')
+    parser.add_argument('--output', default=str(ROOT / 'output' / 'benchmarks'), help='결과 저장 폴더')
+    # 내부용: 작업 디렉터리에서 파이프라인 1회 실행
+    parser.add_argument('--worker', choices=PIPELINES, help=argparse.SUPPRESS)
+    parser.add_argument('--count', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.count, args.lang)
+        return
+
+    from fake_providers import start_fake_providers
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    pipelines = [name for name in args.pipelines.split(',') if name]
+    unknown = set(pipelines) - set(PIPELINES)
+    if unknown:
+        parser.error(f"알 수 없는 파이프라인: {', '.join(sorted(unknown))}")
+
+    settings = {
+        'latencies': {'gemini': args.gemini_latency, 'openai': args.openai_latency, 'did': args.did_latency},
+        'latency_sigma': args.latency_sigma,
+        'failure_rate': args.failure_rate,
+        'render_seconds': args.render_seconds
+    }
+    server, base_url = start_fake_providers(**settings)
+
+    print("\n" + "=" * 80)
+    print("🏁 엔드투엔드 처리량 벤치마크")
+    print("=" * 80)
+    print(f"대체 서버: {base_url}")
+    print(f"파이프라인: {', '.join(pipelines)} / 배치: {', '.join(map(str, sizes))}장")
+    print(f"지연 중앙값: Gemini {args.gemini_latency}s / OpenAI {args.openai_latency}s / "
+          f"D-ID {args.did_latency}s, 실패율 {args.failure_rate:.0%}, 렌더링 {args.render_seconds}s"
+          + (", 웹훅 대기" if args.webhook else ''))
+
+    runs = []
+    try:
+        for pipeline in pipelines:
+            for size in sizes:
+                runs.append(run_one(pipeline, size, base_url, server, args))
+    finally:
+        server.shutdown()
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': sys.version.split()[0],
+        'settings': dict(settings, poll_interval=args.poll_interval, webhook=args.webhook,
+                         image_size=args.image_size,
+                         keep_rate_limits=args.keep_rate_limits, lang=args.lang),
+        'runs': runs
+    }
+
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"throughput_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    compare_with_previous(report, output_dir, output_path)
+    print(f"\n💾 결과 저장: {output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+단일 진입점
+하위 명령마다 필요한 모듈만 실행할 때 import (파이프라인 / 공급자 / Flask를 미리 불러오지 않음).
+cron으로 자주 도는 짧은 명령(catalog / journal / daemon --once 등)이 시작하는 데 쓰는 시간을 줄임
+
+    python cli.py run [--profile]               # 이미지 + 스크립트 일괄 처리 (main.py)
+    python cli.py auto --lang en                # 이미지만으로 자동 생성
+    python cli.py shorts --product AirPods      # 쇼핑 숏폼
+    python cli.py keyword                       # 키워드 선택 (터미널)
+    python cli.py web --port 5000               # 키워드 선택 (웹 UI)
+    python cli.py daemon [--once]               # 보존 정책 + 저널 압축만 실행
+    python cli.py catalog query --since 7d      # 도구 명령은 인자를 그대로 전달
+    python warm_worker.py exec shorts ...       # 상주 워커에서 실행 (인터프리터 시작 / import 생략)
+
+명령별 시작 시간: python benchmarks/startup.py
+"""
+
+import sys
+import time
+import argparse
+import importlib
+
+# 명령 → (import할 모듈, 설명)
+COMMANDS = {
+    'run': (('main',), '이미지 + 스크립트 일괄 처리 (python main.py와 같음)'),
+    'auto': (('auto_video_creator',), '이미지만으로 다국어 버전 자동 생성'),
+    'shorts': (('shorts_creator',), '쇼핑 숏폼 대본 / 썸네일 / 업로드 정보'),
+    'keyword': (('keyword_selector',), '키워드 선택 (터미널)'),
+    'web': (('keyword_selector_web',), '키워드 선택 (웹 UI)'),
+    'daemon': (('retention', 'run_journal'), '보존 정책 + 저널 압축 (--once: 한 번만, cron용)'),
+    'catalog': (('run_catalog',), '실행 카탈로그 조회'),
+    'journal': (('run_journal',), '실행 저널 tail / compact / summary'),
+    'retention': (('retention',), '보존 정책 status / run'),
+    'layout': (('output_layout',), '출력 폴더 배치 migrate / stats / find'),
+    'analytics': (('analytics_export',), 'Parquet 내보내기 / 리포트'),
+    'index': (('input_index',), '입력 폴더 인덱스 status / reset'),
+    'workflow': (('workflow_engine',), '워크플로우 (DAG) list / show'),
+    'worker': (('warm_worker',), '상주 워커 serve / status / stop / exec')
+}
+
+
+def load(name):
+    """명령에 필요한 모듈 import (startup 벤치마크도 이 함수로 측정)"""
+    return [importlib.import_module(module) for module in COMMANDS[name][0]]
+
+
+def _start_profiling(pipeline, argv):
+    """--profile [모드]가 있을 때만 profiling import (argv에서 제거)"""
+    if '--profile' in argv:
+        from profiling import pop_profile_arg, start_profiling
+        start_profiling(pipeline, pop_profile_arg(argv))
+
+
+def _run(modules, argv):
+    _start_profiling('main', argv)
+    parser = argparse.ArgumentParser(prog='cli.py run', description=COMMANDS['run'][1],
+                                     epilog='--profile [sample|cprofile]: 단계별 프로파일링')
+    parser.parse_args(argv)
+    modules[0].YouTubeAutomation().run()
+
+
+def _keyword(modules, argv):
+    _start_profiling('keyword', argv)
+    argparse.ArgumentParser(prog='cli.py keyword', description=COMMANDS['keyword'][1]).parse_args(argv)
+    modules[0].run_keyword_selector()
+
+
+def _web(modules, argv):
+    _start_profiling('web', argv)
+    parser = argparse.ArgumentParser(prog='cli.py web', description=COMMANDS['web'][1])
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--debug', action='store_true')
+    args = parser.parse_args(argv)
+    modules[0].run_web_ui(port=args.port, debug=args.debug)
+
+
+def _daemon(modules, argv):
+    """보존 정책 / 저널 압축을 각자 간격마다 실행 (파이프라인 없이 상주하거나 cron에서 --once)"""
+    parser = argparse.ArgumentParser(prog='cli.py daemon', description=COMMANDS['daemon'][1])
+    parser.add_argument('--once', action='store_true', help='한 번씩만 실행하고 종료')
+    args = parser.parse_args(argv)
+    retention, run_journal = modules
+    manager, compactor = retention.get_retention(), run_journal.get_compactor()
+    tasks = [
+        ['retention', manager.settings['interval_seconds'], manager.run_once,
+         lambda report: f"🧹 {report['files']}개 파일 정리" if report['files'] else None],
+        ['journal', compactor.settings['compact_interval_seconds'], compactor.compact_once,
+         lambda report: f"📒 저널 {report['entries']}줄 압축" if report['entries'] else None]
+    ]
+    if not args.once:
+        print("🛠️  유지보수 데몬 시작 (" + ', '.join(f"{name} {interval}초" for name, interval, _, _ in tasks) + ")")
+    due = {name: 0.0 for name, _, _, _ in tasks}
+    try:
+        while True:
+            for name, interval, run, describe in tasks:
+                if time.monotonic() < due[name]:
+                    continue
+                try:
+                    message = describe(run())
+                    if message:
+                        print(message)
+                except Exception as e:
+                    print(f"⚠️  {name} 실행 실패: {e}")
+                due[name] = time.monotonic() + interval
+            if args.once:
+                return 0
+            time.sleep(max(0.0, min(due.values()) - time.monotonic()))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+HANDLERS = {'run': _run, 'keyword': _keyword, 'web': _web, 'daemon': _daemon}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='cli.py',
+        description='YouTube 숏폼 자동화 (명령별로 필요한 모듈만 import)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='명령:\n' + '\n'.join(f"  {name:<10} {help_text}" for name, (_, help_text) in COMMANDS.items())
+              + '\n\n명령별 옵션: python cli.py <명령> -h'
+    )
+    parser.add_argument('command', choices=list(COMMANDS), metavar='명령')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    modules = load(args.command)
+    handler = HANDLERS.get(args.command)
+    if handler is not None:
+        return handler(modules, args.args) or 0
+    # 도구 / 파이프라인 모듈의 main(argv)로 그대로 전달
+    return modules[0].main(args.args) or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+API 단계별 적응형 동시성 제어 (AIMD)
+지연 시간과 오류가 건강하면 병렬도를 조금씩 올리고(가산 증가)
+429 / 재시도 / 지연 급증이 보이면 곱셈으로 줄임(승산 감소)
+automation.batch_size는 시작값으로만 사용
+"""
+
+import time
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from tracing import record_span
+from serialization import read_json
+
+DEFAULT_CONCURRENCY_CONFIG = {
+    'max_workers': 16,
+    'min_limit': 1,
+    'max_limit': 16,
+    'decrease_factor': 0.5,
+    'latency_spike_factor': 2.0
+}
+
+# 현재 컨텍스트에서 열려 있는 단계 슬롯 상태들 (헤지 풀 등 copy_context로 넘긴 스레드에서도 보임)
+_slots = contextvars.ContextVar('stage_slots', default=())
+
+
+class AdaptiveConcurrency:
+    """한 단계(analysis / keywords / render)의 AIMD 동시 실행 한도"""
+
+    def __init__(self, name, initial=5, min_limit=1, max_limit=16,
+                 decrease_factor=0.5, latency_spike_factor=2.0):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_spike_factor = latency_spike_factor
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.in_flight = 0
+        self.baseline_latency = None
+        # 마지막 승산 감소 시각: 그 전에 시작한 작업의 혼잡 신호는 이미 반영된 것으로 봄
+        self.last_decrease = float('-inf')
+        # 최근 작업 지연 (벤치마크 백분위 계산용)
+        self.latencies = deque(maxlen=10000)
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        """한도 안에서 작업 1건 실행. 끝나면 지연/혼잡 여부로 한도 조정"""
+        queued = time.monotonic()
+        with self._cond:
+            waited = self.in_flight >= int(self.limit)
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        if waited:
+            record_span(f"queue.{self.name}", queued, kind='queue', limit=int(self.limit))
+
+        state = {'congested': False, 'failed': False}
+        token = _slots.set(_slots.get() + (state,))
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            # 혼잡 신호(429·5xx·타임아웃 등 재시도 대상)만 감소. 4xx·파싱 오류·예산 초과는 한도와 무관
+            from retry_policy import is_retryable
+            if is_retryable(e):
+                state['congested'] = True
+            else:
+                state['failed'] = True
+            raise
+        finally:
+            _slots.reset(token)
+            self._adjust(start, time.monotonic() - start, state['congested'], state['failed'])
+
+    def _adjust(self, start, latency, congested, failed=False):
+        with self._cond:
+            self.in_flight -= 1
+            if failed and not congested:
+                # 혼잡과 무관한 실패: 한도·기준 지연 모두 그대로
+                self._cond.notify_all()
+                return
+            self.latencies.append(latency)
+            spike = (self.baseline_latency is not None and
+                     latency > self.baseline_latency * self.latency_spike_factor)
+            if congested or spike:
+                # 승산 감소는 윈도우당 1회: 직전 감소 이후에 시작한 작업의 신호만 반영
+                if start >= self.last_decrease:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self.last_decrease = time.monotonic()
+            else:
+                # 가산 증가: 한도만큼 성공하면 약 +1
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                if self.baseline_latency is None:
+                    self.baseline_latency = latency
+                else:
+                    self.baseline_latency = 0.9 * self.baseline_latency + 0.1 * latency
+            self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                'limit': round(self.limit, 2),
+                'in_flight': self.in_flight,
+                'baseline_latency': self.baseline_latency
+            }
+
+
+def report_congestion():
+    """현재 컨텍스트에서 실행 중인 단계 슬롯에 혼잡(429·재시도·차단) 신호 전달"""
+    for state in _slots.get():
+        state['congested'] = True
+
+
+def load_concurrency_config(config_path='config/config.json'):
+    """config.json의 concurrency 섹션 + automation.batch_size(시작 한도)"""
+    settings = dict(DEFAULT_CONCURRENCY_CONFIG, initial=DEFAULT_CONCURRENCY_CONFIG['max_limit'])
+    try:
+        config = read_json(config_path)
+        settings['initial'] = config.get('automation', {}).get('batch_size', settings['initial'])
+        settings.update({key: value for key, value in config.get('concurrency', {}).items()
+                         if key in DEFAULT_CONCURRENCY_CONFIG})
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+_controllers = {}
+_controllers_lock = threading.Lock()
+
+
+def get_controller(stage):
+    """단계별 공용 AIMD 제어기"""
+    with _controllers_lock:
+        if stage not in _controllers:
+            settings = load_concurrency_config()
+            _controllers[stage] = AdaptiveConcurrency(
+                stage,
+                initial=settings['initial'],
+                min_limit=settings['min_limit'],
+                max_limit=settings['max_limit'],
+                decrease_factor=settings['decrease_factor'],
+                latency_spike_factor=settings['latency_spike_factor']
+            )
+        return _controllers[stage]
+
+
+def stage_slot(stage):
+    """with stage_slot('render'): ... 형태로 단계 동시성 제한 적용"""
+    return get_controller(stage).slot()
+
+
+def map_concurrently(fn, items, max_workers=None):
+    """
+    items를 스레드 풀에서 처리 (실제 병렬도는 단계별 AIMD 한도가 결정)
+
+    Returns:
+        list: 입력 순서대로 결과. 실패한 항목은 예외 객체
+    """
+    items = list(items)
+    if not items:
+        return []
+    if max_workers is None:
+        max_workers = load_concurrency_config()['max_workers']
+
+    def run(item):
+        try:
+            return fn(item)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as pool:
+        return list(pool.map(run, items))
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+공급자 사용량 / 비용 집계와 실행별 예산
+Gemini·OpenAI 토큰(프롬프트 / 응답 / 이미지)과 D-ID 렌더링 시간·크레딧을 호출마다 기록해서
+이미지별 / 언어별 / 실행 전체 비용으로 집계하고, 예산을 넘으면 화질을 낮추거나 처리를 멈춤
+
+    with usage_scope(pipeline='auto', image='a.jpg', language='ko'):
+        enforce_budget('a.jpg')      # 초과 시 BudgetExceeded
+        ...                          # 이 안의 공급자 호출은 a.jpg / ko로 집계
+"""
+
+import json
+import math
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from metrics import REGISTRY
+from event_bus import warning
+from serialization import read_json, write_json
+
+DEFAULT_COST_CONFIG = {
+    # 공급자:모델별 단가 (USD). 토큰은 100만 개당, D-ID는 크레딧당
+    'pricing': {
+        'gemini:gemini-1.5-flash': {'input_per_million': 0.075, 'output_per_million': 0.30},
+        'openai:gpt-4o': {'input_per_million': 2.50, 'output_per_million': 10.00},
+        'openai:gpt-4o-mini': {'input_per_million': 0.15, 'output_per_million': 0.60},
+        'did:talks': {'per_credit': 0.15}
+    },
+    # 응답에 사용량이 없을 때 이미지 1장의 추정 토큰 수
+    'image_tokens': {'gemini': 258, 'openai': 765},
+    'did_seconds_per_credit': 15,
+    # 0이면 제한 없음
+    'budgets': {'run_usd': 0, 'image_usd': 0, 'run_did_credits': 0},
+    # 예산의 이 비율을 넘으면 화질 다운그레이드
+    'downgrade_at': 0.8,
+    # 예산을 넘었을 때: stop (남은 항목 중단) / downgrade (화질만 낮추고 계속)
+    'on_exceeded': 'stop',
+    'quality_downgrade': {'ultra': 'high'},
+    'ledger_dir': 'output/costs'
+}
+
+USAGE_FIELDS = ('prompt_tokens', 'completion_tokens', 'image_tokens', 'render_seconds', 'credits')
+
+COST_TOTAL = REGISTRY.counter('provider_cost_usd_total', '공급자 추정 비용 (USD)', ('provider', 'model'))
+TOKENS_TOTAL = REGISTRY.counter('provider_tokens_total', '공급자 토큰 사용량', ('provider', 'model', 'kind'))
+
+# 현재 작업의 집계 라벨 (pipeline / image / language). 스레드·헤징 호출마다 따로 전달됨
+# (기본값은 None: 공유 dict를 기본값으로 두면 범위 밖 갱신이 전역으로 새어 나감)
+_scope = contextvars.ContextVar('usage_scope', default=None)
+
+
+class BudgetExceeded(RuntimeError):
+    """실행 / 이미지 예산 초과로 처리를 멈춤"""
+
+
+def load_cost_config(config_path='config/config.json'):
+    """config.json의 cost_accounting 섹션 로드 (없으면 기본값)"""
+    settings = json.loads(json.dumps(DEFAULT_COST_CONFIG))
+    try:
+        section = read_json(config_path).get('cost_accounting', {})
+    except (OSError, ValueError):
+        section = {}
+    for key, value in section.items():
+        if isinstance(value, dict) and isinstance(settings.get(key), dict):
+            settings[key].update(value)
+        else:
+            settings[key] = value
+    return settings
+
+
+@contextmanager
+def usage_scope(**labels):
+    """이 블록 안의 공급자 호출을 labels(pipeline / image / language)로 집계"""
+    token = _scope.set({**(_scope.get() or {}), **labels})
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def update_usage_scope(**labels):
+    """처리 도중 알게 된 라벨 추가 (예: 스크립트를 읽은 뒤 언어). 현재 컨텍스트에만 반영"""
+    _scope.set({**(_scope.get() or {}), **labels})
+
+
+def count_images(contents):
+    """요청에 포함된 이미지 수"""
+    if contents is None or isinstance(contents, str):
+        return 0
+    if isinstance(contents, (list, tuple)):
+        return sum(count_images(item) for item in contents)
+    if isinstance(contents, dict):
+        if 'data' in contents or 'image_url' in contents:
+            return 1
+        return sum(count_images(value) for value in contents.values())
+    # PIL 이미지 등
+    return 1
+
+
+class UsageLedger:
+    """호출별 사용량 기록과 집계"""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.entries = []
+        self.videos = {}
+        self._rendered = set()
+        self._warned = set()
+        self._lock = threading.Lock()
+
+    def cost_of(self, provider, model, usage):
+        """사용량 → 추정 비용 (USD, 단가가 없으면 0)"""
+        price = self.settings['pricing'].get(f"{provider}:{model}", {})
+        return (
+            usage.get('prompt_tokens', 0) * price.get('input_per_million', 0) / 1e6
+            + usage.get('completion_tokens', 0) * price.get('output_per_million', 0) / 1e6
+            + usage.get('credits', 0) * price.get('per_credit', 0)
+        )
+
+    def record(self, provider, model, estimated=False, **usage):
+        """호출 1회 사용량 기록 후 항목 반환"""
+        entry = dict(_scope.get() or {})
+        entry.update(provider=provider, model=model, estimated=estimated)
+        entry.update({field: usage.get(field, 0) for field in USAGE_FIELDS})
+        entry['cost_usd'] = self.cost_of(provider, model, usage)
+        with self._lock:
+            self.entries.append(entry)
+
+        COST_TOTAL.inc(entry['cost_usd'], provider=provider, model=model)
+        for kind in ('prompt_tokens', 'completion_tokens'):
+            if entry[kind]:
+                TOKENS_TOTAL.inc(entry[kind], provider=provider, model=model, kind=kind)
+        return entry
+
+    def record_llm(self, provider, model, usage, contents, text):
+        """
+        Gemini / OpenAI 응답 사용량 기록
+
+        Args:
+            usage: 응답의 {'prompt_tokens', 'completion_tokens'} (없으면 문자 수로 추정)
+            contents: 요청 내용 (이미지 수 계산용)
+            text: 응답 텍스트
+        """
+        from rate_limiter import estimate_tokens, IMAGE_TOKENS
+
+        image_tokens = count_images(contents) * self.settings['image_tokens'].get(provider, 0)
+        if usage and usage.get('prompt_tokens'):
+            return self.record(provider, model,
+                               prompt_tokens=usage['prompt_tokens'],
+                               completion_tokens=usage.get('completion_tokens', 0),
+                               image_tokens=image_tokens)
+        text_tokens = estimate_tokens(contents) - count_images(contents) * IMAGE_TOKENS
+        return self.record(provider, model, estimated=True,
+                           prompt_tokens=max(0, text_tokens) + image_tokens,
+                           completion_tokens=estimate_tokens(text or ''),
+                           image_tokens=image_tokens)
+
+    def record_render(self, talk_id, status_data):
+        """완료된 D-ID talk의 렌더링 시간 / 크레딧 기록 (talk당 1회)"""
+        with self._lock:
+            if talk_id in self._rendered:
+                return None
+            self._rendered.add(talk_id)
+        duration = float(status_data.get('duration') or 0)
+        credits = max(1, math.ceil(duration / self.settings['did_seconds_per_credit']))
+        return self.record('did', 'talks', estimated=not duration,
+                           render_seconds=duration, credits=credits)
+
+    def note_video(self):
+        """완성된 비디오 1개 (비디오당 비용 계산용)"""
+        key = (_scope.get() or {}).get('image', '-')
+        with self._lock:
+            self.videos[key] = self.videos.get(key, 0) + 1
+
+    def totals(self, by=None, where=None):
+        """
+        사용량 합계
+
+        Args:
+            by: 묶을 라벨 ('image' / 'language' / 'provider' 등, 없으면 전체 합계 하나)
+            where: {라벨: 값} 조건
+        """
+        with self._lock:
+            entries = list(self.entries)
+        groups = {}
+        for entry in entries:
+            if where and any(entry.get(k) != v for k, v in where.items()):
+                continue
+            key = entry.get(by, '-') if by else 'total'
+            if by == 'provider':
+                key = f"{entry['provider']}/{entry['model']}"
+            group = groups.setdefault(key, dict({field: 0 for field in USAGE_FIELDS}, calls=0, cost_usd=0.0))
+            group['calls'] += 1
+            group['cost_usd'] += entry['cost_usd']
+            for field in USAGE_FIELDS:
+                group[field] += entry[field]
+        if by:
+            return groups
+        return groups.get('total', dict({field: 0 for field in USAGE_FIELDS}, calls=0, cost_usd=0.0))
+
+    def check_budget(self, image=None):
+        """
+        예산 상태
+
+        Returns:
+            'ok' / 'downgrade' (경고 구간 또는 on_exceeded=downgrade로 초과) / 'stop'
+        """
+        budgets = self.settings['budgets']
+        run = self.totals()
+        checks = [(run['cost_usd'], budgets.get('run_usd', 0)),
+                  (run['credits'], budgets.get('run_did_credits', 0))]
+        if image is not None:
+            checks.append((self.totals(where={'image': image})['cost_usd'], budgets.get('image_usd', 0)))
+
+        status = 'ok'
+        for spent, limit in checks:
+            if not limit:
+                continue
+            if spent >= limit:
+                return 'stop' if self.settings['on_exceeded'] == 'stop' else 'downgrade'
+            if spent >= limit * self.settings['downgrade_at']:
+                status = 'downgrade'
+        return status
+
+    def summary(self, pipeline):
+        """실행 전체 / 이미지별 / 언어별 / 공급자별 집계"""
+        total = self.totals()
+        per_image = self.totals(by='image')
+        with self._lock:
+            videos = dict(self.videos)
+        for key, stats in per_image.items():
+            stats['videos'] = videos.get(key, 0)
+        finished = sum(videos.values())
+        return {
+            'pipeline': pipeline,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'budgets': self.settings['budgets'],
+            'total': total,
+            'videos': finished,
+            'cost_per_video_usd': total['cost_usd'] / finished if finished else None,
+            'by_image': per_image,
+            'by_language': self.totals(by='language'),
+            'by_provider': self.totals(by='provider'),
+            'entries': self.entries
+        }
+
+    def write(self, pipeline):
+        """output/costs/<pipeline>_<시각>.json 저장 후 경로 반환"""
+        output_dir = Path(self.settings['ledger_dir'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        path = output_dir / f"{pipeline}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        write_json(path, self.summary(pipeline), human=True)
+        return path
+
+    def format_summary(self):
+        """비용 요약 몇 줄 (기록이 없으면 빈 문자열)"""
+        if not self.entries:
+            return ''
+        total = self.totals()
+        lines = [
+            f"   합계: ${total['cost_usd']:.4f} ({total['calls']}회 호출, "
+            f"토큰 {total['prompt_tokens'] + total['completion_tokens']:,}개, D-ID 크레딧 {total['credits']})"
+        ]
+        for key, stats in sorted(self.totals(by='provider').items()):
+            lines.append(f"   {key}: ${stats['cost_usd']:.4f} "
+                         f"(입력 {stats['prompt_tokens']:,} / 출력 {stats['completion_tokens']:,} 토큰, "
+                         f"렌더링 {stats['render_seconds']:.0f}초)")
+        by_language = self.totals(by='language')
+        if len(by_language) > 1:
+            lines.append('   언어별: ' + ', '.join(f"{key} ${stats['cost_usd']:.4f}"
+                                                for key, stats in sorted(by_language.items())))
+        finished = sum(self.videos.values())
+        if finished:
+            lines.append(f"   비디오당: ${total['cost_usd'] / finished:.4f} ({finished}개)")
+        return '\n'.join(lines)
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger():
+    """공용 사용량 기록부"""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = UsageLedger(load_cost_config())
+        return _ledger
+
+
+def enforce_budget(image=None):
+    """
+    예산 확인
+
+    Returns:
+        'ok' / 'downgrade'
+
+    Raises:
+        BudgetExceeded: 예산 초과 + on_exceeded=stop
+    """
+    ledger = get_ledger()
+    status = ledger.check_budget(image)
+    if status == 'stop':
+        total = ledger.totals()
+        raise BudgetExceeded(f"예산 초과로 중단 (누적 ${total['cost_usd']:.4f}, "
+                             f"D-ID 크레딧 {total['credits']})")
+    if status == 'downgrade' and 'downgrade' not in ledger._warned:
+        ledger._warned.add('downgrade')
+        warning(f"   💸 예산 경고 구간: 누적 ${ledger.totals()['cost_usd']:.4f}")
+    return status
+
+
+def downgrade_quality(quality):
+    """예산 경고 구간에서 쓸 한 단계 낮은 화질 (없으면 그대로)"""
+    return get_ledger().settings['quality_downgrade'].get(quality, quality)
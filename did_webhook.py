@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+D-ID 웹훅 수신기
+talk 완료 콜백을 로컬 HTTP 서버로 받아 대기 중인 작업을 즉시 깨웁니다.
+폴링은 콜백이 유실됐을 때를 위한 느린 안전망으로만 사용합니다.
+"""
+
+import os
+import hmac
+import time
+import secrets
+import threading
+from urllib.parse import urlparse, parse_qs
+
+from provider_cassette import get_cassette, time_scale
+from cost_accounting import get_ledger
+from tracing import span
+from event_bus import warning
+from serialization import read_json, loads, dump_bytes
+
+WEBHOOK_PATH = '/did/webhook'
+
+DEFAULT_WEBHOOK_CONFIG = {
+    'enabled': False,
+    'host': '127.0.0.1',
+    'port': 8765,
+    'public_url': '',
+    'poll_interval': 5,
+    'fallback_poll_interval': 30
+}
+
+
+def load_webhook_config(config_path='config/config.json'):
+    """config.json의 did_webhook 섹션 로드 (없으면 기본값)"""
+    config = dict(DEFAULT_WEBHOOK_CONFIG)
+    try:
+        config.update(read_json(config_path).get('did_webhook', {}))
+    except (OSError, ValueError):
+        pass
+    return config
+
+
+def _webhook_handler():
+    """D-ID 콜백 요청 처리 클래스 (http.server는 수신기를 켤 때만 import)"""
+    from http.server import BaseHTTPRequestHandler
+
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            parsed = urlparse(self.path)
+            if parsed.path != WEBHOOK_PATH:
+                self._reply(404, {'error': 'not found'})
+                return
+
+            token = parse_qs(parsed.query).get('token', [''])[0]
+            if not self.server.receiver.verify_token(token):
+                self._reply(401, {'error': 'invalid token'})
+                return
+
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                data = loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                self._reply(400, {'error': 'invalid json'})
+                return
+
+            if not isinstance(data, dict) or not data.get('id') or not data.get('status'):
+                self._reply(400, {'error': 'id and status required'})
+                return
+
+            self.server.receiver.deliver(data)
+            self._reply(200, {'ok': True})
+
+        def _reply(self, code, body):
+            payload = dump_bytes(body)
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            # 기본 접근 로그는 파이프라인 출력과 섞이므로 생략
+            pass
+
+    return WebhookHandler
+
+
+class DIDWebhookReceiver:
+    """talk 완료 콜백을 받아 대기 중인 작업을 깨우는 로컬 HTTP 서버"""
+
+    # 등록 전에 도착한 콜백 보관 개수 상한
+    MAX_PENDING_RESULTS = 1000
+
+    def __init__(self, host='127.0.0.1', port=8765, public_url='', secret=None):
+        self.host = host
+        self.port = port
+        self.public_url = public_url.rstrip('/')
+        self.secret = secret or os.getenv('DID_WEBHOOK_SECRET') or secrets.token_urlsafe(24)
+        self._lock = threading.Lock()
+        self._events = {}
+        self._results = {}
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """백그라운드 스레드에서 수신 서버 시작"""
+        if self._server:
+            return self
+        from http.server import ThreadingHTTPServer
+        self._server = ThreadingHTTPServer((self.host, self.port), _webhook_handler())
+        self._server.daemon_threads = True
+        self._server.receiver = self
+        # port=0이면 OS가 할당한 실제 포트 사용
+        self.port = self._server.server_address[1]
+        if not self.public_url:
+            self.public_url = f"http://127.0.0.1:{self.port}"
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name='did-webhook', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """수신 서버 종료"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def webhook_url(self):
+        """D-ID 요청 payload의 webhook 필드에 넣을 URL"""
+        return f"{self.public_url}{WEBHOOK_PATH}?token={self.secret}"
+
+    def verify_token(self, token):
+        """콜백 URL의 토큰 검증 (타이밍 공격 방지 비교)"""
+        return hmac.compare_digest(token.encode(), self.secret.encode())
+
+    def _event_for(self, talk_id):
+        with self._lock:
+            event = self._events.get(talk_id)
+            if event is None:
+                event = self._events[talk_id] = threading.Event()
+                if talk_id in self._results:
+                    # 대기 등록 전에 콜백이 먼저 도착한 경우
+                    event.set()
+            return event
+
+    def deliver(self, data):
+        """콜백 결과 저장 후 대기 중인 작업 깨우기"""
+        if data.get('status') not in ('done', 'error', 'rejected'):
+            return
+        talk_id = data['id']
+        with self._lock:
+            if len(self._results) >= self.MAX_PENDING_RESULTS:
+                self._results.pop(next(iter(self._results)))
+            self._results[talk_id] = data
+            # 대기자가 없는 talk id로는 Event를 만들지 않음 (임의 id 콜백으로 계속 쌓이지 않도록)
+            event = self._events.get(talk_id)
+        if event is not None:
+            event.set()
+
+    def wait(self, talk_id, timeout):
+        """콜백 대기 (timeout 초). 결과가 없으면 None"""
+        if self._event_for(talk_id).wait(timeout):
+            return self.pop(talk_id)
+        return None
+
+    def pop(self, talk_id):
+        """talk 결과를 꺼내고 대기 상태 정리"""
+        with self._lock:
+            self._events.pop(talk_id, None)
+            return self._results.pop(talk_id, None)
+
+
+_receiver = None
+_receiver_lock = threading.Lock()
+
+
+def get_receiver():
+    """설정에서 웹훅이 켜져 있으면 공용 수신기를 시작해 반환 (아니면 None)"""
+    global _receiver
+    config = load_webhook_config()
+    if not config.get('enabled'):
+        return None
+    if get_cassette().mode != 'live':
+        # 녹화/재생은 폴링 응답 순서를 그대로 남겨야 하므로 웹훅 미사용
+        return None
+
+    with _receiver_lock:
+        if _receiver is None:
+            try:
+                _receiver = DIDWebhookReceiver(
+                    host=config['host'],
+                    port=config['port'],
+                    public_url=config.get('public_url', '')
+                ).start()
+            except OSError as e:
+                warning(f"   ⚠️  웹훅 수신기 시작 실패, 폴링만 사용: {e}")
+                return None
+    return _receiver
+
+
+def wait_for_talk(talk_id, fetch_status, max_wait=300, on_status=None):
+    """
+    talk 완료 대기 (웹훅 우선, 폴링은 안전망)
+
+    Args:
+        talk_id: D-ID talk ID
+        fetch_status: GET /talks/{id} 결과(dict)를 반환하는 함수
+        max_wait: 최대 대기 시간 (초)
+        on_status: 폴링 결과를 받을 콜백 (진행 상황 출력용)
+
+    Returns:
+        dict: 마지막 talk 상태 (done/error), 타임아웃이면 None
+    """
+    receiver = get_receiver()
+    with span('did.wait', kind='poll', talk_id=talk_id, webhook=bool(receiver)) as current:
+        status_data = _wait_for_talk(talk_id, fetch_status, max_wait, on_status, receiver, current)
+        current.set(status=status_data.get('status') if status_data else 'timeout')
+    return status_data
+
+
+def _wait_for_talk(talk_id, fetch_status, max_wait, on_status, receiver, current):
+    """wait_for_talk 본체 (current: did.wait span, 폴링 횟수 기록용)"""
+    config = load_webhook_config()
+    interval = config['fallback_poll_interval'] if receiver else config['poll_interval']
+    interval *= time_scale()
+    deadline = time.time() + max_wait
+    polls = 0
+
+    try:
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+
+            if receiver:
+                data = receiver.wait(talk_id, min(interval, remaining))
+                if data:
+                    if on_status:
+                        on_status(data)
+                    if data.get('status') == 'done':
+                        get_ledger().record_render(talk_id, data)
+                    return data
+            else:
+                time.sleep(min(interval, remaining))
+
+            polls += 1
+            current.set(polls=polls)
+            with span('did.poll', kind='poll', talk_id=talk_id, poll=polls):
+                status_data = fetch_status()
+            if on_status:
+                on_status(status_data)
+            if status_data.get('status') == 'done':
+                get_ledger().record_render(talk_id, status_data)
+            if status_data.get('status') in ('done', 'error', 'rejected'):
+                return status_data
+    finally:
+        if receiver:
+            receiver.pop(talk_id)
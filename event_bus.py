@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+구조화된 진행 이벤트 버스
+작업 스레드는 이벤트(단계 시작/종료, 진행 메시지, 오류)를 큐에 넣기만 하고 바로 돌아감.
+별도 디스패처 스레드가 꺼내서 싱크(콘솔 / JSONL 로그 / 웹 SSE / 메트릭)로 전달하므로
+느린 터미널이나 파이프로 연결된 로그 때문에 작업이 멈추지 않음
+
+    with event_scope(pipeline='auto', image='a.jpg', language='ko'):
+        progress("📸 1단계: 이미지 분석 중...")     # 콘솔에는 "[a.jpg] 📸 1단계..."로 표시
+        report_error("❌ 비디오 생성 실패")
+
+큐가 가득 차면 기다리지 않고 이벤트를 버림 (버린 수는 종료 시 표시)
+"""
+
+import os
+import sys
+import time
+import queue
+import atexit
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from metrics import REGISTRY, add_stage_hook
+from serialization import read_json, dumps
+
+DEFAULT_EVENTS_CONFIG = {
+    'queue_size': 10000,
+    'console': True,
+    # 단계 시작/종료 이벤트도 콘솔에 표시할지 (JSONL / SSE / 메트릭에는 항상 전달)
+    'console_stages': False,
+    'jsonl': True,
+    'dir': 'output/events',
+    'sse': True,
+    'metrics': True
+}
+
+EVENTS_TOTAL = REGISTRY.counter('pipeline_events_total', '발행된 진행 이벤트 수', ('type', 'level'))
+EVENTS_DROPPED = REGISTRY.counter('pipeline_events_dropped_total', '큐가 가득 차서 버린 이벤트 수')
+
+# 현재 작업의 이벤트 라벨 (pipeline / image / language)
+_labels = contextvars.ContextVar('event_labels', default={})
+
+
+def load_events_config(config_path='config/config.json'):
+    """config.json의 events 섹션 로드 (없으면 기본값)"""
+    settings = dict(DEFAULT_EVENTS_CONFIG)
+    try:
+        settings.update(read_json(config_path).get('events', {}))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+@contextmanager
+def event_scope(**labels):
+    """이 블록 안에서 발행하는 이벤트에 labels(pipeline / image / language) 추가"""
+    token = _labels.set({**_labels.get(), **labels})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+class ConsoleSink:
+    """사람이 읽는 진행 출력. 이미지 라벨이 있으면 줄 앞에 [이미지] 표시"""
+
+    def __init__(self, stream=None, show_stages=False):
+        self._stream = stream
+        self.show_stages = show_stages
+
+    @property
+    def stream(self):
+        # 지정하지 않았으면 쓸 때마다 현재 sys.stdout (print처럼 redirect_stdout을 따름)
+        return self._stream or sys.stdout
+
+    def handle(self, event):
+        if event['type'].startswith('stage_'):
+            if not self.show_stages:
+                return
+            message = (f"▶ {event['stage']}" if event['type'] == 'stage_started'
+                       else f"■ {event['stage']} ({event['duration']:.2f}초)")
+        else:
+            message = event['message']
+
+        # print("\n📸 ...")처럼 들어 있는 빈 줄에는 라벨을 붙이지 않음
+        image = event.get('image')
+        prefix = f"[{image}] " if image else ''
+        lines = message.split('\n')
+        self.stream.write('\n'.join(prefix + line if line else line for line in lines) + '\n')
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        self.flush()
+
+
+class JsonlSink:
+    """이벤트 1개 = JSON 한 줄 (output/events/events_<시각>_<pid>.jsonl)"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.path = None
+        self._file = None
+        self._closed = False
+
+    def handle(self, event):
+        if self._closed:
+            # 종료 처리 이후 이벤트는 콘솔에만
+            return
+        if self._file is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.path = self.directory / f"events_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.jsonl"
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(dumps(event) + '\n')
+
+    def flush(self):
+        if self._file:
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+        self._closed = True
+
+
+class SseSink:
+    """웹 UI 구독자(/events)마다 큐를 두고 이벤트 복사. 느린 구독자는 이벤트를 놓침"""
+
+    def __init__(self, subscriber_queue_size=1000):
+        self.subscriber_queue_size = subscriber_queue_size
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscriber = queue.Queue(self.subscriber_queue_size)
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def handle(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class MetricsSink:
+    """이벤트 유형 / 수준별 카운터"""
+
+    def handle(self, event):
+        EVENTS_TOTAL.inc(type=event['type'], level=event['level'])
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class EventBus:
+    """큐 + 디스패처 스레드 + 싱크 목록"""
+
+    def __init__(self, queue_size=10000):
+        self.sinks = []
+        self.dropped = 0
+        self._queue = queue.Queue(queue_size)
+        self._seq = 0
+        self._seq_lock = threading.Lock()
+        self._dispatcher = None
+        self._closed = False
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None:
+            with self._seq_lock:
+                if self._dispatcher is None:
+                    self._dispatcher = threading.Thread(target=self._dispatch, name='event-bus', daemon=True)
+                    self._dispatcher.start()
+
+    def publish(self, event_type, message='', level='info', **fields):
+        """이벤트 발행 (절대 대기하지 않음)"""
+        with self._seq_lock:
+            self._seq += 1
+            seq = self._seq
+        event = {
+            'seq': seq,
+            'ts': time.time(),
+            'type': event_type,
+            'level': level,
+            'message': message,
+            'thread': threading.current_thread().name
+        }
+        event.update(_labels.get())
+        event.update(fields)
+
+        if self._closed:
+            # 종료 처리 이후에 온 이벤트는 바로 처리
+            self._deliver(event)
+            return
+        self._ensure_dispatcher()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            EVENTS_DROPPED.inc()
+
+    def _deliver(self, event):
+        for sink in self.sinks:
+            try:
+                sink.handle(event)
+            except Exception as e:
+                sys.stderr.write(f"⚠️  이벤트 싱크 오류 ({type(sink).__name__}): {e}\n")
+
+    def _dispatch(self):
+        while True:
+            event = self._queue.get()
+            try:
+                if event is None:
+                    return
+                self._deliver(event)
+                if self._queue.empty():
+                    for sink in self.sinks:
+                        sink.flush()
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """지금까지 발행된 이벤트가 모두 싱크에 전달될 때까지 대기 (메인 스레드에서 요약 출력 전 호출)"""
+        if self._dispatcher is not None and not self._closed:
+            self._queue.join()
+
+    def close(self):
+        """남은 이벤트 전달 후 디스패처 종료"""
+        if self._closed:
+            return
+        if self._dispatcher is not None:
+            self._queue.put(None)
+            self._dispatcher.join(timeout=10)
+        self._closed = True
+        if self.dropped:
+            sys.stdout.write(f"⚠️  이벤트 큐가 가득 차서 {self.dropped}개를 버렸습니다.\n")
+        for sink in self.sinks:
+            sink.close()
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_bus():
+    """공용 이벤트 버스 (config.json의 events 섹션대로 싱크 구성)"""
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            settings = load_events_config()
+            _bus = EventBus(settings['queue_size'])
+            if settings['console']:
+                _bus.add_sink(ConsoleSink(show_stages=settings['console_stages']))
+            if settings['jsonl']:
+                _bus.add_sink(JsonlSink(settings['dir']))
+            if settings['sse']:
+                _bus.add_sink(SseSink())
+            if settings['metrics']:
+                _bus.add_sink(MetricsSink())
+            atexit.register(_bus.close)
+        return _bus
+
+
+def progress(message, **fields):
+    """진행 메시지"""
+    get_bus().publish('progress', message, **fields)
+
+
+def warning(message, **fields):
+    """경고 메시지 (처리는 계속됨)"""
+    get_bus().publish('progress', message, level='warning', **fields)
+
+
+def report_error(message, **fields):
+    """오류 메시지"""
+    get_bus().publish('error', message, level='error', **fields)
+
+
+def flush_events():
+    get_bus().flush()
+
+
+def subscribe():
+    """웹 SSE용 구독 큐 (SSE 싱크가 꺼져 있으면 None)"""
+    for sink in get_bus().sinks:
+        if isinstance(sink, SseSink):
+            return sink.subscribe()
+    return None
+
+
+def unsubscribe(subscriber):
+    for sink in get_bus().sinks:
+        if isinstance(sink, SseSink):
+            sink.unsubscribe(subscriber)
+
+
+def _stage_hook(event, name, duration, error):
+    """metrics.stage()의 시작 / 종료를 이벤트로"""
+    if event == 'start':
+        get_bus().publish('stage_started', stage=name)
+    else:
+        get_bus().publish('stage_finished', level='error' if error else 'info', stage=name,
+                          duration=duration, error=f"{type(error).__name__}: {error}" if error else None)
+
+
+add_stage_hook(_stage_hook)
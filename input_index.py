@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+입력 폴더 증분 인덱스
+input/images / input/scripts를 폴더당 os.scandir 한 번으로 훑고, 파일별 크기 / mtime / 내용 해시를
+SQLite에 보관해서 다음 실행에서는 바뀐 파일만 다시 해시.
+확장자는 대소문자 구분 없이 (.JPG / .Png도 처리), 이미 같은 내용으로 처리를 끝낸
+이미지(+스크립트)는 건너뛰고 새로 들어왔거나 바뀐 것만 파이프라인에 넘김
+
+    index = get_input_index()
+    for pair in index.pending_pairs('input/images', 'input/scripts'):
+        ...처리 성공 후...
+        index.mark_done(pair)
+
+    python input_index.py status     # 인덱스 상태
+    python input_index.py reset      # 처리 기록 삭제 (같은 파일도 다시 처리)
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+from pathlib import Path
+
+from serialization import read_json
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+SCRIPT_EXTENSIONS = ('.json',)
+
+DEFAULT_INPUT_INDEX_CONFIG = {
+    'enabled': True,
+    'path': 'output/.state/input_index.db',
+    # 이 시간(초) 안에 수정된 파일은 아직 업로드 중일 수 있어서 다음 스캔으로 미룸 (공유 폴더면 5 정도)
+    'settle_seconds': 0,
+    # 같은 내용으로 이미 처리한 파일을 다시 넣으면 건너뜀
+    'skip_processed': True
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    directory TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT,
+    PRIMARY KEY (directory, name)
+);
+CREATE TABLE IF NOT EXISTS processed (
+    key TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    finished REAL NOT NULL
+);
+"""
+
+HASH_CHUNK = 1024 * 1024
+
+
+def load_input_index_config(config_path='config/config.json'):
+    """config.json의 input_index 섹션 로드 (없으면 기본값)"""
+    settings = dict(DEFAULT_INPUT_INDEX_CONFIG)
+    try:
+        settings.update(read_json(config_path).get('input_index', {}))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+def has_extension(name, extensions):
+    """대소문자 구분 없는 확장자 확인 (photo.JPG → .jpg)"""
+    dot = name.rfind('.')
+    return dot > 0 and name[dot:].lower() in extensions
+
+
+def _stem(name):
+    return name[:name.rfind('.')]
+
+
+def hash_file(path):
+    """내용 해시 (blake2b 128비트)"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class InputIndex:
+    """폴더별 파일 목록 (크기 / mtime / 해시) + 처리 완료 기록"""
+
+    def __init__(self, path=None, settle_seconds=0, skip_processed=True):
+        self.path = path
+        self.settle_seconds = settle_seconds
+        self.skip_processed = skip_processed
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # 스캔과 mark_done은 메인 스레드에서만 호출
+        self.conn = sqlite3.connect(str(path) if path else ':memory:', timeout=30, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        self.last_scan = {}
+
+    def refresh(self, directory, extensions):
+        """
+        폴더를 한 번 훑어서 인덱스 갱신
+
+        새 파일 / 크기나 mtime이 바뀐 파일은 해시를 비우고, 사라진 파일은 삭제
+
+        Returns:
+            dict: {파일 이름: 해시 또는 None} (아직 쓰는 중인 파일 제외)
+        """
+        directory = str(directory)
+        known = {name: (size, mtime_ns, digest) for name, size, mtime_ns, digest in self.conn.execute(
+            "SELECT name, size, mtime_ns, hash FROM files WHERE directory = ?", (directory,))}
+        settle_before = time.time_ns() - int(self.settle_seconds * 1e9)
+        current, changed, settling = {}, [], 0
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            entries = None
+        if entries is not None:
+            with entries:
+                for entry in entries:
+                    # 숨김 파일 (.업로드중.jpg 등)과 하위 폴더는 제외
+                    if entry.name.startswith('.') or not has_extension(entry.name, extensions):
+                        continue
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    if stat.st_mtime_ns > settle_before:
+                        settling += 1
+                        continue
+                    previous = known.get(entry.name)
+                    if previous and previous[0] == stat.st_size and previous[1] == stat.st_mtime_ns:
+                        current[entry.name] = previous[2]
+                    else:
+                        current[entry.name] = None
+                        changed.append((directory, entry.name, stat.st_size, stat.st_mtime_ns))
+
+        removed = [(directory, name) for name in known if name not in current]
+        if changed or removed:
+            self.conn.execute('BEGIN')
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files (directory, name, size, mtime_ns, hash) VALUES (?, ?, ?, ?, NULL)",
+                changed)
+            self.conn.executemany("DELETE FROM files WHERE directory = ? AND name = ?", removed)
+            self.conn.execute('COMMIT')
+        self.last_scan['files'] = self.last_scan.get('files', 0) + len(current)
+        self.last_scan['changed'] = self.last_scan.get('changed', 0) + len(changed)
+        self.last_scan['settling'] = self.last_scan.get('settling', 0) + settling
+        return current
+
+    def _hash(self, directory, name, files):
+        """저장된 해시가 없을 때만 계산"""
+        if files[name] is None:
+            files[name] = hash_file(os.path.join(str(directory), name))
+            self.conn.execute("UPDATE files SET hash = ? WHERE directory = ? AND name = ?",
+                              (files[name], str(directory), name))
+            self.last_scan['hashed'] = self.last_scan.get('hashed', 0) + 1
+        return files[name]
+
+    def _processed(self, prefix):
+        """prefix로 시작하는 처리 완료 기록 {key: signature} (항목마다 조회하지 않고 한 번에)"""
+        if not self.skip_processed:
+            return {}
+        return dict(self.conn.execute(
+            "SELECT key, signature FROM processed WHERE key >= ? AND key < ?", (prefix, prefix + '\uffff')))
+
+    def _begin_scan(self):
+        self.last_scan = {'started': time.perf_counter()}
+
+    def _end_scan(self, pending):
+        self.last_scan['pending'] = pending
+        self.last_scan['seconds'] = time.perf_counter() - self.last_scan.pop('started')
+
+    def pending_pairs(self, images_dir, scripts_dir):
+        """
+        같은 이름의 이미지 + 스크립트(.json) 쌍 중 새로 들어왔거나 바뀐 것
+
+        Returns:
+            list: [{'image': Path, 'script': Path, 'name': str, 'key': str, 'signature': str}]
+        """
+        self._begin_scan()
+        images = self.refresh(images_dir, IMAGE_EXTENSIONS)
+        scripts = self.refresh(scripts_dir, SCRIPT_EXTENSIONS)
+        script_by_stem = {_stem(name): name for name in scripts}
+        prefix = f"pair:{Path(images_dir).resolve()}/"
+        processed = self._processed(prefix)
+
+        pairs = []
+        self.conn.execute('BEGIN')
+        try:
+            for name in sorted(images):
+                stem = _stem(name)
+                script = script_by_stem.get(stem)
+                if script is None:
+                    continue
+                key = prefix + stem
+                try:
+                    signature = f"{self._hash(images_dir, name, images)}:{self._hash(scripts_dir, script, scripts)}"
+                except OSError:
+                    # 스캔 직후 옮겨지거나 지워진 파일
+                    continue
+                if processed.get(key) == signature:
+                    self.last_scan['skipped'] = self.last_scan.get('skipped', 0) + 1
+                    continue
+                pairs.append({
+                    'image': Path(images_dir) / name,
+                    'script': Path(scripts_dir) / script,
+                    'name': stem,
+                    'key': key,
+                    'signature': signature
+                })
+        finally:
+            self.conn.execute('COMMIT')
+        self._end_scan(len(pairs))
+        return pairs
+
+    def pending_images(self, images_dir):
+        """
+        새로 들어왔거나 바뀐 이미지
+
+        Returns:
+            list: [{'image': Path, 'name': str, 'key': str, 'signature': str}]
+        """
+        self._begin_scan()
+        images = self.refresh(images_dir, IMAGE_EXTENSIONS)
+        prefix = f"image:{Path(images_dir).resolve()}/"
+        processed = self._processed(prefix)
+        pending = []
+        self.conn.execute('BEGIN')
+        try:
+            for name in sorted(images):
+                key = prefix + name
+                try:
+                    signature = self._hash(images_dir, name, images)
+                except OSError:
+                    continue
+                if processed.get(key) == signature:
+                    self.last_scan['skipped'] = self.last_scan.get('skipped', 0) + 1
+                    continue
+                pending.append({'image': Path(images_dir) / name, 'name': name, 'key': key, 'signature': signature})
+        finally:
+            self.conn.execute('COMMIT')
+        self._end_scan(len(pending))
+        return pending
+
+    def mark_done(self, item):
+        """pending_pairs / pending_images 항목을 처리 완료로 기록 (같은 내용이 다시 들어오면 건너뜀)"""
+        self.conn.execute("INSERT OR REPLACE INTO processed (key, signature, finished) VALUES (?, ?, ?)",
+                          (item['key'], item['signature'], time.time()))
+
+    def format_scan(self):
+        """'파일 12개, 변경 2 (해시 2), 처리 대상 1, 이미 처리 3 (0.01초)'"""
+        scan = self.last_scan
+        text = f"파일 {scan.get('files', 0)}개, 변경 {scan.get('changed', 0)}"
+        if scan.get('hashed'):
+            text += f" (해시 {scan['hashed']})"
+        text += f", 처리 대상 {scan.get('pending', 0)}"
+        if scan.get('skipped'):
+            text += f", 이미 처리 {scan['skipped']}"
+        if scan.get('settling'):
+            text += f", 업로드 중 {scan['settling']}"
+        return text + f" ({scan.get('seconds', 0):.2f}초)"
+
+    def status(self):
+        return {
+            'files': dict(self.conn.execute("SELECT directory, count(*) FROM files GROUP BY directory").fetchall()),
+            'hashed': self.conn.execute("SELECT count(*) FROM files WHERE hash IS NOT NULL").fetchone()[0],
+            'processed': self.conn.execute("SELECT count(*) FROM processed").fetchone()[0]
+        }
+
+    def reset(self):
+        self.conn.execute("DELETE FROM processed")
+
+
+_index = None
+
+
+def get_input_index():
+    """공용 인덱스 (config.json의 input_index 섹션, 꺼져 있으면 실행마다 새로 만드는 메모리 인덱스)"""
+    global _index
+    if _index is None:
+        settings = load_input_index_config()
+        _index = InputIndex(settings['path'] if settings['enabled'] else None,
+                            settle_seconds=settings['settle_seconds'],
+                            skip_processed=settings['skip_processed'])
+    return _index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='입력 폴더 인덱스')
+    parser.add_argument('command', choices=['status', 'reset'])
+    args = parser.parse_args(argv)
+    index = get_input_index()
+    if args.command == 'status':
+        print(json.dumps(index.status(), ensure_ascii=False, indent=2))
+    else:
+        index.reset()
+        print("🧹 처리 기록을 지웠습니다. 다음 실행에서 남아 있는 파일을 모두 다시 처리합니다.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
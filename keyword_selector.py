@@ -4,31 +4,38 @@
 고수익 키워드 추출 및 인터랙티브 선택 기능
 """
 
-import os
-import json
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# 공급자 호출 계층 import
+from providers import get_api_key, gemini_generate, openai_chat, GEMINI_MODEL, OPENAI_MODEL
+from provider_router import get_router
+from metrics import stage
+from event_bus import warning, flush_events
+from run_catalog import catalog_transaction
+from serialization import read_json, write_json, loads
+from schemas import Analysis
+
 class KeywordSelector:
     """애드센스/블로그 수익화를 위한 다국어 키워드 선택 시스템"""
     
-    def __init__(self, language='ko', ai_provider='gemini'):
+    def __init__(self, language='ko', ai_provider='gemini', hedge=False):
         self.language = language
         self.ai_provider = ai_provider.lower()
+        self.hedge = hedge
         self.load_keyword_database()
         self.load_language_config()
         
     def load_keyword_database(self):
         """키워드 데이터베이스 로드"""
-        with open('config/keywords.json', 'r', encoding='utf-8') as f:
-            self.keyword_db = json.load(f)
+        self.keyword_db = read_json('config/keywords.json')
     
     def load_language_config(self):
         """언어 설정 로드"""
-        with open('config/languages.json', 'r', encoding='utf-8') as f:
-            self.lang_config = json.load(f)
+        self.lang_config = read_json('config/languages.json')
             
         if self.language not in self.lang_config['supported_languages']:
             print(f"⚠️  '{self.language}' 언어는 지원되지 않습니다. 한국어로 설정합니다.")
@@ -36,6 +43,7 @@ class KeywordSelector:
             
         self.current_lang = self.lang_config['supported_languages'][self.language]
     
+    @stage('topic_analysis')
     def analyze_topic(self, topic):
         """
         주제 분석 및 키워드 추출
@@ -44,7 +52,7 @@ class KeywordSelector:
             topic: 사용자가 입력한 주제 (뉴스, 정책, 이슈 등)
         
         Returns:
-            dict: 키워드 분석 결과
+            Analysis: 키워드 분석 결과
         """
         try:
             # 언어별 프롬프트 선택
@@ -57,43 +65,31 @@ class KeywordSelector:
             }
             prompt = prompts.get(self.language, prompts['ko'])
             
-            if self.ai_provider == 'openai':
-                # OpenAI GPT
-                import openai
-                
-                api_key = os.getenv('OPENAI_API_KEY')
-                if not api_key:
-                    print("⚠️  OpenAI API 키가 없습니다. 기본 키워드를 사용합니다.")
+            handlers = self._provider_handlers(prompt)
+            
+            if self.ai_provider == 'auto':
+                # 지연/오류율 기준으로 가장 빠른 공급자 선택
+                if not handlers:
+                    warning("⚠️  AI API 키가 없습니다. 기본 키워드를 사용합니다.")
                     return self._generate_default_keywords(topic)
                 
-                openai.api_key = api_key
+                result_text = get_router().call(handlers, hedge=self.hedge)
                 
-                response = openai.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[
-                        {"role": "system", "content": "You are a shopping channel expert earning $20K+/month through keyword optimization."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=2000
-                )
+            elif self.ai_provider == 'openai':
+                # OpenAI GPT
+                if 'openai' not in handlers:
+                    warning("⚠️  OpenAI API 키가 없습니다. 기본 키워드를 사용합니다.")
+                    return self._generate_default_keywords(topic)
                 
-                result_text = response.choices[0].message.content
+                result_text = handlers['openai'][1]()
                 
             else:
                 # Gemini AI (기본)
-                import google.generativeai as genai
-                
-                api_key = os.getenv('GEMINI_API_KEY')
-                if not api_key:
-                    print("⚠️  Gemini API 키가 없습니다. 기본 키워드를 사용합니다.")
+                if 'gemini' not in handlers:
+                    warning("⚠️  Gemini API 키가 없습니다. 기본 키워드를 사용합니다.")
                     return self._generate_default_keywords(topic)
                 
-                genai.configure(api_key=api_key)
-                model = genai.GenerativeModel('gemini-1.5-flash')
-                
-                response = model.generate_content(prompt)
-                result_text = response.text
+                result_text = handlers['gemini'][1]()
             
             # JSON 파싱
             if '```json' in result_text:
@@ -103,13 +99,28 @@ class KeywordSelector:
             else:
                 json_str = result_text.strip()
             
-            result = json.loads(json_str)
-            return result
+            return Analysis.from_dict(loads(json_str))
             
         except Exception as e:
-            print(f"⚠️  분석 실패: {str(e)}")
+            warning(f"⚠️  분석 실패: {str(e)}")
             return self._generate_default_keywords(topic)
     
+    def _provider_handlers(self, prompt):
+        """API 키가 있는 공급자별 호출 함수 {provider: (model, fn)}"""
+        handlers = {}
+        if get_api_key('OPENAI_API_KEY'):
+            handlers['openai'] = (OPENAI_MODEL, lambda: openai_chat(
+                [
+                    {"role": "system", "content": "You are a shopping channel expert earning $20K+/month through keyword optimization."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.7,
+                max_tokens=2000
+            ))
+        if get_api_key('GEMINI_API_KEY'):
+            handlers['gemini'] = (GEMINI_MODEL, lambda: gemini_generate(prompt))
+        return handlers
+    
     def _get_korean_prompt(self, topic):
         """한국어 프롬프트 - 숏폼 쇼핑 채널 전략"""
         return f"""당신은 월 2000만원 이상 수익을 내는 숏폼 쇼핑 채널 전문가입니다.
@@ -333,7 +344,7 @@ JSON形式で応答：
     
     def _generate_default_keywords(self, topic):
         """기본 키워드 생성 (API 없을 때)"""
-        return {
+        return Analysis.from_dict({
             "main_keyword": topic,
             "core_needs": ["신청", "조회", "방법"],
             "high_revenue_keywords": [
@@ -363,14 +374,14 @@ JSON形式で応答：
                 "body": "신청 방법, 자격 조건, 필요 서류 등 구체적 정보 제공",
                 "conclusion": "요약 및 신청 링크 유도"
             }
-        }
+        })
     
     def display_and_select(self, analysis_result):
         """
         분석 결과를 보여주고 사용자가 선택하도록 함
         
         Args:
-            analysis_result: analyze_topic()의 결과
+            analysis_result: analyze_topic()의 결과 (Analysis)
         
         Returns:
             dict: 사용자가 선택한 키워드와 제목
@@ -381,39 +392,40 @@ JSON形式で応答：
         
         # 1. 핵심 공략 키워드
         print("\n### 1. 🎯 핵심 공략 키워드")
-        print(f"**메인 키워드**: {analysis_result['main_keyword']}")
-        print(f"**핵심 니즈**: {', '.join(analysis_result['core_needs'])}")
+        print(f"**메인 키워드**: {analysis_result.main_keyword}")
+        print(f"**핵심 니즈**: {', '.join(analysis_result.needs)}")
         
-        # 2. 돈 되는 세부 키워드 리스트
+        # 2. 돈 되는 세부 키워드 리스트 (고수익 키워드 다음에 롱테일, 번호는 이어서)
         print("\n### 2. 💸 돈 되는 세부 키워드 리스트")
+        keywords = analysis_result.keywords
         print("\n**고수익 키워드 (선택 가능):**")
-        high_revenue = analysis_result['high_revenue_keywords']
-        for i, kw in enumerate(high_revenue, 1):
-            print(f"   [{i}] {kw['keyword']}")
-            print(f"       유형: {kw['type']} | 경쟁도: {kw['competition']} | CPC: {kw['cpc_potential']}")
+        for i, kw in enumerate(keywords, 1):
+            if not kw.longtail:
+                print(f"   [{i}] {kw.text}")
+                print(f"       유형: {kw.type} | 경쟁도: {kw.competition} | CPC: {kw.cpc}")
         
         print("\n**롱테일 키워드 (선택 가능):**")
-        longtail = analysis_result['longtail_keywords']
-        for i, kw in enumerate(longtail, 1):
-            print(f"   [{i + len(high_revenue)}] {kw}")
+        for i, kw in enumerate(keywords, 1):
+            if kw.longtail:
+                print(f"   [{i}] {kw.text}")
         
         print("\n**실제 검색 질문:**")
-        for query in analysis_result['search_queries']:
+        for query in analysis_result.queries:
             print(f"   • {query}")
         
         # 3. 클릭을 부르는 제목 추천
         print("\n### 3. ✍️ 클릭을 부르는 제목 추천")
-        titles = analysis_result['recommended_titles']
+        titles = analysis_result.titles
         for i, title_info in enumerate(titles, 1):
-            print(f"\n   [{i}] {title_info['title']}")
-            print(f"       훅킹 요소: {title_info['hook']} | CTR 점수: {title_info['ctr_score']}/100")
+            print(f"\n   [{i}] {title_info.text}")
+            print(f"       훅킹 요소: {title_info.hook} | CTR 점수: {title_info.ctr_score}/100")
         
         # 4. 수익형 본문 구성 전략
         print("\n### 4. 📝 수익형 본문 구성 전략")
-        strategy = analysis_result['content_strategy']
-        print(f"   **서론**: {strategy['intro']}")
-        print(f"   **본론**: {strategy['body']}")
-        print(f"   **결론**: {strategy['conclusion']}")
+        strategy = analysis_result.content_strategy
+        print(f"   **서론**: {strategy.get('intro', '')}")
+        print(f"   **본론**: {strategy.get('body', '')}")
+        print(f"   **결론**: {strategy.get('conclusion', '')}")
         
         # 사용자 선택 받기
         print("\n" + "="*80)
@@ -422,7 +434,7 @@ JSON形式で応答：
         
         # 키워드 선택
         print("\n🔑 키워드 선택 (쉼표로 구분, 예: 1,3,5):")
-        print(f"   선택 가능: 1-{len(high_revenue) + len(longtail)}")
+        print(f"   선택 가능: 1-{len(keywords)}")
         
         try:
             keyword_input = input("선택할 키워드 번호: ").strip()
@@ -431,17 +443,11 @@ JSON形式で応答：
             else:
                 selected_keyword_indices = [0, 1, 2]  # 기본값: 처음 3개
             
-            # 선택된 키워드 추출
-            all_keywords = []
-            for kw in high_revenue:
-                all_keywords.append(kw['keyword'])
-            all_keywords.extend(longtail)
-            
-            selected_keywords = [all_keywords[i] for i in selected_keyword_indices if i < len(all_keywords)]
+            selected_keywords = analysis_result.keyword_texts(selected_keyword_indices)
             
         except (ValueError, IndexError):
             print("⚠️  잘못된 입력입니다. 기본값을 사용합니다.")
-            selected_keywords = [kw['keyword'] for kw in high_revenue[:3]]
+            selected_keywords = analysis_result.keyword_texts(range(3))
         
         # 제목 선택
         print(f"\n📰 제목 선택 (1-{len(titles)}):")
@@ -453,11 +459,11 @@ JSON形式で応答：
             else:
                 selected_title_index = 1  # 기본값: 2번째 (가장 높은 CTR)
             
-            selected_title = titles[selected_title_index]['title']
+            selected_title = titles[selected_title_index].text
             
         except (ValueError, IndexError):
             print("⚠️  잘못된 입력입니다. 기본값을 사용합니다.")
-            selected_title = titles[1]['title']
+            selected_title = titles[1].text
         
         # 선택 결과 출력
         print("\n" + "="*80)
@@ -477,13 +483,14 @@ JSON形式で応答：
         result = {
             'selected_keywords': selected_keywords,
             'selected_title': selected_title,
-            'main_keyword': analysis_result['main_keyword'],
-            'content_strategy': analysis_result['content_strategy'],
+            'main_keyword': analysis_result.main_keyword,
+            'content_strategy': analysis_result.content_strategy,
             'auto_generate': auto_generate == 'y'
         }
         
         return result
     
+    @stage('script_generation')
     def generate_script_from_selection(self, selection_result):
         """
         선택된 키워드와 제목으로 YouTube 숏폼 스크립트 자동 생성
@@ -495,14 +502,9 @@ JSON形式で応答：
             dict: YouTube 숏폼용 스크립트
         """
         try:
-            import google.generativeai as genai
-            
-            if not os.getenv('GEMINI_API_KEY'):
+            if not get_api_key('GEMINI_API_KEY'):
                 return self._generate_default_script(selection_result)
             
-            genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-            model = genai.GenerativeModel('gemini-1.5-flash')
-            
             prompt = f"""다음 정보로 YouTube 숏폼 대본을 작성하세요:
 
 제목: {selection_result['selected_title']}
@@ -527,8 +529,7 @@ JSON 형식으로 응답:
 }}
 """
             
-            response = model.generate_content(prompt)
-            result_text = response.text
+            result_text = gemini_generate(prompt)
             
             # JSON 파싱
             if '```json' in result_text:
@@ -538,7 +539,7 @@ JSON 형식으로 응답:
             else:
                 json_str = result_text.strip()
             
-            script_data = json.loads(json_str)
+            script_data = loads(json_str)
             
             # 전체 스크립트 구성
             full_script = {
@@ -597,8 +598,9 @@ JSON 형식으로 응답:
         
         filepath = scripts_dir / filename
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(script_data, f, ensure_ascii=False, indent=2)
+        with catalog_transaction() as catalog:
+            write_json(filepath, script_data, human=True)
+            catalog.add('script', filepath, script_data)
         
         print(f"\n✅ 스크립트 저장 완료: {filepath}")
         return str(filepath)
@@ -628,6 +630,7 @@ def run_keyword_selector():
     # 주제 분석
     print(f"\n🔍 '{topic}' 분석 중...")
     analysis_result = selector.analyze_topic(topic)
+    flush_events()
     
     # 결과 표시 및 선택
     selection_result = selector.display_and_select(analysis_result)
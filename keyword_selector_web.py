@@ -5,19 +5,34 @@ Flask 서버로 클릭 가능한 UI 제공
 """
 
 import os
-import json
+import queue
+import threading
 import webbrowser
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response
 from keyword_selector import KeywordSelector
+from provider_router import load_routing_config
+from metrics import render_prometheus, CONTENT_TYPE
+from event_bus import subscribe, unsubscribe
+from serialization import dumps
 
 app = Flask(__name__)
-selector = KeywordSelector()
+_selector = None
+_selector_lock = threading.Lock()
 
 # 현재 분석 결과를 저장할 전역 변수
 current_analysis = None
 current_topic = None
 
+def get_selector():
+    """첫 요청에서 선택기 생성 (import만 할 때는 설정 파일을 읽지 않음)"""
+    global _selector
+    with _selector_lock:
+        if _selector is None:
+            # 웹 요청은 응답 시간이 중요하므로 지연 기반 라우팅 + 헤징 사용
+            _selector = KeywordSelector(ai_provider='auto', hedge=load_routing_config()['web_hedge'])
+        return _selector
+
 @app.route('/')
 def index():
     """메인 페이지"""
@@ -38,9 +53,9 @@ def analyze():
     
     # AI 분석 수행
     print(f"🔍 '{topic}' 분석 중...")
-    current_analysis = selector.analyze_topic(topic)
+    current_analysis = get_selector().analyze_topic(topic)
     
-    return jsonify(current_analysis)
+    return Response(dumps(current_analysis), mimetype='application/json')
 
 @app.route('/generate', methods=['POST'])
 def generate_script():
@@ -54,36 +69,31 @@ def generate_script():
     selected_keyword_indices = data.get('keywords', [])
     selected_title_index = data.get('title', 0)
     
-    # 키워드 추출
-    all_keywords = []
-    for kw in current_analysis['high_revenue_keywords']:
-        all_keywords.append(kw['keyword'])
-    all_keywords.extend(current_analysis['longtail_keywords'])
-    
-    selected_keywords = [all_keywords[i] for i in selected_keyword_indices if i < len(all_keywords)]
+    # 키워드 추출 (번호는 analysis.keywords 순서 그대로)
+    selected_keywords = current_analysis.keyword_texts(selected_keyword_indices)
     
     # 제목 추출
-    titles = current_analysis['recommended_titles']
+    titles = current_analysis.titles
     if selected_title_index < len(titles):
-        selected_title = titles[selected_title_index]['title']
+        selected_title = titles[selected_title_index].text
     else:
-        selected_title = titles[0]['title']
+        selected_title = titles[0].text
     
     # 선택 결과
     selection_result = {
         'selected_keywords': selected_keywords,
         'selected_title': selected_title,
-        'main_keyword': current_analysis['main_keyword'],
-        'content_strategy': current_analysis['content_strategy'],
+        'main_keyword': current_analysis.main_keyword,
+        'content_strategy': current_analysis.content_strategy,
         'auto_generate': True
     }
     
     # 스크립트 생성
     print("\n🎬 YouTube 숏폼 스크립트 생성 중...")
-    script_data = selector.generate_script_from_selection(selection_result)
+    script_data = get_selector().generate_script_from_selection(selection_result)
     
     # 저장
-    script_path = selector.save_script(script_data)
+    script_path = get_selector().save_script(script_data)
     
     return jsonify({
         'success': True,
@@ -91,6 +101,34 @@ def generate_script():
         'script_data': script_data
     })
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus 수집용 메트릭 (단계 / 공급자 호출)"""
+    return Response(render_prometheus(), content_type=CONTENT_TYPE)
+
+@app.route('/events')
+def events():
+    """진행 이벤트 스트림 (Server-Sent Events, 이벤트 1개 = data 한 줄)"""
+    subscriber = subscribe()
+    if subscriber is None:
+        return jsonify({'error': 'SSE 싱크가 꺼져 있습니다 (config.json events.sse)'}), 404
+    
+    def stream():
+        try:
+            while True:
+                try:
+                    event = subscriber.get(timeout=15)
+                except queue.Empty:
+                    # 프록시가 연결을 끊지 않도록 주기적으로 주석 줄 전송
+                    yield ': keepalive\n\n'
+                    continue
+                yield f"data: {dumps(event)}\n\n"
+        finally:
+            unsubscribe(subscriber)
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 def run_web_ui(port=5000, debug=False):
     """웹 UI 실행"""
     print("\n" + "="*80)
@@ -5,7 +5,6 @@ YouTube 숏폼 자동화 메인 스크립트
 """
 
 import os
-import json
 import time
 import base64
 from pathlib import Path
@@ -14,15 +13,34 @@ from dotenv import load_dotenv
 # .env 파일 로드
 load_dotenv()
 
+# 공급자 호출 계층 / D-ID 웹훅 수신기 import
+from providers import get_api_key, gemini_generate, did_request, download
+from did_webhook import get_receiver, wait_for_talk
+from retry_policy import format_retry_stats
+from concurrency import stage_slot, map_concurrently
+from metrics import stage, observe_item, start_exporter, write_run_summary, format_stage_summary
+from cost_accounting import usage_scope, update_usage_scope, enforce_budget, get_ledger
+from tracing import span, annotate, get_exporter
+from event_bus import event_scope, progress, warning, report_error, flush_events
+from run_catalog import catalog_transaction
+from input_index import get_input_index
+from work_claims import get_claims
+from output_layout import get_layout
+from retention import get_retention
+from run_journal import record, get_compactor
+from serialization import read_json, write_json, loads
+from workflow_engine import register_stage, load_workflow
+
 class YouTubeAutomation:
     def __init__(self):
         self.config = self.load_config()
         self.check_api_keys()
+        # 단계 순서 / 병렬 가지 (config.json workflow.main → workflows/<이름>.json의 dag)
+        self.workflow = load_workflow()
         
     def load_config(self):
         """설정 파일 로드"""
-        with open('config/config.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return read_json('config/config.json')
     
     def check_api_keys(self):
         """필수 API 키 확인"""
@@ -33,7 +51,7 @@ class YouTubeAutomation:
         
         missing_keys = []
         for key, name in required_keys.items():
-            if not os.getenv(key):
+            if not get_api_key(key):
                 missing_keys.append(f"{name} ({key})")
         
         if missing_keys:
@@ -61,7 +79,7 @@ class YouTubeAutomation:
             print("\n시뮬레이션 모드로 계속합니다...\n")
     
     def scan_input_folder(self):
-        """input 폴더에서 새 파일 스캔"""
+        """input 폴더에서 새 파일 스캔 (증분 인덱스: 새로 들어왔거나 바뀐 쌍만)"""
         images_dir = Path('input/images')
         scripts_dir = Path('input/scripts')
         
@@ -69,131 +87,178 @@ class YouTubeAutomation:
             print("❌ input/images 또는 input/scripts 폴더가 없습니다.")
             return []
         
-        # 이미지 파일 찾기
-        image_files = list(images_dir.glob('*.jpg')) + \
-                     list(images_dir.glob('*.jpeg')) + \
-                     list(images_dir.glob('*.png'))
+        # 죽은 작업자가 선점했던 파일부터 되돌린 뒤 스캔
+        get_claims().start()
         
         # 매칭되는 스크립트가 있는 이미지만 처리
-        matched_pairs = []
-        for image_path in image_files:
-            script_path = scripts_dir / f"{image_path.stem}.json"
-            if script_path.exists():
-                matched_pairs.append({
-                    'image': image_path,
-                    'script': script_path,
-                    'name': image_path.stem
-                })
+        index = get_input_index()
+        matched_pairs = index.pending_pairs(images_dir, scripts_dir)
+        print(f"   {index.format_scan()}")
         
         return matched_pairs
     
     def process_file_pair(self, pair):
-        """이미지+스크립트 페어 처리"""
-        print(f"\n{'='*60}")
-        print(f"🎬 처리 시작: {pair['name']}")
-        print(f"{'='*60}")
-        
-        # 1. 스크립트 로드
-        print("\n📄 1. 스크립트 로드 중...")
-        with open(pair['script'], 'r', encoding='utf-8') as f:
-            script_data = json.load(f)
-        print(f"   ✓ 제목: {script_data.get('title', 'N/A')}")
-        print(f"   ✓ 시간: {script_data.get('duration', 'N/A')}초")
-        
-        # 2. 이미지 분석 (Gemini)
-        print("\n🔍 2. 이미지 분석 중 (Gemini AI)...")
-        analysis_result = self.analyze_image_with_gemini(pair['image'], script_data)
-        print(f"   ✓ 제품 감지: {'예' if analysis_result.get('is_product') else '아니오'}")
-        
-        # 3. 제품 리서치 (제품인 경우)
-        research_result = None
-        if analysis_result.get('is_product'):
-            print("\n🔎 3. 제품 리서치 중...")
-            research_result = self.research_product(analysis_result)
-            if research_result.get('selling'):
-                print(f"   ✓ 판매 중: {len(research_result.get('platforms', []))}개 플랫폼")
-                print(f"   ✓ 가격대: {research_result.get('price_range', 'N/A')}")
-        else:
-            print("\n⏭️  3. 제품 리서치 건너뛰기 (일반 이미지)")
-        
-        # 4. 키워드 최적화
-        print("\n🎯 4. 키워드 최적화 중 (Gemini AI)...")
-        optimized = self.optimize_keywords(script_data, analysis_result, research_result)
-        print(f"   ✓ 원본 제목: {script_data.get('title', 'N/A')}")
-        print(f"   ✓ 최적화 제목: {optimized['title']}")
-        print(f"   ✓ 해시태그: {len(optimized['hashtags'])}개")
-        
-        # 5. 썸네일 생성
-        print("\n🖼️  5. 썸네일 생성 중...")
-        thumbnail_path = self.create_thumbnail(pair['image'], optimized)
-        print(f"   ✓ 저장: {thumbnail_path}")
-        
-        # 6. 비디오 생성 (D-ID)
-        print("\n🎥 6. 비디오 생성 중 (D-ID API)...")
-        print("   ⏳ 5-8분 소요됩니다. 잠시만 기다려주세요...")
-        video_path = self.create_video_with_did(pair['image'], script_data['script_text'], 
-                                                 script_data.get('voice_id', 'ko-KR-SunHiNeural'))
-        print(f"   ✓ 비디오 생성 완료: {video_path}")
-        
-        # 7. 메타데이터 저장
-        print("\n💾 7. 메타데이터 저장 중...")
-        metadata_path = self.save_metadata(pair['name'], optimized, analysis_result, research_result)
-        print(f"   ✓ 저장: {metadata_path}")
-        
-        # 8. YouTube 업로드 (선택사항)
-        youtube_url = None
-        if os.getenv('YOUTUBE_CLIENT_ID'):
-            print("\n📤 8. YouTube 업로드 중...")
-            youtube_url = self.upload_to_youtube(video_path, thumbnail_path, optimized)
-            print(f"   ✓ 업로드 완료: {youtube_url}")
-        else:
-            print("\n⏭️  8. YouTube 업로드 건너뛰기 (API 키 없음)")
-            print("   💡 비디오는 output/videos/ 폴더에 저장되었습니다.")
+        """
+        이미지+스크립트 페어 처리 (예산 확인 + 페어별 비용 집계 / 트레이스)
+        
+        처리 직전에 input/processing/<작업자>/로 옮겨 선점하고, 다른 작업자가 먼저 가져갔으면 None
+        """
+        claims = get_claims()
+        claim = claims.claim(pair['image'], pair['script'])
+        if claim is None:
+            progress("⏭️  다른 작업자가 처리 중이라 건너뜀", image=pair['name'])
+            return None
+        pair = dict(pair, image=claim.paths[0], script=claim.paths[1])
+        start = time.monotonic()
+        try:
+            with usage_scope(pipeline='main', image=pair['name']), \
+                    event_scope(pipeline='main', image=pair['name']), \
+                    span('image', kind='image', image=pair['name']):
+                enforce_budget(pair['name'])
+                result = self._process_file_pair(pair)
+        except BaseException as e:
+            record('image', 'failed', pipeline='main', image=pair['name'],
+                   seconds=round(time.monotonic() - start, 3), error=f"{type(e).__name__}: {e}")
+            # 원래 폴더로 되돌려서 다음 실행 / 다른 작업자가 다시 처리
+            claims.release(claim)
+            raise
+        claims.finish(claim)
+        record('image', 'ok', pipeline='main', image=pair['name'], language=result['language'],
+               seconds=round(time.monotonic() - start, 3), path=result['video'],
+               rendered=(result['video'] or '').endswith('.mp4'), render_seconds=result['render_seconds'])
+        return result
+    
+    def _process_file_pair(self, pair):
+        """process_file_pair 본체 (단계 순서 / 병렬 실행은 워크플로우 dag가 결정)"""
+        progress(f"\n{'='*60}")
+        progress(f"🎬 처리 시작: {pair['name']}")
+        progress(f"{'='*60}")
         
-        # 9. 원본 파일 이동
-        print("\n📦 9. 파일 정리 중...")
-        self.move_to_completed(pair)
-        print("   ✓ 원본 파일을 completed 폴더로 이동")
+        item = self.workflow.run(self, {'pair': pair, 'name': pair['name']})
         
-        print(f"\n{'='*60}")
-        print("✅ 처리 완료!")
-        print(f"{'='*60}")
+        progress(f"\n{'='*60}")
+        progress("✅ 처리 완료!")
+        progress(f"{'='*60}")
         
         return {
             'name': pair['name'],
-            'video': video_path,
-            'thumbnail': thumbnail_path,
-            'metadata': metadata_path,
-            'youtube_url': youtube_url,
-            'optimized': optimized
+            'video': item.get('video'),
+            'thumbnail': item.get('thumbnail'),
+            'metadata': item.get('metadata'),
+            'youtube_url': item.get('youtube_url'),
+            'optimized': item.get('optimized'),
+            'language': item.get('language'),
+            'render_seconds': item.get('render_seconds')
         }
     
+    # ------------------------------------------------------------------
+    # 워크플로우 단계 (item: 항목 1개의 작업 dict, 앞 단계 결과를 읽고 자기 결과를 기록)
+    # ------------------------------------------------------------------
+    
+    def _step_script_load(self, item):
+        progress("\n📄 스크립트 로드 중...")
+        with stage('script_load'):
+            script_data = read_json(item['pair']['script'])
+        progress(f"   ✓ 제목: {script_data.get('title', 'N/A')}")
+        progress(f"   ✓ 시간: {script_data.get('duration', 'N/A')}초")
+        # 언어는 음성 ID 앞부분 (ko-KR-SunHiNeural → ko)
+        language = script_data.get('voice_id', 'ko-KR-SunHiNeural').split('-')[0]
+        update_usage_scope(language=language)
+        annotate(language=language)
+        item['script_data'] = script_data
+        item['language'] = language
+    
+    def _step_analysis(self, item):
+        progress("\n🔍 이미지 분석 중 (Gemini AI)...")
+        with stage('analysis'), stage_slot('analysis'):
+            item['analysis'] = self.analyze_image_with_gemini(item['pair']['image'], item['script_data'])
+        progress(f"   ✓ 제품 감지: {'예' if item['analysis'].get('is_product') else '아니오'}")
+    
+    def _step_research(self, item):
+        progress("\n🔎 제품 리서치 중...")
+        with stage('research'):
+            research_result = self.research_product(item['analysis'])
+        item['research'] = research_result
+        if research_result.get('selling'):
+            progress(f"   ✓ 판매 중: {len(research_result.get('platforms', []))}개 플랫폼")
+            progress(f"   ✓ 가격대: {research_result.get('price_range', 'N/A')}")
+    
+    def _step_keywords(self, item):
+        progress("\n🎯 키워드 최적화 중 (Gemini AI)...")
+        with stage('keywords'), stage_slot('keywords'):
+            optimized = self.optimize_keywords(item['script_data'], item.get('analysis') or {}, item.get('research'))
+        item['optimized'] = optimized
+        progress(f"   ✓ 원본 제목: {item['script_data'].get('title', 'N/A')}")
+        progress(f"   ✓ 최적화 제목: {optimized['title']}")
+        progress(f"   ✓ 해시태그: {len(optimized['hashtags'])}개")
+    
+    def _step_thumbnail(self, item):
+        progress("\n🖼️  썸네일 생성 중...")
+        with stage('thumbnail'):
+            item['thumbnail'] = self.create_thumbnail(item['pair']['image'], item['optimized'])
+        progress(f"   ✓ 저장: {item['thumbnail']}")
+    
+    def _step_render(self, item):
+        progress("\n🎥 비디오 생성 중 (D-ID API)...")
+        progress("   ⏳ 5-8분 소요됩니다. 잠시만 기다려주세요...")
+        script_data = item['script_data']
+        enforce_budget(item['name'])
+        render_start = time.monotonic()
+        with stage('render'), stage_slot('render'):
+            video_path = self.create_video_with_did(item['pair']['image'], script_data['script_text'], 
+                                                     script_data.get('voice_id', 'ko-KR-SunHiNeural'))
+        item['render_seconds'] = round(time.monotonic() - render_start, 3)
+        item['video'] = video_path
+        if video_path and video_path.endswith('.mp4'):
+            get_ledger().note_video()
+        progress(f"   ✓ 비디오 생성 완료: {video_path}")
+    
+    def _step_metadata(self, item):
+        progress("\n💾 메타데이터 저장 중...")
+        with stage('metadata'):
+            item['metadata'] = self.save_metadata(item['name'], item.get('optimized'), item.get('analysis'),
+                                                  item.get('research'), language=item.get('language'),
+                                                  video_path=item.get('video'),
+                                                  render_seconds=item.get('render_seconds'))
+        progress(f"   ✓ 저장: {item['metadata']}")
+    
+    def _step_upload(self, item):
+        if not os.getenv('YOUTUBE_CLIENT_ID'):
+            progress("\n⏭️  YouTube 업로드 건너뛰기 (API 키 없음)")
+            progress("   💡 비디오는 output/videos/ 폴더에 저장되었습니다.")
+            return
+        progress("\n📤 YouTube 업로드 중...")
+        with stage('upload'):
+            item['youtube_url'] = self.upload_to_youtube(item['video'], item['thumbnail'], item['optimized'])
+        # upload_to_youtube는 아직 시뮬레이션이므로 mark_uploaded(보존 정책 삭제 대상)로 표시하지 않음.
+        # 실제 업로드가 영상 ID를 돌려주게 되면 그때 get_layout().mark_uploaded(...) 호출
+        progress(f"   ✓ 업로드 완료: {item['youtube_url']}")
+    
+    def _step_move(self, item):
+        progress("\n📦 파일 정리 중...")
+        with stage('move'):
+            self.move_to_completed(item['pair'])
+        progress("   ✓ 원본 파일을 completed 폴더로 이동")
+    
     def analyze_image_with_gemini(self, image_path, script_data):
         """Gemini로 이미지 분석"""
         try:
-            import google.generativeai as genai
-            
-            genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-            model = genai.GenerativeModel('gemini-1.5-flash')
-            
             # 이미지 로드
             with open(image_path, 'rb') as f:
                 image_data = f.read()
             
             # 프롬프트 로드
-            with open('prompts/prompts.json', 'r', encoding='utf-8') as f:
-                prompts = json.load(f)
+            prompts = read_json('prompts/prompts.json')
             
-            prompt = prompts['keyword_analysis']['prompt_template'].format(
-                image_description="이미지 분석",
-                category=script_data.get('category', 'general')
-            )
+            # 템플릿에 JSON 예시 중괄호가 있어 str.format 대신 자리표시자만 치환
+            prompt = prompts['keyword_analysis']['prompt_template'] \
+                .replace('{image_description}', "이미지 분석") \
+                .replace('{category}', script_data.get('category', 'general'))
             
             # API 호출
-            response = model.generate_content([prompt, {'mime_type': 'image/jpeg', 'data': image_data}])
+            result_text = gemini_generate([prompt, {'mime_type': 'image/jpeg', 'data': image_data}])
             
             # JSON 응답 파싱
-            result_text = response.text
             # JSON 블록 추출
             if '```json' in result_text:
                 json_str = result_text.split('```json')[1].split('```')[0].strip()
@@ -202,7 +267,7 @@ class YouTubeAutomation:
             else:
                 json_str = result_text.strip()
             
-            result = json.loads(json_str)
+            result = loads(json_str)
             
             # 제품 여부 판단
             result['is_product'] = result.get('category') in ['tech', 'lifestyle'] and \
@@ -212,7 +277,7 @@ class YouTubeAutomation:
             return result
             
         except Exception as e:
-            print(f"   ⚠️  Gemini 분석 실패: {str(e)}")
+            warning(f"   ⚠️  Gemini 분석 실패: {str(e)}")
             return {
                 'main_topic': script_data.get('title', '주제'),
                 'high_revenue_keywords': ['AI', '자동화', '돈버는법', '꿀팁', '2024'],
@@ -225,7 +290,7 @@ class YouTubeAutomation:
         """제품 리서치 (간단한 버전)"""
         # 실제로는 Google Custom Search API를 사용
         # 여기서는 시뮬레이션
-        print("   💡 실제 제품 리서치를 위해서는 Google Custom Search API가 필요합니다.")
+        progress("   💡 실제 제품 리서치를 위해서는 Google Custom Search API가 필요합니다.")
         return {
             'selling': True,
             'platforms': ['쿠팡', '네이버쇼핑'],
@@ -236,14 +301,8 @@ class YouTubeAutomation:
     def optimize_keywords(self, script_data, analysis_result, research_result):
         """키워드 최적화"""
         try:
-            import google.generativeai as genai
-            
-            genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-            model = genai.GenerativeModel('gemini-1.5-flash')
-            
             # 키워드 DB 로드
-            with open('config/keywords.json', 'r', encoding='utf-8') as f:
-                keywords_db = json.load(f)
+            keywords_db = read_json('config/keywords.json')
             
             prompt = f"""다음 콘텐츠를 YouTube 숏폼에 최적화하세요:
 
@@ -266,8 +325,7 @@ JSON 형식으로 응답:
 }}
 """
             
-            response = model.generate_content(prompt)
-            result_text = response.text
+            result_text = gemini_generate(prompt)
             
             # JSON 파싱
             if '```json' in result_text:
@@ -277,12 +335,12 @@ JSON 형식으로 응답:
             else:
                 json_str = result_text.strip()
             
-            optimized = json.loads(json_str)
+            optimized = loads(json_str)
             
             return optimized
             
         except Exception as e:
-            print(f"   ⚠️  최적화 실패, 기본값 사용: {str(e)}")
+            warning(f"   ⚠️  최적화 실패, 기본값 사용: {str(e)}")
             return {
                 'title': f"{script_data.get('title')} | 1분만에 보는 꿀팁 | 구독필수",
                 'hashtags': ['#shorts', '#숏폼'] + analysis_result.get('high_revenue_keywords', [])[:5],
@@ -295,9 +353,7 @@ JSON 형식으로 응답:
         import shutil
         
         # 출력 경로
-        output_dir = Path('output/thumbnails')
-        output_dir.mkdir(parents=True, exist_ok=True)
-        output_path = output_dir / f"{image_path.stem}_thumbnail.png"
+        output_path = get_layout().path_for('thumbnails', f"{image_path.stem}_thumbnail.png", stem=image_path.stem)
         
         # 일단 원본 이미지 복사 (나중에 텍스트 오버레이 추가 가능)
         shutil.copy(image_path, output_path)
@@ -306,27 +362,22 @@ JSON 형식으로 응답:
     
     def create_video_with_did(self, image_path, script_text, voice_id):
         """D-ID로 비디오 생성"""
-        import requests
-        
-        api_key = os.getenv('DID_API_KEY')
+        api_key = get_api_key('DID_API_KEY')
         if not api_key:
-            print("   ⚠️  D-ID API 키가 없습니다. 시뮬레이션 모드...")
+            warning("   ⚠️  D-ID API 키가 없습니다. 시뮬레이션 모드...")
             # 시뮬레이션: 이미지를 비디오로 복사
-            output_dir = Path('output/videos')
-            output_dir.mkdir(parents=True, exist_ok=True)
-            output_path = output_dir / f"{image_path.stem}_final.mp4"
+            output_path = get_layout().path_for('videos', f"{image_path.stem}_final.jpg", stem=image_path.stem)
             
             import shutil
-            shutil.copy(image_path, output_path.with_suffix('.jpg'))
-            print("   💡 실제 비디오를 생성하려면 D-ID API 키가 필요합니다.")
-            return str(output_path.with_suffix('.jpg'))
+            shutil.copy(image_path, output_path)
+            progress("   💡 실제 비디오를 생성하려면 D-ID API 키가 필요합니다.")
+            return str(output_path)
         
         try:
             # 1. 이미지 업로드 (실제로는 S3나 다른 호스팅 필요)
-            print("   📤 이미지 업로드 중...")
+            progress("   📤 이미지 업로드 중...")
             
             # 2. D-ID API 호출
-            url = "https://api.d-id.com/talks"
             headers = {
                 "Authorization": f"Basic {base64.b64encode(api_key.encode()).decode()}",
                 "Content-Type": "application/json"
@@ -352,79 +403,80 @@ JSON 형식으로 응답:
                 }
             }
             
-            print("   🎬 비디오 생성 요청 중...")
-            response = requests.post(url, json=payload, headers=headers)
+            # 웹훅 모드: 완료 콜백을 받을 URL 전달
+            receiver = get_receiver()
+            if receiver:
+                payload["webhook"] = receiver.webhook_url()
+            
+            progress("   🎬 비디오 생성 요청 중...")
+            response = did_request('POST', '/talks', json=payload, headers=headers)
             response.raise_for_status()
             
             talk_id = response.json()['id']
-            print(f"   ✓ Talk ID: {talk_id}")
+            annotate(talk_id=talk_id)
+            progress(f"   ✓ Talk ID: {talk_id}")
             
-            # 3. 결과 폴링
-            print("   ⏳ 비디오 생성 대기 중...")
-            max_wait = 300  # 5분
-            start_time = time.time()
+            # 3. 결과 대기 (웹훅 콜백 또는 폴링)
+            progress("   ⏳ 비디오 생성 대기 중...")
+            status_data = wait_for_talk(
+                talk_id,
+                lambda: did_request('GET', f"/talks/{talk_id}", headers=headers).json(),
+                max_wait=300,  # 5분
+                on_status=lambda data: progress(f"   ⏳ 상태: {data.get('status')}")
+            )
+            status = status_data.get('status') if status_data else None
             
-            while time.time() - start_time < max_wait:
-                time.sleep(5)
-                
-                status_response = requests.get(
-                    f"https://api.d-id.com/talks/{talk_id}",
-                    headers=headers
-                )
-                status_data = status_response.json()
-                status = status_data.get('status')
+            if status == 'done':
+                video_url = status_data['result_url']
+                progress("   ✓ 비디오 생성 완료!")
                 
-                print(f"   ⏳ 상태: {status}")
+                # 비디오 다운로드
+                get_retention().ensure_space()
+                video_content = download(video_url)
+                output_path = get_layout().path_for('videos', f"{image_path.stem}_final.mp4", stem=image_path.stem)
                 
-                if status == 'done':
-                    video_url = status_data['result_url']
-                    print("   ✓ 비디오 생성 완료!")
-                    
-                    # 비디오 다운로드
-                    video_response = requests.get(video_url)
-                    output_dir = Path('output/videos')
-                    output_dir.mkdir(parents=True, exist_ok=True)
-                    output_path = output_dir / f"{image_path.stem}_final.mp4"
-                    
-                    with open(output_path, 'wb') as f:
-                        f.write(video_response.content)
-                    
-                    return str(output_path)
+                with open(output_path, 'wb') as f:
+                    f.write(video_content)
                 
-                elif status == 'error':
-                    print(f"   ❌ 생성 실패: {status_data.get('error')}")
-                    break
+                return str(output_path)
             
-            print("   ⚠️  타임아웃: 비디오 생성에 시간이 너무 오래 걸립니다.")
+            elif status in ('error', 'rejected'):
+                report_error(f"   ❌ 생성 실패: {status_data.get('error')}")
+                return None
+            
+            warning("   ⚠️  타임아웃: 비디오 생성에 시간이 너무 오래 걸립니다.")
             return None
             
         except Exception as e:
-            print(f"   ❌ D-ID 오류: {str(e)}")
+            report_error(f"   ❌ D-ID 오류: {str(e)}")
             return None
     
-    def save_metadata(self, name, optimized, analysis_result, research_result):
+    def save_metadata(self, name, optimized, analysis_result, research_result, language=None, video_path=None,
+                      render_seconds=None):
         """메타데이터 저장"""
-        output_dir = Path('output/optimized')
-        output_dir.mkdir(parents=True, exist_ok=True)
-        output_path = output_dir / f"{name}_metadata.json"
+        output_path = get_layout().path_for('optimized', f"{name}_metadata.json", stem=name, language=language)
         
         metadata = {
             'name': name,
             'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'language': language,
+            'video': video_path,
+            'render_seconds': render_seconds,
             'optimized': optimized,
             'analysis': analysis_result,
             'research': research_result
         }
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        with catalog_transaction() as catalog:
+            write_json(output_path, metadata, human=True)
+            catalog.add('metadata', output_path, metadata)
         
         return str(output_path)
     
     def upload_to_youtube(self, video_path, thumbnail_path, optimized):
         """YouTube 업로드 (시뮬레이션)"""
-        print("   💡 실제 업로드를 위해서는 YouTube Data API 설정이 필요합니다.")
-        print("   💡 비디오와 썸네일은 output/ 폴더에 저장되었습니다.")
+        progress("   💡 실제 업로드를 위해서는 YouTube Data API 설정이 필요합니다.")
+        progress("   💡 비디오와 썸네일은 output/ 폴더에 저장되었습니다.")
         return "https://youtube.com/shorts/simulated"
     
     def move_to_completed(self, pair):
@@ -444,6 +496,9 @@ JSON 형식으로 응답:
         
         # 입력 파일 스캔
         print("\n📂 입력 파일 스캔 중...")
+        start_exporter()
+        get_retention().start()
+        get_compactor().start()
         pairs = self.scan_input_folder()
         
         if not pairs:
@@ -457,22 +512,32 @@ JSON 형식으로 응답:
         print(f"✓ {len(pairs)}개의 파일 쌍 발견")
         for pair in pairs:
             print(f"   - {pair['name']}")
+        print(f"🧩 워크플로우: {self.workflow.name} ({' → '.join(' | '.join(level) for level in self.workflow.levels)})")
         
-        # 각 파일 처리
+        # 각 파일 처리 (단계별 적응형 동시성 제어)
         results = []
-        for pair in pairs:
-            try:
-                result = self.process_file_pair(pair)
-                results.append(result)
-            except Exception as e:
-                print(f"\n❌ 오류 발생: {str(e)}")
+        outcomes = map_concurrently(self.process_file_pair, pairs)
+        flush_events()
+        taken = 0
+        for pair, outcome in zip(pairs, outcomes):
+            if outcome is None:
+                taken += 1
+                continue
+            observe_item('main', not isinstance(outcome, Exception))
+            if isinstance(outcome, Exception):
+                print(f"\n❌ 오류 발생 ({pair['name']}): {str(outcome)}")
                 import traceback
-                traceback.print_exc()
+                traceback.print_exception(outcome)
+            else:
+                get_input_index().mark_done(pair)
+                results.append(outcome)
         
         # 최종 요약
         print("\n" + "="*60)
         print("📊 처리 완료 요약")
         print("="*60)
+        if taken:
+            print(f"\n⏭️  다른 작업자가 가져간 쌍: {taken}개")
         for result in results:
             print(f"\n✅ {result['name']}")
             print(f"   비디오: {result['video']}")
@@ -480,29 +545,64 @@ JSON 형식으로 응답:
             if result['youtube_url']:
                 print(f"   YouTube: {result['youtube_url']}")
         
+        # 공급자 재시도 요약 (재시도가 있었던 경우만)
+        retry_summary = format_retry_stats()
+        if retry_summary:
+            print("\n🔁 공급자 재시도 요약:")
+            print(retry_summary)
+        
+        # 단계별 소요 시간 (어디서 시간이 쓰였는지)
+        stage_summary = format_stage_summary()
+        if stage_summary:
+            print("\n⏱️  단계별 소요 시간:")
+            print(stage_summary)
+            print(f"   📄 상세: {write_run_summary('main')}")
+            if get_exporter().path:
+                print(f"   🧭 트레이스: {get_exporter().path} (chrome://tracing / ui.perfetto.dev)")
+        
+        # 공급자 사용량 / 비용 (호출이 있었던 경우만)
+        cost_summary = get_ledger().format_summary()
+        if cost_summary:
+            print("\n💰 비용 요약:")
+            print(cost_summary)
+            print(f"   📄 상세: {get_ledger().write('main')}")
+        
         print("\n" + "="*60)
         print("🎉 모든 처리 완료!")
         print("="*60)
 
+
+def _labelled(method):
+    """단계를 item의 언어 라벨로 비용 집계 (단계마다 컨텍스트를 복사하므로 script_load의 라벨이 전달되지 않음)"""
+    def run(runner, item):
+        labels = {'language': item['language']} if 'language' in item else {}
+        with usage_scope(**labels):
+            method(runner, item)
+    return run
+
+
+# 워크플로우 단계 구현 (workflows/*.json의 dag에서 이름으로 참조, after = 결과를 읽는 단계)
+register_stage('script_load', _labelled(YouTubeAutomation._step_script_load))
+register_stage('analysis', _labelled(YouTubeAutomation._step_analysis), after=('script_load',))
+register_stage('research', _labelled(YouTubeAutomation._step_research), after=('analysis',))
+register_stage('keywords', _labelled(YouTubeAutomation._step_keywords), after=('script_load', 'analysis', 'research'))
+register_stage('thumbnail', _labelled(YouTubeAutomation._step_thumbnail), after=('keywords',))
+register_stage('render', _labelled(YouTubeAutomation._step_render), after=('script_load', 'analysis'))
+register_stage('metadata', _labelled(YouTubeAutomation._step_metadata),
+               after=('script_load', 'analysis', 'research', 'keywords', 'render'))
+register_stage('upload', _labelled(YouTubeAutomation._step_upload), after=('keywords', 'thumbnail', 'render'))
+# 입력 이미지를 읽는 단계가 모두 끝난 뒤에 옮김
+register_stage('move', _labelled(YouTubeAutomation._step_move), after=('analysis', 'thumbnail', 'render'))
+
 if __name__ == '__main__':
     import sys
+    from cli import main as cli_main
     
-    # 옵션 체크
-    if len(sys.argv) > 1:
-        if sys.argv[1] == '--keyword':
-            # 키워드 선택 모드 (터미널)
-            from keyword_selector import run_keyword_selector
-            run_keyword_selector()
-        elif sys.argv[1] == '--web':
-            # 웹 UI 모드
-            from keyword_selector_web import run_web_ui
-            run_web_ui()
-        else:
-            print("사용법:")
-            print("  python main.py              # 일반 자동화 모드")
-            print("  python main.py --keyword    # 키워드 선택 (터미널)")
-            print("  python main.py --web        # 키워드 선택 (웹 UI)")
-    else:
-        # 일반 자동화 모드
-        automation = YouTubeAutomation()
-        automation.run()
+    # 예전 옵션 호환: --keyword / --web → cli.py keyword / web, 나머지는 cli.py run
+    # (--profile [sample|cprofile]은 모든 모드에서 그대로 전달)
+    argv = sys.argv[1:]
+    legacy = {'--keyword': 'keyword', '--web': 'web'}
+    command = next((legacy[arg] for arg in argv if arg in legacy), 'run')
+    # 이 파일을 다시 import하지 않도록 cli.load('run')이 지금 모듈을 쓰게 함
+    sys.modules.setdefault('main', sys.modules[__name__])
+    sys.exit(cli_main([command] + [arg for arg in argv if arg not in legacy]))
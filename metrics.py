@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+파이프라인 단계 / 공급자 호출 메트릭
+단계별 지연 히스토그램, 처리 건수 카운터, 진행 중 게이지를 기록하고
+Prometheus 텍스트 형식(/metrics)으로 노출하거나 실행별 요약 파일로 저장
+
+    with stage('render'):
+        ...
+
+단계 시작/종료 시 호출되는 훅(add_stage_hook)으로 추적·이벤트 같은 다른 관찰 도구를 붙일 수 있음
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from serialization import read_json, write_json
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 초 단위. API 호출(수 초) ~ D-ID 렌더링(수 분)까지
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+DEFAULT_METRICS_CONFIG = {
+    'exporter_port': 0,
+    'exporter_host': '0.0.0.0',
+    'summary_dir': 'output/metrics'
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(labelnames, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """라벨 조합별 값을 가진 메트릭 공통 부분"""
+
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def samples(self):
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self.samples().items()):
+            lines.append(f"{self.name}{_label_text(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """누적 버킷 + 요약 백분위용 최근 표본"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS, sample_size=10000):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self.sample_size = sample_size
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {
+                    'buckets': [0] * len(self.buckets),
+                    'sum': 0.0,
+                    'count': 0,
+                    'samples': deque(maxlen=self.sample_size)
+                }
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['buckets'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+            state['samples'].append(value)
+
+    def summary(self):
+        """라벨 조합별 건수 / 합계 / p50 / p95 / 최대"""
+        result = {}
+        with self._lock:
+            items = [(key, state['count'], state['sum'], sorted(state['samples']))
+                     for key, state in self._values.items()]
+        for key, count, total, samples in items:
+            def pick(q):
+                return round(samples[min(len(samples) - 1, int(round(q * (len(samples) - 1))))], 4)
+            result[key] = {
+                'count': count,
+                'sum_seconds': round(total, 3),
+                'p50': pick(0.5) if samples else None,
+                'p95': pick(0.95) if samples else None,
+                'max': round(samples[-1], 4) if samples else None
+            }
+        return result
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(state['buckets']), state['sum'], state['count'])
+                           for key, state in self._values.items())
+        for key, buckets, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, buckets):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}")
+            labels = _label_text(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(float(total))}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """이름별 메트릭 모음"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, labelnames, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._get(Counter, name, help_text, labelnames)
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._get(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def render(self):
+        """Prometheus 텍스트 형식"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram('pipeline_stage_seconds', '파이프라인 단계 소요 시간 (초)', ('stage',))
+STAGE_TOTAL = REGISTRY.counter('pipeline_stage_total', '파이프라인 단계 실행 횟수', ('stage', 'outcome'))
+STAGE_IN_FLIGHT = REGISTRY.gauge('pipeline_stage_in_flight', '현재 실행 중인 단계 수', ('stage',))
+PROVIDER_SECONDS = REGISTRY.histogram('provider_request_seconds', '공급자 API 요청 1회 지연 (초)',
+                                      ('provider', 'model'))
+PROVIDER_TOTAL = REGISTRY.counter('provider_requests_total', '공급자 API 요청 수', ('provider', 'model', 'outcome'))
+ITEMS_TOTAL = REGISTRY.counter('pipeline_items_total', '처리한 입력 항목 수', ('pipeline', 'outcome'))
+
+_stage_hooks = []
+_started_at = datetime.now()
+
+
+def add_stage_hook(hook):
+    """
+    단계 시작/종료 훅 등록
+
+    Args:
+        hook: hook(event, name, duration, error) - event는 'start' / 'end',
+              duration과 error는 'end'일 때만 값이 있음
+    """
+    _stage_hooks.append(hook)
+
+
+def _run_hooks(event, name, duration=None, error=None):
+    for hook in list(_stage_hooks):
+        try:
+            hook(event, name, duration, error)
+        except Exception as e:
+            # 관찰 도구 오류로 파이프라인이 멈추면 안 됨
+            # (event_bus가 이 모듈을 import하므로 지연 import)
+            from event_bus import warning
+            warning(f"   ⚠️  단계 훅 오류 ({name}): {e}")
+
+
+@contextmanager
+def stage(name):
+    """
+    단계 측정 (with 문 또는 @stage('이름') 데코레이터로 사용)
+    """
+    STAGE_IN_FLIGHT.inc(stage=name)
+    _run_hooks('start', name)
+    start = time.monotonic()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        duration = time.monotonic() - start
+        STAGE_IN_FLIGHT.dec(stage=name)
+        STAGE_SECONDS.observe(duration, stage=name)
+        STAGE_TOTAL.inc(stage=name, outcome='error' if error else 'ok')
+        _run_hooks('end', name, duration, error)
+
+
+def observe_provider(provider, model, seconds, ok):
+    """공급자 요청 1회(재시도 포함 각 시도) 기록"""
+    PROVIDER_SECONDS.observe(seconds, provider=provider, model=model)
+    PROVIDER_TOTAL.inc(provider=provider, model=model, outcome='ok' if ok else 'error')
+
+
+def observe_item(pipeline, ok):
+    """입력 항목 1건 처리 결과 기록"""
+    ITEMS_TOTAL.inc(pipeline=pipeline, outcome='ok' if ok else 'error')
+
+
+def render_prometheus():
+    return REGISTRY.render()
+
+
+def load_metrics_config(config_path='config/config.json'):
+    """config.json의 metrics 섹션 (METRICS_PORT 환경 변수가 포트를 덮어씀)"""
+    settings = dict(DEFAULT_METRICS_CONFIG)
+    try:
+        settings.update(read_json(config_path).get('metrics', {}))
+    except (OSError, ValueError):
+        pass
+    if os.getenv('METRICS_PORT'):
+        settings['exporter_port'] = int(os.getenv('METRICS_PORT'))
+    return settings
+
+
+def _exporter_handler():
+    """/metrics 요청 처리 클래스 (http.server는 익스포터를 켤 때만 import, 짧은 명령의 시작 시간 절약)"""
+    from http.server import BaseHTTPRequestHandler
+
+    class ExporterHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ExporterHandler
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def start_exporter():
+    """설정된 포트(exporter_port > 0)에서 /metrics 서버 시작. 꺼져 있으면 None"""
+    global _exporter
+    settings = load_metrics_config()
+    port = settings['exporter_port']
+    if not port:
+        return None
+    with _exporter_lock:
+        if _exporter is None:
+            from http.server import ThreadingHTTPServer
+            from event_bus import progress, warning
+            try:
+                _exporter = ThreadingHTTPServer((settings['exporter_host'], port), _exporter_handler())
+            except OSError as e:
+                warning(f"⚠️  메트릭 익스포터 시작 실패 (포트 {port}): {e}")
+                return None
+            _exporter.daemon_threads = True
+            threading.Thread(target=_exporter.serve_forever, daemon=True).start()
+            progress(f"📈 메트릭 익스포터: http://{settings['exporter_host']}:{port}/metrics")
+    return _exporter
+
+
+def run_summary(pipeline):
+    """현재까지의 단계 / 공급자 / 항목 통계"""
+    stages = {}
+    errors = {key: value for key, value in STAGE_TOTAL.samples().items() if key[1] == 'error'}
+    for (name,), stats in STAGE_SECONDS.summary().items():
+        stages[name] = dict(stats, errors=errors.get((name, 'error'), 0))
+
+    providers = {}
+    outcomes = PROVIDER_TOTAL.samples()
+    for (provider, model), stats in PROVIDER_SECONDS.summary().items():
+        providers[f"{provider}/{model}"] = dict(stats, errors=outcomes.get((provider, model, 'error'), 0))
+
+    items = {f"{name}/{outcome}": count for (name, outcome), count in ITEMS_TOTAL.samples().items()}
+    finished_at = datetime.now()
+    return {
+        'pipeline': pipeline,
+        'started_at': _started_at.isoformat(timespec='seconds'),
+        'finished_at': finished_at.isoformat(timespec='seconds'),
+        'wall_seconds': round((finished_at - _started_at).total_seconds(), 3),
+        'stages': stages,
+        'providers': providers,
+        'items': items
+    }
+
+
+def write_run_summary(pipeline):
+    """output/metrics/<pipeline>_<시각>.json 저장 후 경로 반환"""
+    summary = run_summary(pipeline)
+    output_dir = Path(load_metrics_config()['summary_dir'])
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / f"{pipeline}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    write_json(path, summary, human=True)
+    return path
+
+
+def format_stage_summary():
+    """단계별 소요 시간 한 줄 요약 (합계가 큰 순서, 기록이 없으면 빈 문자열)"""
+    summary = STAGE_SECONDS.summary()
+    lines = []
+    for (name,), stats in sorted(summary.items(), key=lambda item: -item[1]['sum_seconds']):
+        lines.append(
+            f"   {name}: {stats['count']}회 / 합계 {stats['sum_seconds']:.1f}초 "
+            f"(p50 {stats['p50']:.2f}초, p95 {stats['p95']:.2f}초)"
+        )
+    return '\n'.join(lines)
@@ -4,27 +4,36 @@
 여러 언어와 버전 생성 지원
 """
 
-import os
-import json
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# 공급자 호출 계층 import
+from providers import get_api_key, gemini_generate, openai_chat, GEMINI_MODEL, OPENAI_MODEL
+from provider_router import get_router
+from metrics import stage
+from event_bus import warning, report_error, flush_events
+from run_catalog import catalog_transaction
+from output_layout import get_layout
+from serialization import read_json, write_json, loads
+from schemas import Analysis, Version
+from run_journal import record
+
 class MultilingualKeywordSelector:
     """다국어 키워드 및 버전 관리 시스템"""
     
-    def __init__(self, language='ko', ai_provider='gemini'):
+    def __init__(self, language='ko', ai_provider='gemini', hedge=False):
         self.language = language
         self.ai_provider = ai_provider.lower()
+        self.hedge = hedge
         self.load_language_config()
         self.load_keyword_database()
         
     def load_language_config(self):
         """언어 설정 로드"""
-        with open('config/languages.json', 'r', encoding='utf-8') as f:
-            self.lang_config = json.load(f)
+        self.lang_config = read_json('config/languages.json')
             
         if self.language not in self.lang_config['supported_languages']:
             print(f"⚠️  '{self.language}' 언어는 지원되지 않습니다. 한국어로 설정합니다.")
@@ -34,9 +43,9 @@ class MultilingualKeywordSelector:
         
     def load_keyword_database(self):
         """키워드 데이터베이스 로드"""
-        with open('config/keywords.json', 'r', encoding='utf-8') as f:
-            self.keyword_db = json.load(f)
+        self.keyword_db = read_json('config/keywords.json')
     
+    @stage('topic_analysis')
     def analyze_topic(self, topic, target_language=None):
         """
         다국어 주제 분석
@@ -46,7 +55,7 @@ class MultilingualKeywordSelector:
             target_language: 출력 언어 (None이면 입력 언어와 동일)
         
         Returns:
-            dict: 키워드 분석 결과
+            Analysis: 키워드 분석 결과 (응답을 해석하지 못하면 None)
         """
         if target_language:
             self.language = target_language
@@ -63,50 +72,54 @@ class MultilingualKeywordSelector:
             }
             prompt = prompts.get(self.language, prompts['ko'])
             
-            if self.ai_provider == 'openai':
-                # OpenAI GPT
-                import openai
-                
-                api_key = os.getenv('OPENAI_API_KEY')
-                if not api_key:
-                    print(f"⚠️  OpenAI API 키가 없습니다. 기본 {self.current_lang['name']} 키워드를 사용합니다.")
+            handlers = self._provider_handlers(prompt)
+            
+            if self.ai_provider == 'auto':
+                # 지연/오류율 기준으로 가장 빠른 공급자 선택
+                if not handlers:
+                    warning(f"⚠️  AI API 키가 없습니다. 기본 {self.current_lang['name']} 키워드를 사용합니다.")
                     return self._generate_default_keywords(topic)
                 
-                openai.api_key = api_key
+                result_text = get_router().call(handlers, hedge=self.hedge)
                 
-                response = openai.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[
-                        {"role": "system", "content": "You are an expert in short-form shopping channel keyword optimization earning $20K+/month."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=2000
-                )
+            elif self.ai_provider == 'openai':
+                # OpenAI GPT
+                if 'openai' not in handlers:
+                    warning(f"⚠️  OpenAI API 키가 없습니다. 기본 {self.current_lang['name']} 키워드를 사용합니다.")
+                    return self._generate_default_keywords(topic)
                 
-                result_text = response.choices[0].message.content
+                result_text = handlers['openai'][1]()
                 
             else:
                 # Gemini AI (기본)
-                import google.generativeai as genai
-                
-                api_key = os.getenv('GEMINI_API_KEY')
-                if not api_key:
-                    print(f"⚠️  Gemini API 키가 없습니다. 기본 {self.current_lang['name']} 키워드를 사용합니다.")
+                if 'gemini' not in handlers:
+                    warning(f"⚠️  Gemini API 키가 없습니다. 기본 {self.current_lang['name']} 키워드를 사용합니다.")
                     return self._generate_default_keywords(topic)
                 
-                genai.configure(api_key=api_key)
-                model = genai.GenerativeModel('gemini-1.5-flash')
-                
-                response = model.generate_content(prompt)
-                result_text = response.text
+                result_text = handlers['gemini'][1]()
             
             return self._parse_ai_response(result_text)
             
         except Exception as e:
-            print(f"❌ AI 분석 오류: {e}")
+            report_error(f"❌ AI 분석 오류: {e}")
             return self._generate_default_keywords(topic)
     
+    def _provider_handlers(self, prompt):
+        """API 키가 있는 공급자별 호출 함수 {provider: (model, fn)}"""
+        handlers = {}
+        if get_api_key('OPENAI_API_KEY'):
+            handlers['openai'] = (OPENAI_MODEL, lambda: openai_chat(
+                [
+                    {"role": "system", "content": "You are an expert in short-form shopping channel keyword optimization earning $20K+/month."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.7,
+                max_tokens=2000
+            ))
+        if get_api_key('GEMINI_API_KEY'):
+            handlers['gemini'] = (GEMINI_MODEL, lambda: gemini_generate(prompt))
+        return handlers
+    
     def _get_korean_prompt(self, topic):
         """한국어 프롬프트"""
         return f"""당신은 월 1000만원 수익을 달성한 애드센스/블로그 전문 컨설턴트입니다.
@@ -261,7 +274,7 @@ JSON形式で以下を出力してください：
             import re
             json_match = re.search(r'\{[\s\S]*\}', response_text)
             if json_match:
-                return json.loads(json_match.group())
+                return Analysis.from_dict(loads(json_match.group()))
             return None
         except:
             return None
@@ -306,7 +319,7 @@ JSON形式で以下を出力してください：
             }
         ]
         
-        return {
+        return Analysis.from_dict({
             "main_keyword": topic,
             "keywords": keywords,
             "titles": titles,
@@ -315,7 +328,7 @@ JSON形式で以下を出力してください：
                 "body": "Core information",
                 "conclusion": "Call to action"
             }
-        }
+        })
     
     def generate_versions(self, topic, selected_keywords, selected_title, num_versions=3):
         """
@@ -328,7 +341,7 @@ JSON形式で以下を出力してください：
             num_versions: 생성할 버전 수
         
         Returns:
-            list: 생성된 버전들
+            list: 생성된 버전들 (Version)
         """
         versions = []
         version_templates = self.lang_config['version_templates']
@@ -342,19 +355,17 @@ JSON形式で以下を出力してください：
                     style, tone
                 )
                 
-                version = {
-                    "version_id": version_id,
-                    "language": self.language,
-                    "style": style['name'],
-                    "tone": tone['name'],
-                    "title": f"{selected_title} [{style['name']}]",
-                    "script": script,
-                    "duration": style['duration_range'][1],
-                    "voice_id": self.current_lang['voices'][0],
-                    "created_at": datetime.now().isoformat()
-                }
-                
-                versions.append(version)
+                versions.append(Version(
+                    version_id=version_id,
+                    language=self.language,
+                    style=style['name'],
+                    tone=tone['name'],
+                    title=f"{selected_title} [{style['name']}]",
+                    script=script,
+                    duration=style['duration_range'][1],
+                    voice_id=self.current_lang['voices'][0],
+                    created_at=datetime.now().isoformat()
+                ))
                 
         return versions
     
@@ -504,20 +515,24 @@ JSON形式で以下を出力してください：
             else:
                 return f"{intro} วันนี้เรามาดู{topic}อย่างละเอียด {keywords[0]}เป็นประเด็นที่สำคัญที่สุด {transition}ดู{keywords[1]}ด้วย {emphasis}ผ่าน{keywords[2]}จะได้ข้อมูลเพิ่มเติม {conclusion}"
     
-    def save_versions(self, versions):
-        """버전들을 파일로 저장"""
-        output_dir = Path('input/scripts/versions')
-        output_dir.mkdir(parents=True, exist_ok=True)
-        
+    def save_versions(self, versions, topic=None, keywords=None):
+        """버전들을 파일로 저장 (topic / keywords는 카탈로그 검색용)"""
+        layout = get_layout()
         saved_files = []
-        for version in versions:
-            filename = f"{version['language']}_{version['version_id']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            filepath = output_dir / filename
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(version, f, ensure_ascii=False, indent=2)
-            
-            saved_files.append(str(filepath))
+        # 버전 전체를 한 트랜잭션으로 카탈로그에 기록
+        with catalog_transaction() as catalog:
+            for version in versions:
+                filename = f"{version.language}_{version.version_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                filepath = layout.path_for('versions', filename, version_id=version.version_id,
+                                           language=version.language)
+                
+                write_json(filepath, version, human=True)
+                catalog.add('versions', filepath, version, topic=topic, keywords=keywords)
+                record('version', 'draft', pipeline='multilingual', language=version.language,
+                       version_id=version.version_id, topic=topic, path=str(filepath))
+                
+                saved_files.append(str(filepath))
+        for filepath in saved_files:
             print(f"✅ 저장됨: {filepath}")
         
         return saved_files
@@ -531,6 +546,7 @@ JSON形式で以下を出力してください：
         # 1. 주제 분석
         print(f"\n📊 주제 분석 중: {topic}")
         analysis = self.analyze_topic(topic)
+        flush_events()
         
         if not analysis:
             print("❌ 분석 실패")
@@ -538,17 +554,17 @@ JSON形式で以下を出力してください：
         
         # 2. 키워드 표시
         print(f"\n🎯 핵심 공략 키워드")
-        print(f"메인: {analysis['main_keyword']}\n")
+        print(f"메인: {analysis.main_keyword}\n")
         
         print("💸 돈 되는 세부 키워드 리스트")
-        for i, kw in enumerate(analysis['keywords'], 1):
-            print(f"[{i}] {kw['text']} ({kw['type']} | CPC: {kw['cpc']})")
+        for i, kw in enumerate(analysis.keywords, 1):
+            print(f"[{i}] {kw.text} ({kw.type} | CPC: {kw.cpc})")
         
         # 3. 제목 표시
         print(f"\n✍️ 클릭을 부르는 제목 추천")
-        for i, title in enumerate(analysis['titles'], 1):
-            star = "⭐" if title['ctr_score'] >= 88 else ""
-            print(f"[{i}] {title['text']} (CTR: {title['ctr_score']}) {star}")
+        for i, title in enumerate(analysis.titles, 1):
+            star = "⭐" if title.ctr_score >= 88 else ""
+            print(f"[{i}] {title.text} (CTR: {title.ctr_score}) {star}")
         
         # 4. 사용자 선택
         print("\n" + "="*60)
@@ -559,8 +575,8 @@ JSON形式で以下を出力してください：
             keyword_indices = [int(x.strip())-1 for x in keyword_input.split(',')]
             title_index = int(title_input) - 1
             
-            selected_keywords = [analysis['keywords'][i]['text'] for i in keyword_indices]
-            selected_title = analysis['titles'][title_index]['text']
+            selected_keywords = analysis.keyword_texts(keyword_indices)
+            selected_title = analysis.titles[title_index].text
             
             print(f"\n✅ 선택 완료!")
             print(f"   키워드: {', '.join(selected_keywords)}")
@@ -571,11 +587,11 @@ JSON形式で以下を出力してください：
             versions = self.generate_versions(topic, selected_keywords, selected_title)
             
             # 6. 저장
-            saved_files = self.save_versions(versions)
+            saved_files = self.save_versions(versions, topic, selected_keywords)
             
             print(f"\n✅ 총 {len(versions)}개 버전 생성 완료!")
             for version in versions:
-                print(f"   - {version['version_id']}: {version['style']} / {version['tone']}")
+                print(f"   - {version.version_id}: {version.style} / {version.tone}")
             
             return {
                 'versions': versions,
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+출력 폴더 배치 (선택적 해시 샤딩 + 매니페스트)
+output/videos / output/thumbnails / output/optimized / input/scripts/versions의 파일 경로는
+모두 여기서 계산. sharded가 켜져 있으면 이미지 이름(stem) 해시 앞자리로 하위 폴더를 나눠서
+(output/videos/3f/demo_v1_HD.mp4) 폴더 하나에 파일 수만 개가 쌓이지 않게 함.
+같은 이미지의 파일(버전별 비디오, 설명란, 썸네일)은 같은 샤드에 모임
+
+매니페스트(SQLite)는 논리 이름(영역, 파일 이름, stem, version_id, 언어) → 실제 경로를 기록해서
+배치를 바꾼 뒤에도 예전 경로나 이름으로 찾을 수 있음. 기록은 샤딩이 켜져 있을 때만,
+실제로 파일이 쓰인 경로만 모아서 한 트랜잭션으로 저장 (flush: 일정 개수마다 / 조회 전 / 종료 시)
+
+    layout = get_layout()
+    path = layout.path_for('videos', f"{stem}_v1_HD.mp4", stem=stem, version_id='v1', language='ko')
+    layout.find('videos', stem='demo')          # demo 이미지의 비디오 경로들
+    for path in layout.iter_files('optimized', suffix='_metadata.json'): ...
+
+    python output_layout.py migrate             # 기존 평면 폴더 파일을 현재 배치로 이동
+    python output_layout.py find --stem demo
+    python output_layout.py stats
+"""
+
+import os
+import sys
+import json
+import atexit
+import time
+import hashlib
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+
+from serialization import read_json
+
+DEFAULT_LAYOUT_CONFIG = {
+    'sharded': False,
+    # 샤드 단계 수 / 단계당 16진수 글자 수 (1 / 2 → 256개 폴더)
+    'shard_levels': 1,
+    'shard_width': 2,
+    'manifest': 'output/.state/layout.db'
+}
+
+AREAS = {
+    'videos': 'output/videos',
+    'thumbnails': 'output/thumbnails',
+    'optimized': 'output/optimized',
+    'versions': 'input/scripts/versions'
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    area TEXT NOT NULL,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    stem TEXT,
+    version_id TEXT,
+    language TEXT,
+    created REAL NOT NULL,
+    -- written / uploaded / archived (retention.py가 보존 정책에 사용)
+    state TEXT NOT NULL DEFAULT 'written',
+    archive TEXT,
+    PRIMARY KEY (area, name)
+);
+CREATE INDEX IF NOT EXISTS idx_entries_stem ON entries (stem, area);
+CREATE INDEX IF NOT EXISTS idx_entries_path ON entries (path);
+"""
+
+
+def load_layout_config(config_path='config/config.json'):
+    """config.json의 output_layout 섹션 로드 (없으면 기본값)"""
+    settings = dict(DEFAULT_LAYOUT_CONFIG)
+    try:
+        settings.update(read_json(config_path).get('output_layout', {}))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+class OutputLayout:
+    """영역별 경로 계산 + 매니페스트"""
+
+    # 쓰기 대기 중인 매니페스트 기록이 이만큼 쌓이면 flush
+    MANIFEST_BATCH = 100
+
+    def __init__(self, sharded=False, shard_levels=1, shard_width=2, manifest=None, areas=None):
+        self.sharded = sharded
+        self.shard_levels = shard_levels
+        self.shard_width = shard_width
+        self.areas = dict(areas or AREAS)
+        self.manifest = Path(manifest) if manifest else None
+        self._local = threading.local()
+        self._created_dirs = set()
+        # 경로만 계산하고 아직 기록하지 않은 항목 {경로: 매니페스트 행}
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        if self.manifest:
+            self.manifest.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._conn()
+            conn.executescript(SCHEMA)
+            # 상태 컬럼 이전에 만든 매니페스트
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+            if 'state' not in columns:
+                conn.execute("ALTER TABLE entries ADD COLUMN state TEXT NOT NULL DEFAULT 'written'")
+                conn.execute("ALTER TABLE entries ADD COLUMN archive TEXT")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.manifest), timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    # 경로 계산 ---------------------------------------------------------------
+
+    def shard_of(self, key):
+        """'demo' → '3f' (shard_levels가 2면 '3f/a0')"""
+        digest = hashlib.blake2b(str(key).encode('utf-8'), digest_size=8).hexdigest()
+        width = self.shard_width
+        return '/'.join(digest[i * width:(i + 1) * width] for i in range(self.shard_levels))
+
+    def directory_for(self, area, stem):
+        base = Path(self.areas[area])
+        return base / self.shard_of(stem) if self.sharded else base
+
+    def path_for(self, area, name, stem=None, version_id=None, language=None):
+        """
+        새로 쓸 파일의 경로 (폴더 생성, 샤딩 중이면 매니페스트 기록 예약)
+
+        기록은 flush 때 파일이 실제로 있는 경로만 저장 (쓰기에 실패한 경로는 남기지 않음)
+
+        Args:
+            area: videos / thumbnails / optimized / versions
+            name: 파일 이름
+            stem: 샤드 기준 이름 (보통 이미지 stem, 없으면 파일 이름)
+        """
+        directory = self.directory_for(area, stem or name)
+        if directory not in self._created_dirs:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._created_dirs.add(directory)
+        path = directory / name
+        # 평면 배치는 폴더만 보면 찾을 수 있으므로 매니페스트 기록 생략
+        if self.manifest and self.sharded:
+            with self._pending_lock:
+                self._pending[str(path)] = (area, name, str(path), stem, version_id, language, time.time())
+                full = len(self._pending) >= self.MANIFEST_BATCH
+            if full:
+                self.flush()
+        return path
+
+    def flush(self, final=False):
+        """
+        예약된 매니페스트 기록 중 파일이 쓰인 것만 한 트랜잭션으로 저장
+
+        아직 없는 경로는 다음 flush까지 남겨 둠 (final이면 버림: 쓰기에 실패한 경로)
+        """
+        with self._pending_lock:
+            if not self._pending:
+                return
+            written = [row for path, row in self._pending.items() if os.path.exists(path)]
+            if final:
+                self._pending.clear()
+            else:
+                for row in written:
+                    del self._pending[row[2]]
+        if not written:
+            return
+        conn = self._conn()
+        with conn:
+            conn.execute('BEGIN')
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (area, name, path, stem, version_id, language, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", written)
+
+    # 찾기 -----------------------------------------------------------------
+
+    def lookup(self, area, name, stem=None):
+        """
+        파일 이름으로 실제 경로 찾기 (매니페스트 → 현재 배치 → 평면 폴더 순)
+
+        Returns:
+            Path 또는 None
+        """
+        if self.manifest:
+            self.flush()
+            row = self._conn().execute("SELECT path FROM entries WHERE area = ? AND name = ?", (area, name)).fetchone()
+            if row and os.path.exists(row[0]):
+                return Path(row[0])
+        for directory in (self.directory_for(area, stem or name), Path(self.areas[area])):
+            if (directory / name).exists():
+                return directory / name
+        return None
+
+    def resolve(self, path):
+        """
+        결과 JSON 등에 적힌 예전 경로 → 지금 경로 (migrate로 옮겨졌으면 새 위치, 못 찾으면 None)
+        """
+        if not path:
+            return None
+        if os.path.exists(path):
+            return Path(path)
+        area = self.area_of(path)
+        return self.lookup(area, Path(path).name) if area else None
+
+    def find(self, area=None, stem=None, version_id=None, language=None):
+        """논리 이름으로 경로 목록 (매니페스트 필요)"""
+        if not self.manifest:
+            return []
+        self.flush()
+        clauses, params = [], []
+        for column, value in (('area', area), ('stem', stem), ('version_id', version_id), ('language', language)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        return [Path(row[0]) for row in self._conn().execute(
+            f"SELECT path FROM entries {where} ORDER BY created", params)]
+
+    def iter_files(self, area, prefix='', suffix=''):
+        """영역의 모든 파일 (평면 / 샤드 폴더 모두, 숨김 파일 제외)"""
+        stack = [self.areas[area]]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except FileNotFoundError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir():
+                        stack.append(entry.path)
+                    elif entry.name.startswith(prefix) and entry.name.endswith(suffix):
+                        yield Path(entry.path)
+
+    # 상태 (retention.py) -------------------------------------------------------
+
+    def area_of(self, path):
+        """경로가 속한 영역 이름 (영역 밖이면 None)"""
+        path = Path(path)
+        for area, base in self.areas.items():
+            if Path(base) in path.parents:
+                return area
+        return None
+
+    def mark_uploaded(self, *paths):
+        """업로드 완료 → 보존 정책에서 삭제 가능"""
+        if not self.manifest:
+            return
+        self.flush()
+        for path in paths:
+            area = self.area_of(path) if path else None
+            if area:
+                self._conn().execute("UPDATE entries SET state = 'uploaded' WHERE area = ? AND name = ?",
+                                     (area, Path(path).name))
+
+    def mark_archived(self, path, archive):
+        """압축 보관 후 원본 삭제 (archive: "<zip 경로>!<zip 안 이름>")"""
+        if self.manifest:
+            self._conn().execute("UPDATE entries SET state = 'archived', archive = ? WHERE area = ? AND name = ?",
+                                 (str(archive), self.area_of(path), Path(path).name))
+
+    def forget(self, path):
+        """삭제된 파일의 매니페스트 기록 제거"""
+        if self.manifest:
+            self._conn().execute("DELETE FROM entries WHERE area = ? AND name = ?",
+                                 (self.area_of(path), Path(path).name))
+
+    def states(self, area):
+        """{파일 이름: (state, archive)} (매니페스트에 없는 파일은 written으로 봄)"""
+        if not self.manifest:
+            return {}
+        self.flush()
+        return {name: (state, archive) for name, state, archive in self._conn().execute(
+            "SELECT name, state, archive FROM entries WHERE area = ?", (area,))}
+
+    # 배치 변경 ---------------------------------------------------------------
+
+    def migrate(self):
+        """
+        기존 파일을 현재 배치(sharded 설정)로 이동하고 매니페스트 / 실행 카탈로그 경로 갱신
+
+        샤드 기준 이름은 매니페스트 기록이 있으면 그 stem, 없으면 파일 이름 앞부분(첫 '_' 앞)
+
+        Returns:
+            dict: 영역별 옮긴 파일 수
+        """
+        from run_catalog import get_catalog
+        catalog = get_catalog()
+        if self.manifest:
+            self.flush()
+        moved = {}
+        for area in self.areas:
+            count = 0
+            for path in list(self.iter_files(area)):
+                stem = None
+                if self.manifest:
+                    row = self._conn().execute("SELECT stem FROM entries WHERE area = ? AND name = ?",
+                                               (area, path.name)).fetchone()
+                    stem = row[0] if row else None
+                stem = stem or path.name.split('_')[0]
+                target = self.directory_for(area, stem) / path.name
+                if target == path:
+                    continue
+                if target.exists():
+                    print(f"⚠️  {target}가 이미 있어서 {path}는 그대로 둡니다.")
+                    continue
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.rename(path, target)
+                if self.manifest:
+                    # 기존 기록의 version_id / 언어는 유지
+                    updated = self._conn().execute("UPDATE entries SET path = ?, stem = ? WHERE area = ? AND name = ?",
+                                                   (str(target), stem, area, path.name)).rowcount
+                    if not updated:
+                        self._conn().execute(
+                            "INSERT INTO entries (area, name, path, stem, created) VALUES (?, ?, ?, ?, ?)",
+                            (area, path.name, str(target), stem, time.time()))
+                if catalog is not None:
+                    catalog.move_path(str(path), str(target))
+                count += 1
+            # 비워진 샤드 폴더 정리
+            for directory, _, _ in sorted(os.walk(self.areas[area]), reverse=True):
+                if directory != self.areas[area]:
+                    try:
+                        os.rmdir(directory)
+                    except OSError:
+                        pass
+            moved[area] = count
+        return moved
+
+    def stats(self):
+        """영역별 파일 수 / 폴더 수 / 폴더당 최대 파일 수"""
+        result = {}
+        for area, base in self.areas.items():
+            per_directory = {}
+            for path in self.iter_files(area):
+                per_directory[str(path.parent)] = per_directory.get(str(path.parent), 0) + 1
+            result[area] = {'files': sum(per_directory.values()), 'directories': len(per_directory),
+                            'max_per_directory': max(per_directory.values(), default=0)}
+        if self.manifest:
+            self.flush()
+            result['manifest_entries'] = self._conn().execute("SELECT count(*) FROM entries").fetchone()[0]
+        return result
+
+
+_layout = None
+_layout_lock = threading.Lock()
+
+
+def get_layout():
+    """공용 배치 (config.json의 output_layout 섹션)"""
+    global _layout
+    with _layout_lock:
+        if _layout is None:
+            settings = load_layout_config()
+            _layout = OutputLayout(settings['sharded'], settings['shard_levels'], settings['shard_width'],
+                                   settings['manifest'])
+            # 실행 중에 쓰인 파일의 남은 기록 저장
+            atexit.register(_layout.flush, final=True)
+        return _layout
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='출력 폴더 배치 / 매니페스트')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('migrate', help='기존 파일을 현재 배치(config의 sharded)로 이동')
+    sub.add_parser('stats', help='영역별 파일 / 폴더 수')
+    find = sub.add_parser('find', help='논리 이름으로 경로 찾기')
+    find.add_argument('--area', choices=list(AREAS))
+    find.add_argument('--stem')
+    find.add_argument('--version-id')
+    find.add_argument('--language')
+    args = parser.parse_args(argv)
+
+    layout = get_layout()
+    if args.command == 'migrate':
+        start = time.perf_counter()
+        moved = layout.migrate()
+        print(f"📦 {sum(moved.values())}개 파일 이동 ({'샤드' if layout.sharded else '평면'} 배치, "
+              f"{time.perf_counter() - start:.1f}초): " + ', '.join(f"{area} {count}" for area, count in moved.items()))
+        if moved.get('optimized'):
+            # 분석 내보내기 상태는 경로 기준이라 옮긴 메타데이터를 새 파일로 봄
+            print("   💡 python analytics_export.py export --full로 다시 내보내야 중복 행이 생기지 않습니다.")
+    elif args.command == 'stats':
+        print(json.dumps(layout.stats(), ensure_ascii=False, indent=2))
+    else:
+        for path in layout.find(args.area, args.stem, args.version_id, args.language):
+            print(path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+파이프라인 단계별 프로파일링 (--profile)
+- sample (기본): 저부하 샘플링 프로파일러. 단계 안에 있는 스레드의 호출 스택을 주기적으로 수집해서
+  '단계;함수;함수 횟수' 형식(folded stacks)으로 저장 → flamegraph.pl / speedscope / Perfetto에서 바로 열림
+- cprofile: 짧은 실행용 결정적 프로파일러. Python 3.12부터는 프로세스당 하나만 켤 수 있어서
+  실행 전체를 한 번에 측정 (.prof → snakeviz / pstats)
+- 두 모드 모두 tracemalloc으로 단계가 끝날 때마다 스냅샷을 떠서 단계별 할당 증가 위치와
+  실행 전체 상위 할당 위치를 기록
+
+결과는 output/profiles/<pipeline>_<시각>.* 에 저장
+
+    python auto_video_creator.py --lang ko --profile
+    python shorts_creator.py --product AirPods --profile cprofile
+    python main.py --profile
+"""
+
+import os
+import sys
+import time
+import atexit
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from metrics import add_stage_hook
+from serialization import read_json, write_json
+
+PROFILE_MODES = ('sample', 'cprofile')
+
+DEFAULT_PROFILING_CONFIG = {
+    'dir': 'output/profiles',
+    'sample_interval': 0.01,
+    'max_depth': 64,
+    'tracemalloc_frames': 1,
+    'snapshot_interval': 2.0,
+    'top_allocations': 25
+}
+
+NO_STAGE = '(단계 밖)'
+
+
+def load_profiling_config(config_path='config/config.json'):
+    """config.json의 profiling 섹션 로드 (없으면 기본값)"""
+    settings = dict(DEFAULT_PROFILING_CONFIG)
+    try:
+        settings.update(read_json(config_path).get('profiling', {}))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+def add_profile_argument(parser):
+    """argparse CLI에 --profile [sample|cprofile] 추가"""
+    parser.add_argument('--profile', nargs='?', const='sample', choices=PROFILE_MODES,
+                        help='단계별 프로파일링 (sample=샘플링+flamegraph [기본], cprofile=짧은 실행용) '
+                             '+ 할당 추적, 결과는 output/profiles/')
+
+
+def pop_profile_arg(argv):
+    """
+    argparse를 쓰지 않는 CLI용: argv에서 --profile [모드]를 빼고 모드 반환 (없으면 None)
+    """
+    if '--profile' not in argv:
+        return None
+    index = argv.index('--profile')
+    argv.pop(index)
+    if index < len(argv) and argv[index] in PROFILE_MODES:
+        return argv.pop(index)
+    return 'sample'
+
+
+def _frame_label(code, root):
+    """folded stack 프레임 이름: 함수 (저장소 기준 경로:줄)"""
+    filename = code.co_filename
+    if filename.startswith(root):
+        filename = filename[len(root):].lstrip(os.sep)
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StageProfiler:
+    """단계 훅으로 스레드별 현재 단계를 추적하면서 샘플링 / cProfile / tracemalloc 수행"""
+
+    def __init__(self, pipeline, mode='sample', settings=None):
+        self.pipeline = pipeline
+        self.mode = mode
+        self.settings = settings or load_profiling_config()
+        self.root = os.path.dirname(os.path.abspath(__file__))
+        self.stacks = Counter()
+        self.stage_samples = Counter()
+        self.stage_allocations = {}
+        self.stage_memory = {}
+        self.samples = 0
+        self.sampler_seconds = 0.0
+        self._thread_stages = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+        self._cprofile = None
+        self._baseline = None
+        self._last_snapshot = None
+        self._last_snapshot_at = 0.0
+        self._started_at = None
+        self._stopped = False
+
+    # 단계 추적 ------------------------------------------------------------
+
+    def stage_hook(self, event, name, duration, error):
+        if self._stopped:
+            return
+        ident = threading.get_ident()
+        with self._lock:
+            stack = self._thread_stages.setdefault(ident, [])
+            if event == 'start':
+                stack.append(name)
+                return
+            path = '/'.join(stack) or name
+            if stack and stack[-1] == name:
+                stack.pop()
+            if not stack:
+                self._thread_stages.pop(ident, None)
+        self._snapshot_after(path, duration)
+
+    def _stage_of(self, ident):
+        stack = self._thread_stages.get(ident)
+        return '/'.join(stack) if stack else None
+
+    # 샘플링 ---------------------------------------------------------------
+
+    def _sample_loop(self):
+        interval = self.settings['sample_interval']
+        max_depth = self.settings['max_depth']
+        own = threading.get_ident()
+        main = threading.main_thread().ident
+        while not self._stop.wait(interval):
+            start = time.perf_counter()
+            frames = sys._current_frames()
+            with self._lock:
+                stages = {ident: self._stage_of(ident) for ident in frames}
+            for ident, frame in frames.items():
+                stage_name = stages.get(ident)
+                # 단계 안의 스레드 + 메인 스레드만 (대기 중인 풀 스레드는 제외)
+                if ident == own or (stage_name is None and ident != main):
+                    continue
+                labels = []
+                while frame is not None and len(labels) < max_depth:
+                    labels.append(_frame_label(frame.f_code, self.root))
+                    frame = frame.f_back
+                labels.append(stage_name or NO_STAGE)
+                self.stacks[';'.join(reversed(labels))] += 1
+                self.stage_samples[stage_name or NO_STAGE] += 1
+            self.samples += 1
+            self.sampler_seconds += time.perf_counter() - start
+
+    # 할당 추적 ------------------------------------------------------------
+
+    def _snapshot_after(self, stage_path, duration):
+        """단계 종료 시 스냅샷 (snapshot_interval마다 최대 1회), 직전 스냅샷 대비 증가분을 이 단계에 배정"""
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            memory = self.stage_memory.setdefault(stage_path, {'count': 0, 'max_traced_bytes': 0})
+            memory['count'] += 1
+            memory['max_traced_bytes'] = max(memory['max_traced_bytes'], current)
+            now = time.monotonic()
+            if now - self._last_snapshot_at < self.settings['snapshot_interval']:
+                return
+            self._last_snapshot_at = now
+        snapshot = tracemalloc.take_snapshot()
+        with self._lock:
+            previous, self._last_snapshot = self._last_snapshot, snapshot
+            if previous is None:
+                return
+            sites = self.stage_allocations.setdefault(stage_path, Counter())
+            for stat in snapshot.compare_to(previous, 'lineno')[:self.settings['top_allocations']]:
+                if stat.size_diff > 0:
+                    sites[str(stat.traceback[0])] += stat.size_diff
+
+    # 시작 / 종료 ---------------------------------------------------------
+
+    def start(self):
+        self._started_at = datetime.now()
+        tracemalloc.start(self.settings['tracemalloc_frames'])
+        self._baseline = self._last_snapshot = tracemalloc.take_snapshot()
+        self._last_snapshot_at = time.monotonic()
+        add_stage_hook(self.stage_hook)
+        if self.mode == 'cprofile':
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        else:
+            self._sampler = threading.Thread(target=self._sample_loop, name='profiler', daemon=True)
+            self._sampler.start()
+        print(f"🔬 프로파일링 시작 ({self.mode}, tracemalloc)")
+        return self
+
+    def stop(self):
+        """측정 종료 후 결과 파일 저장, 저장한 경로 목록 반환"""
+        if self._stopped:
+            return []
+        self._stopped = True
+        if self._cprofile:
+            self._cprofile.disable()
+        if self._sampler:
+            self._stop.set()
+            self._sampler.join()
+        final = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        output_dir = Path(self.settings['dir'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        base = output_dir / f"{self.pipeline}_{self._started_at.strftime('%Y%m%d_%H%M%S')}"
+        written = []
+
+        if self._cprofile:
+            import io
+            import pstats
+            self._cprofile.dump_stats(f"{base}.prof")
+            report = io.StringIO()
+            pstats.Stats(self._cprofile, stream=report).sort_stats('cumulative').print_stats(40)
+            with open(f"{base}_cprofile.txt", 'w', encoding='utf-8') as f:
+                f.write(report.getvalue())
+            written += [Path(f"{base}.prof"), Path(f"{base}_cprofile.txt")]
+        else:
+            with open(f"{base}.folded", 'w', encoding='utf-8') as f:
+                for stack, count in sorted(self.stacks.items()):
+                    f.write(f"{stack} {count}\n")
+            written.append(Path(f"{base}.folded"))
+
+        top = self.settings['top_allocations']
+        overall = [stat for stat in final.compare_to(self._baseline, 'lineno') if stat.size_diff > 0][:top]
+        with open(f"{base}_alloc.txt", 'w', encoding='utf-8') as f:
+            f.write(f"# 실행 전체 상위 할당 위치 (시작 대비 증가, tracemalloc 최대 {peak / 1024 / 1024:.1f}MB)\n")
+            for stat in overall:
+                f.write(f"{stat.size_diff / 1024:10.1f} KB  {stat.count_diff:+7d}개  {stat.traceback[0]}\n")
+            for stage_path, sites in sorted(self.stage_allocations.items()):
+                f.write(f"\n# {stage_path} (단계 종료 스냅샷 간 증가, 동시 실행 중이면 근사치)\n")
+                for site, size in sites.most_common(top):
+                    f.write(f"{size / 1024:10.1f} KB  {site}\n")
+        written.append(Path(f"{base}_alloc.txt"))
+
+        summary = {
+            'pipeline': self.pipeline,
+            'mode': self.mode,
+            'started_at': self._started_at.isoformat(timespec='seconds'),
+            'wall_seconds': round((datetime.now() - self._started_at).total_seconds(), 3),
+            'sample_interval': self.settings['sample_interval'],
+            'samples': self.samples,
+            # 샘플러 자체가 쓴 시간 (오버헤드 확인용)
+            'sampler_seconds': round(self.sampler_seconds, 3),
+            'stage_samples': dict(self.stage_samples.most_common()),
+            'stage_memory': self.stage_memory,
+            'tracemalloc_peak_bytes': peak,
+            'top_allocations': [{'site': str(stat.traceback[0]), 'size_diff': stat.size_diff,
+                                 'count_diff': stat.count_diff} for stat in overall]
+        }
+        write_json(f"{base}.json", summary, human=True)
+        written.append(Path(f"{base}.json"))
+
+        print(f"\n🔬 프로파일 저장 ({self.mode}):")
+        for path in written:
+            print(f"   {path}")
+        return written
+
+
+_profiler = None
+
+
+def start_profiling(pipeline, mode):
+    """
+    mode가 있으면 프로파일링 시작 (종료 시 자동 저장)
+
+    Args:
+        pipeline: 결과 파일 이름 앞부분 ('main' / 'auto' / 'shorts')
+        mode: 'sample' / 'cprofile' / None (None이면 아무것도 안 함)
+    """
+    global _profiler
+    if not mode or _profiler is not None:
+        return _profiler
+    _profiler = StageProfiler(pipeline, mode).start()
+    atexit.register(stop_profiling)
+    return _profiler
+
+
+def stop_profiling():
+    """프로파일링 종료 + 저장 (켜져 있지 않으면 무시)"""
+    if _profiler is not None:
+        return _profiler.stop()
+    return []
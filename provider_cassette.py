@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+공급자 호출 녹화 / 재생 (카세트)
+PROVIDER_MODE=record 로 실행하면 Gemini / OpenAI / D-ID 요청·응답을 요청 해시별 파일로 저장하고
+PROVIDER_MODE=replay 로 실행하면 API 호출 없이 저장된 응답을 그대로 돌려줌 (녹화 당시 지연 재현 가능)
+실제 응답 형태로 파이프라인 전체를 몇 초 만에 반복 실행하고 성능 회귀를 측정하는 용도
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+from pathlib import Path
+
+from event_bus import progress, warning
+from serialization import read_json, write_json
+
+DEFAULT_CASSETTE_CONFIG = {
+    'dir': 'output/cassettes',
+    'latency_scale': 1.0
+}
+
+# 녹화 당시 있던 키만 재생 시 자리표시 값으로 채움 (시뮬레이션 분기 대신 실제 분기 실행)
+API_KEY_ENV = ('GEMINI_API_KEY', 'OPENAI_API_KEY', 'DID_API_KEY')
+REPLAY_KEY_PLACEHOLDER = 'cassette-replay'
+
+
+class CassetteMiss(KeyError):
+    """재생 모드에서 녹화되지 않은 요청"""
+
+    def __init__(self, provider, key):
+        super().__init__(f"{provider} 요청 {key[:12]}이(가) 카세트에 없습니다 (PROVIDER_MODE=record로 다시 녹화)")
+        self.provider = provider
+        self.key = key
+
+
+def canonical(value):
+    """요청을 해시 가능한 JSON 값으로 정규화 (이미지는 픽셀 해시로 대체)"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): canonical(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [canonical(v) for v in value]
+    if isinstance(value, bytes):
+        return {'bytes_sha256': hashlib.sha256(value).hexdigest()}
+    if hasattr(value, 'tobytes'):
+        # PIL 이미지
+        return {'image_sha256': hashlib.sha256(value.tobytes()).hexdigest()}
+    return repr(value)
+
+
+def response_to_dict(response):
+    """requests.Response → 카세트 저장용 dict"""
+    return {
+        'status_code': response.status_code,
+        'headers': {'Content-Type': response.headers.get('Content-Type', 'application/json')},
+        'url': response.url,
+        'body': response.text
+    }
+
+
+def response_from_dict(data):
+    """카세트 dict → requests.Response"""
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    response = requests.Response()
+    response.status_code = data['status_code']
+    response.headers = CaseInsensitiveDict(data.get('headers', {}))
+    response.url = data.get('url', '')
+    response.encoding = 'utf-8'
+    response._content = data['body'].encode('utf-8')
+    return response
+
+
+def bytes_to_dict(content):
+    return {'base64': base64.b64encode(content).decode()}
+
+
+def bytes_from_dict(data):
+    return base64.b64decode(data['base64'])
+
+
+class Cassette:
+    """
+    요청 해시별 응답 녹화/재생
+
+    같은 요청이 여러 번 오면 (예: D-ID 상태 폴링) 응답을 순서대로 쌓고
+    재생할 때도 같은 순서로 돌려줌 (마지막 응답은 이후 계속 반복)
+    """
+
+    def __init__(self, mode='live', directory='output/cassettes/default', latency_scale=1.0):
+        self.mode = mode
+        self.directory = Path(directory)
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._positions = {}
+        self._recorded = set()
+
+    def key(self, provider, request):
+        payload = json.dumps([provider, canonical(request)], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, provider, key):
+        return self.directory / provider / f"{key[:24]}.json"
+
+    def _load(self, provider, key):
+        if key not in self._entries:
+            path = self._path(provider, key)
+            if not path.exists():
+                raise CassetteMiss(provider, key)
+            self._entries[key] = read_json(path)
+        return self._entries[key]
+
+    def play(self, provider, request):
+        """녹화된 응답 반환 (latency_scale > 0이면 녹화 당시 지연만큼 대기)"""
+        key = self.key(provider, request)
+        with self._lock:
+            entry = self._load(provider, key)
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            recorded = entry['responses'][min(position, len(entry['responses']) - 1)]
+        if self.latency_scale > 0:
+            time.sleep(recorded['latency'] * self.latency_scale)
+        return recorded['response']
+
+    def record(self, provider, request, response, latency):
+        """응답 녹화 (이번 실행에서 처음 보는 요청이면 기존 녹화를 덮어씀)"""
+        key = self.key(provider, request)
+        with self._lock:
+            if key not in self._recorded:
+                self._recorded.add(key)
+                self._entries[key] = {
+                    'provider': provider,
+                    'request': canonical(request),
+                    'responses': []
+                }
+            entry = self._entries[key]
+            entry['responses'].append({'latency': round(latency, 4), 'response': response})
+
+            path = self._path(provider, key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 녹화 파일은 리뷰에서 diff로 보므로 들여쓰기
+            write_json(path, entry, human=True)
+
+    def through(self, provider, request, call, encode=None, decode=None):
+        """
+        모드에 따라 호출 / 녹화 / 재생
+
+        Args:
+            provider: 'gemini' / 'openai' / 'did' / 'download'
+            request: 응답을 결정하는 요청 내용 (해시 키)
+            call: 실제 호출 함수
+            encode / decode: 응답 ↔ JSON 변환 (문자열 응답이면 생략)
+        """
+        if self.mode == 'replay':
+            response = self.play(provider, request)
+            return decode(response) if decode else response
+        if self.mode != 'record':
+            return call()
+
+        start = time.monotonic()
+        result = call()
+        self.record(provider, request, encode(result) if encode else result, time.monotonic() - start)
+        return result
+
+    def save_key_presence(self):
+        """녹화 시점에 설정돼 있던 API 키 이름 저장"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        present = [name for name in API_KEY_ENV if os.getenv(name)]
+        write_json(self.directory / 'keys.json', present)
+
+    def apply_key_presence(self):
+        """재생 시 녹화 당시 있던 키를 자리표시 값으로 채움 (실제 키는 사용하지 않음)"""
+        try:
+            present = read_json(self.directory / 'keys.json')
+        except (OSError, ValueError):
+            present = list(API_KEY_ENV)
+        for name in present:
+            if not os.getenv(name):
+                os.environ[name] = REPLAY_KEY_PLACEHOLDER
+
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+def load_cassette_config(config_path='config/config.json'):
+    """config.json의 cassette 섹션 로드 (없으면 기본값)"""
+    settings = dict(DEFAULT_CASSETTE_CONFIG)
+    try:
+        settings.update(read_json(config_path).get('cassette', {}))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+def get_cassette():
+    """
+    공용 카세트
+
+    환경 변수:
+        PROVIDER_MODE: live (기본) / record / replay
+        PROVIDER_CASSETTE: 카세트 이름 (기본 default)
+        PROVIDER_REPLAY_LATENCY: 재생 지연 배율 (0이면 지연 없이 즉시 응답)
+    """
+    global _cassette
+    with _cassette_lock:
+        if _cassette is None:
+            settings = load_cassette_config()
+            mode = os.getenv('PROVIDER_MODE', 'live').lower()
+            if mode not in ('live', 'record', 'replay'):
+                warning(f"⚠️  알 수 없는 PROVIDER_MODE '{mode}', live로 실행합니다.")
+                mode = 'live'
+            name = os.getenv('PROVIDER_CASSETTE', 'default')
+            latency_scale = float(os.getenv('PROVIDER_REPLAY_LATENCY', settings['latency_scale']))
+            _cassette = Cassette(mode, Path(settings['dir']) / name, latency_scale)
+
+            if mode == 'record':
+                _cassette.save_key_presence()
+                progress(f"📼 공급자 응답 녹화 중: {_cassette.directory}")
+            elif mode == 'replay':
+                _cassette.apply_key_presence()
+                progress(f"📼 공급자 응답 재생 중: {_cassette.directory} (지연 x{latency_scale})")
+        return _cassette
+
+
+def reset_cassette():
+    """공용 카세트 폐기 (상주 워커의 자식이 클라이언트 환경 변수로 다시 만들도록)"""
+    global _cassette
+    with _cassette_lock:
+        _cassette = None
+
+
+def time_scale():
+    """재생 모드의 대기 시간 배율 (폴링 간격 등). 그 외 모드는 1.0"""
+    cassette = get_cassette()
+    return cassette.latency_scale if cassette.mode == 'replay' else 1.0
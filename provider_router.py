@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+지연 시간 기반 AI 공급자 라우팅 / 헤징
+공급자·모델별 p50/p95 지연과 오류율을 실시간으로 추적해서
+가장 빠르고 건강한 공급자로 요청을 보내고,
+헤징 모드에서는 1순위가 p95를 넘기면 2순위를 동시에 호출해 먼저 온 응답을 사용
+"""
+
+import time
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from retry_policy import get_retry_policy
+from concurrency import load_concurrency_config
+from event_bus import warning
+from serialization import read_json
+
+DEFAULT_ROUTING_CONFIG = {
+    'window': 100,
+    'min_samples': 5,
+    'max_error_rate': 0.5,
+    'hedge_min_delay': 1.0,
+    'web_hedge': True
+}
+
+
+class NoProviderAvailable(Exception):
+    """라우팅할 수 있는 공급자가 없음"""
+
+
+class LatencyWindow:
+    """최근 N건의 (지연, 성공 여부)"""
+
+    def __init__(self, size):
+        self.samples = deque(maxlen=size)
+
+    def add(self, latency, ok):
+        self.samples.append((latency, ok))
+
+    def percentile(self, q):
+        latencies = sorted(latency for latency, ok in self.samples if ok)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(round(q * (len(latencies) - 1))))
+        return latencies[index]
+
+    def error_rate(self):
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+
+class ProviderRouter:
+    """공급자·모델별 지연/오류 추적 및 라우팅"""
+
+    def __init__(self, window=100, min_samples=5, max_error_rate=0.5, hedge_min_delay=1.0,
+                 pool_size=None):
+        self.window = window
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.hedge_min_delay = hedge_min_delay
+        self.hedges = 0
+        self.hedges_skipped = 0
+        self._stats = {}
+        self._lock = threading.Lock()
+        # 단계 동시성 한도만큼 호출이 동시에 들어와도 1순위 + 헤지 1건씩 돌 수 있는 크기
+        if pool_size is None:
+            pool_size = 2 * load_concurrency_config()['max_limit']
+        self.pool_size = max(2, pool_size)
+        self._busy = 0
+        self._pool = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix='hedge')
+
+    def record(self, provider, model, latency, ok):
+        """공급자 호출 결과 기록 (providers.py에서 모든 호출마다 호출)"""
+        with self._lock:
+            key = (provider, model)
+            if key not in self._stats:
+                self._stats[key] = LatencyWindow(self.window)
+            self._stats[key].add(latency, ok)
+
+    def stats(self, provider, model):
+        """p50 / p95 / 오류율 / 표본 수"""
+        with self._lock:
+            window = self._stats.get((provider, model))
+            if window is None:
+                return {'p50': None, 'p95': None, 'error_rate': 0.0, 'samples': 0}
+            return {
+                'p50': window.percentile(0.5),
+                'p95': window.percentile(0.95),
+                'error_rate': window.error_rate(),
+                'samples': len(window.samples)
+            }
+
+    def rank(self, handlers):
+        """
+        호출 순서 결정
+
+        표본이 부족한 공급자는 먼저 시험해 보고(탐색),
+        오류율이 높거나 서킷이 열린 공급자는 맨 뒤로 보냄
+
+        Args:
+            handlers: {provider: (model, fn)}
+
+        Returns:
+            list: 공급자 이름 (좋은 순서)
+        """
+        policy = get_retry_policy()
+
+        def score(provider):
+            model = handlers[provider][0]
+            stats = self.stats(provider, model)
+            unhealthy = (policy.breaker(provider).state == 'open' or
+                         (stats['samples'] >= self.min_samples and
+                          stats['error_rate'] > self.max_error_rate))
+            if stats['samples'] < self.min_samples:
+                return (unhealthy, 0, stats['samples'])
+            return (unhealthy, 1, stats['p50'] if stats['p50'] is not None else float('inf'))
+
+        return sorted(handlers, key=score)
+
+    def hedge_delay(self, provider, model):
+        """1순위가 이 시간 안에 응답하지 않으면 2순위 동시 호출"""
+        p95 = self.stats(provider, model)['p95']
+        return max(self.hedge_min_delay, p95) if p95 is not None else self.hedge_min_delay * 5
+
+    def _try_submit(self, fn):
+        """
+        호출 스레드의 컨텍스트(비용 집계 라벨, 단계 슬롯 혼잡 신호 등)를 유지한 채 풀에서 실행
+
+        놀고 있는 풀 스레드가 없으면 None (아직 끝나지 않은 이전 호출 뒤에 줄 세우지 않음)
+        """
+        with self._lock:
+            if self._busy >= self.pool_size:
+                return None
+            self._busy += 1
+        context = contextvars.copy_context()
+
+        def run():
+            try:
+                return context.run(fn)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+
+        return self._pool.submit(run)
+
+    def _failover(self, handlers, providers, last_error=None):
+        """providers를 순서대로 호출 스레드에서 직접 시도"""
+        for provider in providers:
+            try:
+                return handlers[provider][1]()
+            except Exception as e:
+                last_error = e
+                warning(f"   ↪️  {provider} 실패, 다음 공급자로 전환: {e}")
+        raise last_error
+
+    def call(self, handlers, hedge=False):
+        """
+        가장 좋은 공급자로 호출 (실패하면 다음 공급자로 전환)
+
+        Args:
+            handlers: {provider: (model, fn)} - fn은 인자 없는 호출 함수
+            hedge: True면 1순위가 p95를 넘길 때 2순위를 동시에 호출
+                (풀에 빈 스레드가 없으면 헤징 없이 순서대로 호출)
+
+        Returns:
+            먼저 성공한 공급자의 응답
+        """
+        order = self.rank(handlers)
+        if not order:
+            raise NoProviderAvailable("사용 가능한 AI 공급자가 없습니다")
+
+        primary = order[0]
+        future = self._try_submit(handlers[primary][1]) if hedge and len(order) >= 2 else None
+        if future is None:
+            return self._failover(handlers, order)
+
+        backups = list(order[1:])
+        futures = {future: primary}
+        done, _ = wait(futures, timeout=self.hedge_delay(primary, handlers[primary][0]))
+        if not done:
+            future = self._try_submit(handlers[backups[0]][1])
+            with self._lock:
+                if future is None:
+                    self.hedges_skipped += 1
+                else:
+                    self.hedges += 1
+            if future is not None:
+                futures[future] = backups.pop(0)
+
+        last_error = None
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                futures.pop(future)
+                try:
+                    # 늦게 도착한 나머지 응답은 버림
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+        return self._failover(handlers, backups, last_error)
+
+    def summary(self):
+        """공급자·모델별 현재 통계"""
+        with self._lock:
+            keys = list(self._stats)
+        return {f"{provider}/{model}": self.stats(provider, model) for provider, model in keys}
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def load_routing_config(config_path='config/config.json'):
+    """config.json의 routing 섹션 로드 (없으면 기본값)"""
+    settings = dict(DEFAULT_ROUTING_CONFIG)
+    try:
+        settings.update(read_json(config_path).get('routing', {}))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+def get_router():
+    """공용 라우터"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            settings = load_routing_config()
+            _router = ProviderRouter(
+                window=settings['window'],
+                min_samples=settings['min_samples'],
+                max_error_rate=settings['max_error_rate'],
+                hedge_min_delay=settings['hedge_min_delay']
+            )
+        return _router
+
+
+def record_call(provider, model, start, ok):
+    """providers.py용 헬퍼: time.monotonic() 시작 시각으로 지연 기록"""
+    get_router().record(provider, model, time.monotonic() - start, ok)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+AI / D-ID 공급자 호출 계층
+모든 외부 API 호출이 이 모듈을 거치도록 해서
+속도 제한 / 재시도 / 서킷 브레이커 / 지연 기록 / 녹화·재생 같은 공통 정책을 한 곳에서 적용
+"""
+
+import os
+import time
+
+from provider_router import record_call
+from metrics import observe_provider
+from cost_accounting import get_ledger
+from tracing import span, annotate, record_span
+from provider_cassette import (get_cassette, response_to_dict, response_from_dict,
+                               bytes_to_dict, bytes_from_dict)
+from rate_limiter import get_rate_limiter, estimate_tokens
+from retry_policy import get_retry_policy, status_code_of, RetryableHTTPError, RETRYABLE_STATUS
+from serialization import dump_bytes
+
+GEMINI_MODEL = 'gemini-1.5-flash'
+OPENAI_MODEL = 'gpt-4o'
+
+# 429 응답에 Retry-After가 없을 때 기본 대기 시간 (초)
+DEFAULT_RETRY_AFTER = 30
+
+def record_attempt(provider, model, start, ok):
+    """공급자 요청 1회(시도) 결과 기록: 라우터 지연 통계 + 메트릭 + 추적 span"""
+    record_call(provider, model, start, ok)
+    observe_provider(provider, model, time.monotonic() - start, ok)
+    record_span('attempt', start, kind='attempt', provider=provider, model=model, ok=ok)
+
+
+def text_with_usage(data):
+    """카세트 응답 → {'text', 'usage'} (사용량 기록 전에 녹화된 카세트는 텍스트만 있음)"""
+    if isinstance(data, str):
+        return {'text': data, 'usage': None}
+    return data
+
+
+def did_api_url():
+    """D-ID API 주소 (호출마다 환경 변수에서 읽음, 워커 자식 프로세스의 환경 반영)"""
+    return os.getenv('DID_API_URL', 'https://api.d-id.com').rstrip('/')
+
+
+def gemini_api_url():
+    """Gemini 엔드포인트. 비어 있으면 SDK 기본값 (벤치마크용 로컬 대체 서버 주소 등을 지정)"""
+    return os.getenv('GEMINI_API_URL', '').rstrip('/')
+
+
+def get_api_key(name):
+    """
+    공급자 API 키 (없으면 None)
+
+    첫 호출 때 녹화/재생 모드를 적용하므로 재생이면 녹화 당시 있던 키 자리에 자리표시 값이 들어감.
+    API 키 유무로 분기하는 코드는 os.getenv 대신 이 함수를 사용
+    """
+    get_cassette()
+    return os.getenv(name)
+
+
+def retry_after_of(error_or_response):
+    """Retry-After 헤더 값 (초)"""
+    response = getattr(error_or_response, 'response', error_or_response)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After', DEFAULT_RETRY_AFTER))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+def gemini_generate(contents, model=GEMINI_MODEL):
+    """
+    Gemini generate_content 호출
+
+    Args:
+        contents: 프롬프트 문자열 또는 [프롬프트, 이미지, ...] 리스트
+        model: Gemini 모델명
+
+    Returns:
+        str: 응답 텍스트
+    """
+    import google.generativeai as genai
+
+    limiter = get_rate_limiter()
+
+    def send():
+        limiter.acquire('gemini', model, estimate_tokens(contents))
+        endpoint = gemini_api_url()
+        if endpoint:
+            genai.configure(api_key=os.getenv('GEMINI_API_KEY'), transport='rest',
+                            client_options={'api_endpoint': endpoint})
+        else:
+            genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+        start = time.monotonic()
+        try:
+            response = genai.GenerativeModel(model).generate_content(contents)
+            text = response.text
+        except Exception as e:
+            record_attempt('gemini', model, start, False)
+            if status_code_of(e) == 429:
+                limiter.penalize('gemini', model, retry_after_of(e))
+            raise
+        record_attempt('gemini', model, start, True)
+        usage = getattr(response, 'usage_metadata', None)
+        return {'text': text, 'usage': {
+            'prompt_tokens': getattr(usage, 'prompt_token_count', 0),
+            'completion_tokens': getattr(usage, 'candidates_token_count', 0)
+        }}
+
+    with span('gemini', kind='provider', model=model):
+        result = get_cassette().through(
+            'gemini', {'model': model, 'contents': contents},
+            lambda: get_retry_policy().call('gemini', send),
+            decode=text_with_usage
+        )
+        entry = get_ledger().record_llm('gemini', model, result['usage'], contents, result['text'])
+        annotate(prompt_tokens=entry['prompt_tokens'], completion_tokens=entry['completion_tokens'])
+    return result['text']
+
+
+def openai_chat(messages, model=OPENAI_MODEL, **params):
+    """
+    OpenAI chat.completions 호출
+
+    Args:
+        messages: 채팅 메시지 리스트
+        model: OpenAI 모델명
+        params: temperature, max_tokens 등 추가 파라미터
+
+    Returns:
+        str: 응답 텍스트
+    """
+    import openai
+
+    limiter = get_rate_limiter()
+
+    def send():
+        limiter.acquire('openai', model, estimate_tokens(messages) + params.get('max_tokens', 0))
+        openai.api_key = os.getenv('OPENAI_API_KEY')
+        start = time.monotonic()
+        try:
+            response = openai.chat.completions.create(model=model, messages=messages, **params)
+        except Exception as e:
+            record_attempt('openai', model, start, False)
+            if status_code_of(e) == 429:
+                limiter.penalize('openai', model, retry_after_of(e))
+            raise
+        record_attempt('openai', model, start, True)
+        usage = getattr(response, 'usage', None)
+        return {'text': response.choices[0].message.content, 'usage': {
+            'prompt_tokens': getattr(usage, 'prompt_tokens', 0),
+            'completion_tokens': getattr(usage, 'completion_tokens', 0)
+        }}
+
+    with span('openai', kind='provider', model=model):
+        result = get_cassette().through(
+            'openai', {'model': model, 'messages': messages, 'params': params},
+            lambda: get_retry_policy().call('openai', send),
+            decode=text_with_usage
+        )
+        entry = get_ledger().record_llm('openai', model, result['usage'], messages, result['text'])
+        annotate(prompt_tokens=entry['prompt_tokens'], completion_tokens=entry['completion_tokens'])
+    return result['text']
+
+
+def did_request(method, path, **kwargs):
+    """
+    D-ID API 호출
+
+    Args:
+        method: 'GET' / 'POST'
+        path: '/talks' 같은 API 경로
+        kwargs: requests.request에 전달할 인자 (headers, json 등)
+
+    Returns:
+        requests.Response (재시도 후에도 실패하면 마지막 응답)
+
+    GET만 일반 재시도. POST 등은 429 / 연결 단계 실패만 다시 보냄
+    (5xx나 응답 대기 중 끊김 뒤에 다시 보내면 유료 렌더링이 중복 생성되고 앞의 talk id를 잃음)
+    """
+    import requests
+
+    limiter = get_rate_limiter()
+
+    def send():
+        limiter.acquire('did', 'talks')
+        start = time.monotonic()
+        try:
+            response = requests.request(method, f"{did_api_url()}{path}", **kwargs)
+        except Exception:
+            record_attempt('did', 'talks', start, False)
+            raise
+        record_attempt('did', 'talks', start, response.status_code < 400)
+        if response.status_code == 429:
+            limiter.penalize('did', 'talks', retry_after_of(response))
+        if response.status_code in RETRYABLE_STATUS:
+            raise RetryableHTTPError(response)
+        return response
+
+    def call():
+        try:
+            return get_retry_policy().call('did', send, idempotent=method.upper() == 'GET')
+        except RetryableHTTPError as e:
+            return e.response
+
+    # 웹훅 URL은 실행마다 달라지므로 요청 해시에서 제외
+    body = {k: v for k, v in (kwargs.get('json') or {}).items() if k != 'webhook'}
+    with span(f"did {method}", kind='provider', model='talks', path=path,
+              payload_bytes=len(dump_bytes(body)) if body else 0) as current:
+        response = get_cassette().through(
+            'did', {'method': method, 'path': path, 'json': body, 'params': kwargs.get('params')},
+            call, encode=response_to_dict, decode=response_from_dict
+        )
+        current.set(status_code=response.status_code)
+    return response
+
+
+def download(url):
+    """생성된 결과 파일 다운로드 (D-ID 결과 URL은 API 한도 대상 아님)"""
+    import requests
+
+    def send():
+        start = time.monotonic()
+        try:
+            response = requests.get(url)
+        except Exception:
+            record_attempt('download', 'result', start, False)
+            raise
+        record_attempt('download', 'result', start, response.status_code < 400)
+        if response.status_code in RETRYABLE_STATUS:
+            raise RetryableHTTPError(response)
+        response.raise_for_status()
+        return response.content
+
+    with span('download', kind='provider', model='result') as current:
+        content = get_cassette().through(
+            'download', {'url': url},
+            lambda: get_retry_policy().call('download', send),
+            encode=bytes_to_dict, decode=bytes_from_dict
+        )
+        current.set(bytes=len(content))
+    return content
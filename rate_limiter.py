@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+공급자별 토큰 버킷 속도 제한기
+Gemini / OpenAI / D-ID 호출을 모델별 RPM(분당 요청)·TPM(분당 토큰) 한도 안에서 실행
+스레드 간에는 락, 프로세스 간에는 SQLite 공유 상태로 한도를 함께 사용
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+from tracing import record_span
+from serialization import read_json
+
+# Gemini는 이미지 1장을 고정 토큰으로 계산
+IMAGE_TOKENS = 258
+
+
+def estimate_tokens(contents):
+    """프롬프트 토큰 수 추정 (문자 4개 ≈ 1토큰, 이미지는 고정값)"""
+    if contents is None:
+        return 0
+    if isinstance(contents, str):
+        return max(1, len(contents) // 4)
+    if isinstance(contents, (list, tuple)):
+        return sum(estimate_tokens(item) for item in contents)
+    if isinstance(contents, dict):
+        if 'data' in contents or 'image_url' in contents:
+            return IMAGE_TOKENS
+        return sum(estimate_tokens(value) for value in contents.values())
+    # PIL 이미지 등
+    return IMAGE_TOKENS
+
+
+class _MemoryStore:
+    """프로세스 내부 버킷 상태"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states = {}
+
+    def transact(self, keys, fn):
+        with self._lock:
+            states = {key: self._states.get(key) for key in keys}
+            result = fn(states)
+            self._states.update(states)
+            return result
+
+
+class _SQLiteStore:
+    """여러 프로세스가 공유하는 버킷 상태 (SQLite 트랜잭션으로 직렬화)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL, updated REAL, blocked_until REAL)"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def transact(self, keys, fn):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            states = {}
+            for key in keys:
+                row = conn.execute(
+                    "SELECT tokens, updated, blocked_until FROM buckets WHERE key = ?", (key,)
+                ).fetchone()
+                states[key] = list(row) if row else None
+            result = fn(states)
+            conn.executemany(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated, blocked_until) VALUES (?, ?, ?, ?)",
+                [(key, *state) for key, state in states.items() if state is not None]
+            )
+            conn.execute('COMMIT')
+            return result
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+
+class RateLimiter:
+    """공급자·모델별 RPM/TPM 토큰 버킷"""
+
+    def __init__(self, providers=None, shared_state=None):
+        self.providers = providers or {}
+        self.store = _SQLiteStore(shared_state) if shared_state else _MemoryStore()
+
+    def limits_for(self, provider, model):
+        """모델 한도 (없으면 공급자 default, 그것도 없으면 무제한)"""
+        provider_limits = self.providers.get(provider, {})
+        return provider_limits.get(model) or provider_limits.get('default') or {}
+
+    @staticmethod
+    def _block_key(provider, model):
+        """429 Retry-After 차단 전용 키 (한도 설정과 무관하게 항상 확인)"""
+        return f"{provider}:{model}:block"
+
+    def _buckets(self, provider, model, tokens):
+        limits = self.limits_for(provider, model)
+        # 용량 None: 토큰 없이 차단 시각만 보는 버킷
+        buckets = [(self._block_key(provider, model), None, 0)]
+        rpm = limits.get('rpm')
+        if rpm:
+            buckets.append((f"{provider}:{model}:rpm", rpm, 1))
+        tpm = limits.get('tpm')
+        if tpm and tokens:
+            buckets.append((f"{provider}:{model}:tpm", tpm, min(tokens, tpm)))
+        return buckets
+
+    @staticmethod
+    def _take(states, buckets, now):
+        """모든 버킷에 여유가 있을 때만 차감. 기다려야 할 시간(초) 반환"""
+        wait = 0.0
+        for key, capacity, amount in buckets:
+            state = states[key] or [capacity or 0.0, now, 0.0]
+            tokens, updated, blocked_until = state
+            if capacity is not None:
+                tokens = min(capacity, tokens + (now - updated) * capacity / 60.0)
+            states[key] = [tokens, now, blocked_until]
+            if blocked_until > now:
+                wait = max(wait, blocked_until - now)
+            elif tokens < amount:
+                wait = max(wait, (amount - tokens) * 60.0 / capacity)
+
+        if wait <= 0:
+            for key, capacity, amount in buckets:
+                states[key][0] -= amount
+        return wait
+
+    def acquire(self, provider, model='default', tokens=0):
+        """
+        한도 안에 들어올 때까지 대기 후 요청 1건 + 토큰 차감
+
+        Returns:
+            float: 대기한 시간 (초)
+        """
+        buckets = self._buckets(provider, model, tokens)
+        keys = [key for key, _, _ in buckets]
+        waited = 0.0
+        start = time.monotonic()
+        while True:
+            wait = self.store.transact(keys, lambda states: self._take(states, buckets, time.time()))
+            if wait <= 0:
+                if waited:
+                    record_span('rate_limit.wait', start, kind='queue', provider=provider, model=model)
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    def adjust(self, provider, model, delta_tokens):
+        """실제 사용 토큰이 추정치와 다를 때 TPM 버킷 보정 (음수면 환급)"""
+        tpm = self.limits_for(provider, model).get('tpm')
+        if not tpm or not delta_tokens:
+            return
+        key = f"{provider}:{model}:tpm"
+
+        def apply(states):
+            now = time.time()
+            state = states[key] or [tpm, now, 0.0]
+            state[0] = min(tpm, state[0] - delta_tokens)
+            states[key] = state
+
+        self.store.transact([key], apply)
+
+    def penalize(self, provider, model, seconds):
+        """429 응답 시 모든 워커가 함께 seconds 동안 대기하도록 차단 (RPM/TPM 설정 여부와 무관)"""
+        key = self._block_key(provider, model)
+
+        def apply(states):
+            now = time.time()
+            state = states[key] or [0.0, now, 0.0]
+            state[2] = max(state[2], now + seconds)
+            states[key] = state
+
+        self.store.transact([key], apply)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(config_path='config/config.json'):
+    """config.json의 rate_limits 설정으로 공용 속도 제한기 생성"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            try:
+                settings = read_json(config_path).get('rate_limits', {})
+            except (OSError, ValueError):
+                settings = {}
+            shared_state = os.getenv('RATE_LIMIT_STATE', settings.get('shared_state'))
+            _limiter = RateLimiter(settings.get('providers', {}), shared_state or None)
+        return _limiter
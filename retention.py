@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+생성물 보존 정책 / 디스크 용량 관리
+output_layout 영역(비디오, 썸네일, 메타데이터, 버전 스크립트)의 파일을 종류별 정책으로 정리
+  - 나이: 종류별 max_age_days가 지난 파일
+  - 용량: 전체 크기가 quota_mb를 넘거나 디스크 여유 공간이 min_free_mb보다 적으면
+          오래 쓰지 않은 것(LRU, 마지막 접근 / 수정 시각)부터 target_ratio까지
+삭제 대상은 이미 안전한 것만: 업로드된 비디오 / 썸네일(require_uploaded), 시뮬레이션 결과,
+archive 정책 종류(메타데이터 / 버전 JSON)는 output/archive/의 월별 zip에 압축 보관한 뒤 삭제.
+매니페스트(output_layout)와 실행 카탈로그(run_catalog)의 기록도 함께 갱신
+
+    python retention.py status               # 종류별 파일 수 / 크기 / 삭제 가능한 크기
+    python retention.py run --dry-run        # 지울 파일만 출력
+    python retention.py run
+    python retention.py daemon               # interval_seconds마다 반복 (포그라운드)
+
+파이프라인(main.py / auto_video_creator.py)은 daemon이 true면 백그라운드 스레드로 주기 실행하고,
+비디오 다운로드 직전에 ensure_space()로 여유 공간을 확보
+"""
+
+import os
+import sys
+import time
+import shutil
+import zipfile
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from output_layout import get_layout
+from event_bus import progress, warning
+from serialization import read_json
+
+DEFAULT_RETENTION_CONFIG = {
+    'enabled': True,
+    # 백그라운드 주기 실행 (파이프라인 실행 중)
+    'daemon': True,
+    'interval_seconds': 600,
+    # 0이면 전체 용량 제한 없음
+    'quota_mb': 0,
+    'min_free_mb': 1024,
+    # 용량 초과 시 이 비율까지 줄임
+    'target_ratio': 0.9,
+    # 이 시간(초) 안에 수정된 파일은 아직 쓰는 중일 수 있어서 건드리지 않음
+    'grace_seconds': 300,
+    'archive_dir': 'output/archive',
+    'policies': {
+        'video': {'max_age_days': 30, 'require_uploaded': True},
+        'thumbnail': {'max_age_days': 30, 'require_uploaded': True},
+        'simulated': {'max_age_days': 7},
+        'sidecar': {'max_age_days': 7},
+        'metadata': {'max_age_days': 30, 'archive': True},
+        'versions': {'max_age_days': 30, 'archive': True}
+    }
+}
+
+LOCK_FILE = '.retention.lock'
+
+
+def load_retention_config(config_path='config/config.json'):
+    """config.json의 retention 섹션 로드 (policies는 종류별로 기본값과 병합)"""
+    settings = dict(DEFAULT_RETENTION_CONFIG)
+    policies = {kind: dict(policy) for kind, policy in DEFAULT_RETENTION_CONFIG['policies'].items()}
+    try:
+        section = read_json(config_path).get('retention', {})
+        for kind, policy in section.get('policies', {}).items():
+            policies.setdefault(kind, {}).update(policy)
+        settings.update({key: value for key, value in section.items() if key != 'policies'})
+    except (OSError, ValueError):
+        pass
+    settings['policies'] = policies
+    return settings
+
+
+def artifact_type(area, name):
+    """영역 + 파일 이름 → 정책 종류"""
+    if area == 'videos':
+        if name.endswith('.mp4'):
+            return 'video'
+        # 시뮬레이션 모드가 비디오 대신 남기는 이미지
+        return 'simulated' if name.endswith(('.jpg', '.jpeg', '.png')) else 'sidecar'
+    return {'thumbnails': 'thumbnail', 'optimized': 'metadata', 'versions': 'versions'}[area]
+
+
+class Artifact:
+    """정리 후보 파일 1개"""
+
+    __slots__ = ('path', 'area', 'kind', 'size', 'modified', 'last_used', 'state')
+
+    def __init__(self, path, area, kind, size, modified, last_used, state):
+        self.path = path
+        self.area = area
+        self.kind = kind
+        self.size = size
+        self.modified = modified
+        self.last_used = last_used
+        self.state = state
+
+
+class RetentionManager:
+    """정책 평가 + 정리 (프로세스 간에는 잠금 파일로 한 번에 하나만)"""
+
+    def __init__(self, settings=None, layout=None):
+        self.settings = settings or load_retention_config()
+        self.layout = layout or get_layout()
+        self.archive_dir = Path(self.settings['archive_dir'])
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # 스캔 / 평가 -------------------------------------------------------------
+
+    def scan(self):
+        """영역별 파일 목록 (크기 / 시각 / 매니페스트 상태)"""
+        artifacts = []
+        for area in self.layout.areas:
+            states = self.layout.states(area)
+            for path in self.layout.iter_files(area):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                state = states.get(path.name, ('written', None))[0]
+                artifacts.append(Artifact(path, area, artifact_type(area, path.name), stat.st_size,
+                                          stat.st_mtime, max(stat.st_atime, stat.st_mtime), state))
+        return artifacts
+
+    def _policy(self, artifact):
+        return self.settings['policies'].get(artifact.kind, {})
+
+    def evictable(self, artifact, now=None):
+        """지워도 되는 파일인지 (업로드 필요 종류는 업로드된 것만, 방금 쓴 파일 제외)"""
+        now = now or time.time()
+        if now - artifact.modified < self.settings['grace_seconds']:
+            return False
+        if self._policy(artifact).get('require_uploaded'):
+            return artifact.state == 'uploaded'
+        return True
+
+    def plan(self, artifacts=None, now=None):
+        """
+        지울 파일 목록
+
+        Returns:
+            list: [(Artifact, 이유)] (나이 초과 → 용량 초과 LRU 순)
+        """
+        now = now or time.time()
+        artifacts = self.scan() if artifacts is None else artifacts
+        candidates = [artifact for artifact in artifacts if self.evictable(artifact, now)]
+        chosen, planned = set(), []
+        for artifact in candidates:
+            max_age_days = self._policy(artifact).get('max_age_days')
+            if max_age_days and now - artifact.modified > max_age_days * 86400:
+                chosen.add(artifact.path)
+                planned.append((artifact, 'age'))
+
+        # 나이 기준으로 지우는 만큼은 용량 계산에서 제외
+        excess = (self._excess_bytes(sum(artifact.size for artifact in artifacts))
+                  - sum(artifact.size for artifact, _ in planned))
+        if excess > 0:
+            for artifact in sorted(candidates, key=lambda item: item.last_used):
+                if excess <= 0:
+                    break
+                if artifact.path in chosen:
+                    continue
+                planned.append((artifact, 'quota'))
+                excess -= artifact.size
+        return planned
+
+    def _excess_bytes(self, total):
+        """quota / 여유 공간 기준으로 줄여야 하는 크기 (target_ratio까지)"""
+        ratio = self.settings['target_ratio']
+        excess = 0
+        quota = self.settings['quota_mb'] * 1024 * 1024
+        if quota and total > quota:
+            excess = total - int(quota * ratio)
+        min_free = self.settings['min_free_mb'] * 1024 * 1024
+        if min_free:
+            try:
+                free = shutil.disk_usage('.').free
+            except OSError:
+                free = min_free
+            if free < min_free:
+                excess = max(excess, int(min_free / ratio) - free)
+        return excess
+
+    # 정리 -----------------------------------------------------------------
+
+    def _archive_path(self, artifact):
+        month = datetime.fromtimestamp(artifact.modified).strftime('%Y-%m')
+        return self.archive_dir / artifact.area / f"{month}.zip"
+
+    def run_once(self, dry_run=False):
+        """
+        정책 평가 후 정리 (다른 프로세스가 정리 중이면 건너뜀)
+
+        Returns:
+            dict: {'files': n, 'bytes': n, 'archived': n, 'by_kind': {종류: n}, 'skipped': bool}
+        """
+        report = {'files': 0, 'bytes': 0, 'archived': 0, 'by_kind': {}, 'skipped': False}
+        if not self.settings['enabled']:
+            return report
+        with self._lock, _ProcessLock(self.archive_dir / LOCK_FILE) as acquired:
+            if not acquired:
+                report['skipped'] = True
+                return report
+            planned = self.plan()
+            if dry_run:
+                for artifact, reason in planned:
+                    print(f"   🗑️  {artifact.path} ({artifact.kind}, {_format_size(artifact.size)}, {reason})")
+                evicted = [artifact for artifact, _ in planned]
+            else:
+                evicted = self._evict(planned, report)
+            report['files'] = len(evicted)
+            report['bytes'] = sum(artifact.size for artifact in evicted)
+            for artifact in evicted:
+                report['by_kind'][artifact.kind] = report['by_kind'].get(artifact.kind, 0) + 1
+        return report
+
+    @staticmethod
+    def _member(artifact):
+        """zip 안 이름 (같은 이름으로 다시 만든 파일도 따로 보관되게 수정 시각을 붙임)"""
+        return f"{int(artifact.modified)}_{artifact.path.name}"
+
+    def _evict(self, planned, report):
+        """압축 보관(archive 정책) → 삭제 → 매니페스트 / 카탈로그 갱신. 실제로 지운 목록 반환"""
+        archives = {}
+        for artifact, _ in planned:
+            if self._policy(artifact).get('archive'):
+                archives.setdefault(self._archive_path(artifact), []).append(artifact)
+
+        archived_paths = set()
+        for archive, items in archives.items():
+            archive.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                with zipfile.ZipFile(archive, 'a', compression=zipfile.ZIP_DEFLATED) as bundle:
+                    existing = set(bundle.namelist())
+                    for artifact in items:
+                        if self._member(artifact) not in existing:
+                            bundle.write(artifact.path, self._member(artifact))
+                        archived_paths.add(artifact.path)
+            except (OSError, zipfile.BadZipFile) as e:
+                # 보관 실패한 파일은 지우지 않음
+                warning(f"⚠️  보관 실패 ({archive}): {e}")
+                for artifact in items:
+                    archived_paths.discard(artifact.path)
+
+        catalog_status, evicted = {}, []
+        for artifact, _ in planned:
+            if self._policy(artifact).get('archive') and artifact.path not in archived_paths:
+                continue
+            try:
+                os.remove(artifact.path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                warning(f"⚠️  삭제 실패 ({artifact.path}): {e}")
+                continue
+            evicted.append(artifact)
+            if artifact.path in archived_paths:
+                self.layout.mark_archived(artifact.path, f"{self._archive_path(artifact)}!{self._member(artifact)}")
+                catalog_status[str(artifact.path)] = 'archived'
+                report['archived'] += 1
+            else:
+                self.layout.forget(artifact.path)
+                catalog_status[str(artifact.path)] = 'evicted'
+
+        if catalog_status:
+            from run_catalog import get_catalog
+            catalog = get_catalog()
+            if catalog is not None:
+                try:
+                    catalog.set_status(catalog_status)
+                except Exception as e:
+                    warning(f"⚠️  카탈로그 갱신 실패 (파일은 정리됨): {e}")
+        return evicted
+
+    def ensure_space(self):
+        """여유 공간이 min_free_mb보다 적으면 바로 정리 (다운로드 직전에 호출)"""
+        if self.settings['enabled'] and self._excess_bytes(0) > 0:
+            report = self.run_once()
+            if report['files']:
+                progress(f"   🧹 디스크 공간 확보: {report['files']}개 파일, {_format_size(report['bytes'])}")
+
+    # 백그라운드 ---------------------------------------------------------------
+
+    def _loop(self):
+        while not self._stop.wait(self.settings['interval_seconds']):
+            try:
+                report = self.run_once()
+                if report['files']:
+                    progress(f"🧹 보존 정책: {report['files']}개 파일 정리 ({_format_size(report['bytes'])})")
+            except Exception as e:
+                warning(f"⚠️  보존 정책 실행 실패: {e}")
+
+    def start(self):
+        """daemon이 켜져 있으면 백그라운드 스레드 시작 (첫 정리는 interval_seconds 뒤)"""
+        if self.settings['enabled'] and self.settings['daemon'] and self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='retention', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        """종류별 파일 수 / 크기 / 지금 지울 수 있는 크기"""
+        now = time.time()
+        result = {}
+        for artifact in self.scan():
+            row = result.setdefault(artifact.kind, {'files': 0, 'bytes': 0, 'evictable_bytes': 0})
+            row['files'] += 1
+            row['bytes'] += artifact.size
+            if self.evictable(artifact, now):
+                row['evictable_bytes'] += artifact.size
+        return result
+
+
+class _ProcessLock:
+    """프로세스 간 비차단 잠금 (fcntl이 없는 환경에서는 스레드 잠금만)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.file = None
+
+    def __enter__(self):
+        try:
+            import fcntl
+        except ImportError:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, 'a')
+        try:
+            fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self.file.close()
+            self.file = None
+            return False
+        return True
+
+    def __exit__(self, *exc):
+        if self.file is not None:
+            self.file.close()
+        return False
+
+
+def read_archived(path):
+    """
+    보관된 메타데이터 / 버전 JSON 읽기 (원본 경로 기준, 없으면 None)
+    """
+    layout = get_layout()
+    area = layout.area_of(path)
+    if not area:
+        return None
+    state, archive = layout.states(area).get(Path(path).name, (None, None))
+    if state != 'archived' or not archive:
+        return None
+    archive, _, member = archive.rpartition('!')
+    try:
+        with zipfile.ZipFile(archive) as bundle:
+            return bundle.read(member).decode('utf-8')
+    except (OSError, KeyError, zipfile.BadZipFile):
+        return None
+
+
+def _format_size(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_retention():
+    """공용 보존 정책 관리자 (config.json의 retention 섹션)"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = RetentionManager()
+        return _manager
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='생성물 보존 정책 / 디스크 용량 관리')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('status', help='종류별 파일 수 / 크기')
+    run = sub.add_parser('run', help='정책대로 한 번 정리')
+    run.add_argument('--dry-run', action='store_true', help='지울 파일만 출력')
+    sub.add_parser('daemon', help='interval_seconds마다 반복 (Ctrl+C로 종료)')
+    args = parser.parse_args(argv)
+
+    manager = get_retention()
+    if args.command == 'status':
+        for kind, row in sorted(manager.status().items()):
+            print(f"   {kind:<10} {row['files']:>6}개  {_format_size(row['bytes']):>9}  "
+                  f"(정리 가능 {_format_size(row['evictable_bytes'])})")
+    elif args.command == 'run':
+        start = time.perf_counter()
+        report = manager.run_once(dry_run=args.dry_run)
+        if report['skipped']:
+            print("⏭️  다른 프로세스가 정리 중입니다.")
+            return 0
+        verb = '정리 대상' if args.dry_run else '정리'
+        print(f"🧹 {verb}: {report['files']}개 파일, {_format_size(report['bytes'])} "
+              f"(보관 {report['archived']}, {time.perf_counter() - start:.1f}초) "
+              + ', '.join(f"{kind} {count}" for kind, count in report['by_kind'].items()))
+    else:
+        print(f"🧹 보존 정책 데몬 시작 ({manager.settings['interval_seconds']}초 간격)")
+        try:
+            while True:
+                report = manager.run_once()
+                if report['files']:
+                    print(f"🧹 {report['files']}개 파일 정리 ({_format_size(report['bytes'])})")
+                time.sleep(manager.settings['interval_seconds'])
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+공급자 호출 재시도 / 서킷 브레이커
+일시적 오류(429, 5xx, 네트워크)는 지터가 있는 지수 백오프로 재시도하고
+공급자가 계속 실패하면 서킷을 열어 바로 실패 처리 (장애 중인 API를 두드리지 않음)
+"""
+
+import time
+import random
+import threading
+
+from concurrency import report_congestion
+from tracing import span
+from event_bus import warning
+from serialization import read_json
+
+# 재시도 대상 HTTP 상태 코드
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+# 상태 코드 없는 연결 끊김 / 타임아웃 예외 이름 (requests / openai / google SDK)
+# requests 예외는 OSError 하위지만 이름이 같은 클래스가 MRO에 있을 때만 재시도
+RETRYABLE_ERROR_NAMES = {
+    'ConnectionError', 'Timeout', 'ChunkedEncodingError',
+    'APIConnectionError', 'APITimeoutError', 'DeadlineExceeded'
+}
+
+# 연결 단계에서 실패해 요청이 서버에 도달하지 않았음이 확실한 예외 이름 (requests / urllib3)
+CONNECT_ERROR_NAMES = {
+    'ConnectTimeout', 'ConnectTimeoutError', 'NewConnectionError',
+    'NameResolutionError', 'ConnectionRefusedError'
+}
+
+DEFAULT_RETRY_CONFIG = {
+    'retry_count': 3,
+    'base_delay': 1.0,
+    'max_delay': 30.0,
+    'failure_threshold': 5,
+    'reset_timeout': 60.0
+}
+
+
+class CircuitOpenError(Exception):
+    """서킷이 열려 있어 호출을 건너뜀"""
+
+    def __init__(self, provider, retry_in):
+        super().__init__(f"{provider} 서킷 열림 ({retry_in:.0f}초 후 재시도)")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+class RetryableHTTPError(Exception):
+    """재시도 대상 상태 코드를 받은 HTTP 응답"""
+
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+        self.status_code = response.status_code
+
+
+def status_code_of(error):
+    """SDK/HTTP 예외에서 HTTP 상태 코드 추출 (없으면 None)"""
+    for attr in ('status_code', 'code'):
+        code = getattr(error, attr, None)
+        if isinstance(code, int):
+            return code
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+def is_retryable(error):
+    """재시도해도 되는 오류인지 분류"""
+    if isinstance(error, CircuitOpenError):
+        return False
+    status = status_code_of(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # 상태 코드 없는 연결 끊김 / 타임아웃 (파일 없음 같은 다른 OSError는 재시도하지 않음)
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def _error_chain(error):
+    """예외와 그 원인들 (requests.ConnectionError → MaxRetryError.reason → NewConnectionError 등)"""
+    seen = set()
+    while isinstance(error, BaseException) and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        reason = getattr(error, 'reason', None)
+        if isinstance(reason, BaseException):
+            error = reason
+        elif error.__cause__ is not None or error.__context__ is not None:
+            error = error.__cause__ or error.__context__
+        else:
+            error = error.args[0] if error.args else None
+
+
+def is_safe_to_resend(error):
+    """
+    멱등이 아닌 요청(D-ID POST /talks 등)을 다시 보내도 되는 오류인지
+
+    429(공급자가 요청을 거부) 또는 연결 단계 실패(요청이 나가지 않음)만 해당.
+    5xx / 응답 대기 중 타임아웃·끊김은 서버가 이미 처리했을 수 있으므로 다시 보내지 않음
+    """
+    if status_code_of(error) == 429:
+        return True
+    return any(cls.__name__ in CONNECT_ERROR_NAMES
+               for cause in _error_chain(error) for cls in type(cause).__mro__)
+
+
+class CircuitBreaker:
+    """연속 실패가 임계값을 넘으면 reset_timeout 동안 호출 차단 (이후 1건 시험 호출)"""
+
+    def __init__(self, provider, failure_threshold=5, reset_timeout=60.0):
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """호출 가능 여부 확인 (열려 있으면 CircuitOpenError)"""
+        with self._lock:
+            if self.state == 'open':
+                elapsed = time.time() - self.opened_at
+                if elapsed < self.reset_timeout:
+                    raise CircuitOpenError(self.provider, self.reset_timeout - elapsed)
+                self.state = 'half_open'
+            if self.state == 'half_open':
+                # 시험 호출이 진행 중이면 나머지는 대기 없이 실패
+                if self._probing:
+                    raise CircuitOpenError(self.provider, 0)
+                self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._probing = False
+
+    def record_neutral(self):
+        """공급자 상태와 무관한 결과 (400/401/404 등): 상태는 그대로 두고 시험 호출 자리만 반환"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        """실패 기록. 서킷이 새로 열렸으면 True"""
+        with self._lock:
+            self._probing = False
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                opened = self.state != 'open'
+                self.state = 'open'
+                self.opened_at = time.time()
+                return opened
+            return False
+
+
+class RetryStats:
+    """공급자별 재시도 지표"""
+
+    FIELDS = ('calls', 'attempts', 'retries', 'successes', 'failures',
+              'short_circuited', 'circuit_opened', 'backoff_seconds')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def add(self, provider, field, amount=1):
+        with self._lock:
+            stats = self._stats.setdefault(provider, dict.fromkeys(self.FIELDS, 0))
+            stats[field] += amount
+
+    def snapshot(self):
+        with self._lock:
+            return {provider: dict(stats) for provider, stats in self._stats.items()}
+
+
+class RetryPolicy:
+    """지터가 있는 지수 백오프 재시도 + 공급자별 서킷 브레이커"""
+
+    def __init__(self, retry_count=3, base_delay=1.0, max_delay=30.0,
+                 failure_threshold=5, reset_timeout=60.0):
+        self.retry_count = retry_count
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.stats = RetryStats()
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, provider):
+        with self._lock:
+            if provider not in self._breakers:
+                self._breakers[provider] = CircuitBreaker(
+                    provider, self.failure_threshold, self.reset_timeout
+                )
+            return self._breakers[provider]
+
+    def backoff(self, attempt, error=None):
+        """attempt번째 재시도 전 대기 시간 (full jitter, 429면 Retry-After 이상)"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if status_code_of(error) == 429:
+            response = getattr(error, 'response', None)
+            headers = getattr(response, 'headers', None) or {}
+            try:
+                delay = max(delay, float(headers.get('Retry-After', 0)))
+            except (TypeError, ValueError):
+                pass
+        return min(delay, self.max_delay)
+
+    def call(self, provider, fn, idempotent=True):
+        """
+        fn()을 재시도 정책에 따라 실행
+
+        Args:
+            provider: 'gemini' / 'openai' / 'did'
+            fn: 인자 없는 호출 함수
+            idempotent: False면 is_safe_to_resend인 오류만 재시도 (중복 과금 방지)
+
+        Returns:
+            fn()의 반환값 (재시도 모두 실패하면 마지막 예외를 다시 발생)
+        """
+        breaker = self.breaker(provider)
+        self.stats.add(provider, 'calls')
+
+        attempt = 0
+        while True:
+            try:
+                breaker.before_call()
+            except CircuitOpenError:
+                self.stats.add(provider, 'short_circuited')
+                report_congestion()
+                raise
+
+            self.stats.add(provider, 'attempts')
+            try:
+                result = fn()
+            except Exception as e:
+                if not is_retryable(e):
+                    # 요청 자체가 잘못된 경우: 공급자 장애도 회복 신호도 아니므로 서킷 상태 유지
+                    breaker.record_neutral()
+                    self.stats.add(provider, 'failures')
+                    raise
+                # 단계별 동시성 제어기에 혼잡 신호 (AIMD 감소)
+                report_congestion()
+                if breaker.record_failure():
+                    self.stats.add(provider, 'circuit_opened')
+                if attempt >= self.retry_count or not (idempotent or is_safe_to_resend(e)):
+                    self.stats.add(provider, 'failures')
+                    raise
+                delay = self.backoff(attempt, e)
+                self.stats.add(provider, 'retries')
+                self.stats.add(provider, 'backoff_seconds', delay)
+                warning(f"   🔁 {provider} 일시 오류 ({e}), {delay:.1f}초 후 재시도 "
+                        f"({attempt + 1}/{self.retry_count})")
+                with span('retry.backoff', kind='retry', provider=provider,
+                          attempt=attempt + 1, delay=round(delay, 3), error=str(e)):
+                    time.sleep(delay)
+                attempt += 1
+                continue
+
+            breaker.record_success()
+            self.stats.add(provider, 'successes')
+            return result
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_retry_policy(config_path='config/config.json'):
+    """config.json의 automation.retry_count + retry 섹션으로 공용 정책 생성"""
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            settings = dict(DEFAULT_RETRY_CONFIG)
+            try:
+                config = read_json(config_path)
+                settings['retry_count'] = config.get('automation', {}).get('retry_count', settings['retry_count'])
+                settings.update({key: value for key, value in config.get('retry', {}).items()
+                                 if key in DEFAULT_RETRY_CONFIG})
+            except (OSError, ValueError):
+                pass
+            _policy = RetryPolicy(**settings)
+        return _policy
+
+
+def format_retry_stats():
+    """재시도가 발생한 공급자만 한 줄 요약 (없으면 빈 문자열)"""
+    lines = []
+    for provider, stats in get_retry_policy().stats.snapshot().items():
+        if stats['retries'] or stats['failures'] or stats['short_circuited']:
+            lines.append(
+                f"   {provider}: 호출 {stats['calls']} / 재시도 {stats['retries']} / "
+                f"실패 {stats['failures']} / 차단 {stats['short_circuited']} "
+                f"(백오프 {stats['backoff_seconds']:.1f}초)"
+            )
+    return '\n'.join(lines)
@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""
+실행 카탈로그 (SQLite)
+결과 JSON을 저장하는 함수들(save_result / save_versions / save_metadata / save_script / _save_result)이
+파일을 쓰는 같은 블록 안에서 카탈로그에 행을 추가하고, 블록이 끝날 때 한 트랜잭션으로 커밋.
+언어 / 주제 / 키워드 / 제목 / 상태 / 시각 인덱스로 "지난주에 키워드 X를 쓴 비디오" 같은 질문을
+디렉터리를 뒤지지 않고 바로 조회
+
+    with catalog_transaction() as catalog:
+        write_json(filepath, result, human=True)
+        catalog.add('result', filepath, result)   # 블록 안에서 예외가 나면 아무것도 기록되지 않음
+
+    python run_catalog.py query --keyword 청년도약계좌 --since 7d
+    python run_catalog.py query --language en --status rendered --json
+    python run_catalog.py show 42
+    python run_catalog.py stats
+    python run_catalog.py index        # 카탈로그 이전에 만들어진 결과 파일 가져오기
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from tracing import current_span
+from event_bus import warning
+from serialization import read_json
+
+DEFAULT_CATALOG_CONFIG = {
+    'enabled': True,
+    'path': 'output/.state/catalog.db'
+}
+
+# 종류 → (파이프라인, 예전 파일을 가져올 때 찾을 위치)
+# versions / metadata는 output_layout 샤드 폴더까지 (**는 평면 폴더도 포함)
+KINDS = {
+    'result': ('auto', 'output/results/result_*.json'),
+    'versions': ('multilingual', 'input/scripts/versions/**/*.json'),
+    'metadata': ('main', 'output/optimized/**/*_metadata.json'),
+    'script': ('keyword', 'input/scripts/keyword_selected_*.json'),
+    'shorts': ('shorts', 'output/shorts/*.json')
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    pipeline TEXT,
+    path TEXT NOT NULL UNIQUE,
+    created_at REAL NOT NULL,
+    language TEXT,
+    topic TEXT,
+    title TEXT,
+    status TEXT,
+    source TEXT,
+    trace_id TEXT
+);
+CREATE TABLE IF NOT EXISTS artifact_keywords (
+    artifact_id INTEGER NOT NULL REFERENCES artifacts(id) ON DELETE CASCADE,
+    keyword TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    PRIMARY KEY (artifact_id, normalized)
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_language ON artifacts (language, created_at);
+CREATE INDEX IF NOT EXISTS idx_artifacts_topic ON artifacts (topic, created_at);
+-- 제목은 부분 일치(LIKE '%…%') 검색이라 인덱스를 쓸 수 없음: 예전 카탈로그의 쓰지 않는 인덱스 제거
+DROP INDEX IF EXISTS idx_artifacts_title;
+CREATE INDEX IF NOT EXISTS idx_artifacts_status ON artifacts (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_artifacts_created ON artifacts (created_at);
+CREATE INDEX IF NOT EXISTS idx_artifacts_kind ON artifacts (kind, created_at);
+CREATE INDEX IF NOT EXISTS idx_keywords_normalized ON artifact_keywords (normalized, artifact_id);
+"""
+
+COLUMNS = ('id', 'kind', 'pipeline', 'path', 'created_at', 'language', 'topic', 'title',
+           'status', 'source', 'trace_id')
+
+
+def load_catalog_config(config_path='config/config.json'):
+    """config.json의 catalog 섹션 로드 (없으면 기본값)"""
+    settings = dict(DEFAULT_CATALOG_CONFIG)
+    try:
+        settings.update(read_json(config_path).get('catalog', {}))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+def normalize_keyword(keyword):
+    """'#청년 도약계좌' / '청년도약계좌' / 'AirPods' → 같은 검색 키 (앞 #, 공백, 대소문자 무시)"""
+    return ''.join(str(keyword).lstrip('#').split()).lower()
+
+
+def _keyword_texts(items):
+    """['a', {'text': 'b'}, ...] 또는 문자열 하나(검색어 구문) → 키워드 문자열 목록"""
+    if not items:
+        return []
+    if isinstance(items, str):
+        return [items]
+    texts = []
+    for item in items:
+        if isinstance(item, dict):
+            item = item.get('text') or item.get('keyword')
+        if item:
+            texts.append(str(item))
+    return texts
+
+
+def _parse_time(value):
+    """ISO 문자열 / 'YYYY-MM-DD HH:MM:SS' → epoch (실패하면 None)"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+
+def _video_status(paths):
+    """비디오 파일이 실제로 있는지로 상태 결정"""
+    paths = [path for path in paths if path]
+    if not paths:
+        return 'failed'
+    # output_layout migrate로 옮겨진 비디오도 찾음
+    from output_layout import get_layout
+    layout = get_layout()
+    existing = sum(1 for path in paths if layout.resolve(path) is not None)
+    if existing == len(paths):
+        return 'rendered'
+    return 'partial' if existing else 'simulated'
+
+
+# 종류별 필드 추출 ------------------------------------------------------------
+
+def _fields_result(data):
+    """auto_video_creator.save_result"""
+    return {
+        'language': data.get('language'),
+        'topic': data.get('topic'),
+        'title': data.get('title'),
+        'status': _video_status([video.get('video_path') for video in data.get('videos', [])]),
+        'source': data.get('source_image'),
+        'created_at': _parse_time(data.get('created_at')),
+        'keywords': _keyword_texts(data.get('keywords'))
+    }
+
+
+def _fields_versions(data):
+    """multilingual_selector.save_versions (버전 1개)"""
+    return {
+        'language': data.get('language'),
+        'title': data.get('title'),
+        'status': 'draft',
+        'source': data.get('version_id'),
+        'created_at': _parse_time(data.get('created_at')),
+        'keywords': []
+    }
+
+
+def _fields_metadata(data):
+    """main.save_metadata"""
+    optimized = data.get('optimized') or {}
+    analysis = data.get('analysis') or {}
+    return {
+        'language': data.get('language'),
+        'status': _video_status([data.get('video')]) if 'video' in data else None,
+        'topic': analysis.get('main_topic'),
+        'title': optimized.get('title'),
+        'source': data.get('name'),
+        'created_at': _parse_time(data.get('timestamp')),
+        'keywords': _keyword_texts(optimized.get('hashtags')) + _keyword_texts(analysis.get('high_revenue_keywords'))
+    }
+
+
+def _fields_script(data):
+    """keyword_selector.save_script"""
+    thumbnail = data.get('thumbnail_text') or {}
+    return {
+        'language': data.get('voice_id', '').split('-')[0] or None,
+        'topic': thumbnail.get('main'),
+        'title': data.get('title'),
+        'status': 'draft',
+        'keywords': _keyword_texts(data.get('hashtags'))
+    }
+
+
+def _fields_shorts(data):
+    """shorts_creator._save_result"""
+    return {
+        'language': data.get('language'),
+        'topic': data.get('product'),
+        'status': 'ready',
+        'source': data.get('platform'),
+        'keywords': _keyword_texts(data.get('chinese_keywords'))
+    }
+
+
+EXTRACTORS = {
+    'result': _fields_result,
+    'versions': _fields_versions,
+    'metadata': _fields_metadata,
+    'script': _fields_script,
+    'shorts': _fields_shorts
+}
+
+
+class CatalogBatch:
+    """catalog_transaction() 블록 안에서 모은 행 (블록이 정상 종료되면 한 번에 커밋)"""
+
+    def __init__(self):
+        self.rows = []
+
+    def add(self, kind, path, data, **fields):
+        """
+        결과 파일 1개를 카탈로그에 추가
+
+        Args:
+            kind: KINDS 중 하나
+            path: 저장한 파일 경로 (같은 경로면 덮어씀)
+            data: 파일에 쓴 내용 (종류별로 언어 / 주제 / 제목 / 키워드 추출)
+            fields: 추출값 덮어쓰기 (topic=..., keywords=[...], status=... 등)
+        """
+        row = EXTRACTORS[kind](data)
+        row.update({key: value for key, value in fields.items() if value is not None})
+        span = current_span()
+        row.update(kind=kind, pipeline=KINDS[kind][0], path=str(path),
+                   trace_id=span.trace_id if span is not None else None)
+        if not row.get('created_at'):
+            row['created_at'] = time.time()
+        row['keywords'] = _keyword_texts(row.get('keywords'))
+        self.rows.append(row)
+
+
+class RunCatalog:
+    """artifacts + artifact_keywords 테이블 (스레드마다 연결 1개)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def commit(self, rows):
+        """행 목록을 한 트랜잭션으로 기록 (같은 경로의 예전 행은 교체). 기록한 id 목록 반환"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            ids = []
+            for row in rows:
+                conn.execute("DELETE FROM artifacts WHERE path = ?", (row['path'],))
+                cursor = conn.execute(
+                    "INSERT INTO artifacts (kind, pipeline, path, created_at, language, topic, title, status, "
+                    "source, trace_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    tuple(row.get(column) for column in COLUMNS[1:])
+                )
+                keywords = {}
+                for keyword in row['keywords']:
+                    normalized = normalize_keyword(keyword)
+                    if normalized:
+                        keywords.setdefault(normalized, keyword)
+                conn.executemany(
+                    "INSERT INTO artifact_keywords (artifact_id, keyword, normalized) VALUES (?, ?, ?)",
+                    [(cursor.lastrowid, keyword, normalized) for normalized, keyword in keywords.items()]
+                )
+                ids.append(cursor.lastrowid)
+            conn.execute('COMMIT')
+            return ids
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def query(self, kind=None, language=None, topic=None, keyword=None, title=None, status=None,
+              since=None, until=None, limit=50):
+        """
+        조건에 맞는 행 (최신순)
+
+        Args:
+            keyword: normalize_keyword 기준 일치
+            title: 제목 일부 (대소문자 무시)
+            since, until: epoch
+        """
+        clauses, params = [], []
+        for column, value in (('kind', kind), ('language', language), ('topic', topic), ('status', status)):
+            if value:
+                clauses.append(f"a.{column} = ?")
+                params.append(value)
+        if keyword:
+            clauses.append("a.id IN (SELECT artifact_id FROM artifact_keywords WHERE normalized = ?)")
+            params.append(normalize_keyword(keyword))
+        if title:
+            clauses.append("a.title LIKE ?")
+            params.append(f"%{title}%")
+        if since is not None:
+            clauses.append("a.created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("a.created_at < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._conn().execute(
+            f"SELECT a.*, (SELECT group_concat(keyword, ', ') FROM artifact_keywords k "
+            f"WHERE k.artifact_id = a.id) AS keywords "
+            f"FROM artifacts a {where} ORDER BY a.created_at DESC LIMIT ?",
+            (*params, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def set_status(self, statuses):
+        """{경로: 상태} 한 트랜잭션으로 갱신 (retention.py가 보관 / 삭제한 파일)"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany("UPDATE artifacts SET status = ? WHERE path = ?",
+                             [(status, path) for path, status in statuses.items()])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def move_path(self, old, new):
+        """파일이 옮겨졌을 때 (output_layout migrate) 경로 갱신"""
+        self._conn().execute("UPDATE artifacts SET path = ? WHERE path = ?", (new, old))
+
+    def known_paths(self):
+        return {row[0] for row in self._conn().execute("SELECT path FROM artifacts")}
+
+    def get(self, artifact_id):
+        rows = self._conn().execute(
+            "SELECT a.*, (SELECT group_concat(keyword, ', ') FROM artifact_keywords k "
+            "WHERE k.artifact_id = a.id) AS keywords FROM artifacts a WHERE a.id = ?", (artifact_id,)
+        ).fetchall()
+        return dict(rows[0]) if rows else None
+
+    def stats(self):
+        """종류 / 언어 / 상태별 개수 + 자주 쓴 키워드"""
+        conn = self._conn()
+        result = {'total': conn.execute("SELECT count(*) FROM artifacts").fetchone()[0]}
+        for column in ('kind', 'language', 'status'):
+            result[column] = {row[0] or '-': row[1] for row in conn.execute(
+                f"SELECT {column}, count(*) FROM artifacts GROUP BY {column} ORDER BY count(*) DESC")}
+        result['top_keywords'] = {row[0]: row[1] for row in conn.execute(
+            "SELECT min(keyword), count(*) FROM artifact_keywords GROUP BY normalized "
+            "ORDER BY count(*) DESC LIMIT 20")}
+        return result
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """공용 카탈로그 (config.json의 catalog 섹션, 꺼져 있으면 None)"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            settings = load_catalog_config()
+            if not settings['enabled']:
+                return None
+            _catalog = RunCatalog(settings['path'])
+        return _catalog
+
+
+@contextmanager
+def catalog_transaction():
+    """
+    결과 파일 저장 블록. 블록 안에서 add()한 행은 블록이 정상 종료될 때 한 트랜잭션으로 기록
+    (파일 쓰기가 실패하면 카탈로그에도 남지 않음). 카탈로그 기록이 실패해도 결과 저장은 계속
+    """
+    batch = CatalogBatch()
+    yield batch
+    if not batch.rows:
+        return
+    try:
+        catalog = get_catalog()
+        if catalog is not None:
+            catalog.commit(batch.rows)
+    except Exception as e:
+        warning(f"⚠️  카탈로그 기록 실패 (결과 파일은 저장됨): {e}")
+
+
+def import_existing(catalog, root='.'):
+    """
+    카탈로그 이전에 만들어진 결과 파일 가져오기 (종류별 위치를 한 번 훑음, 이미 있는 경로는 건너뜀)
+
+    Returns:
+        dict: 종류별 가져온 파일 수
+    """
+    counts = {}
+    known = catalog.known_paths()
+    for kind, (_, pattern) in KINDS.items():
+        batch = CatalogBatch()
+        for path in sorted(Path(root).glob(pattern)):
+            if str(path) in known:
+                continue
+            try:
+                data = read_json(path)
+            except (OSError, ValueError):
+                continue
+            if not isinstance(data, dict):
+                continue
+            batch.add(kind, path, data, created_at=_parse_time(data.get('created_at')) or path.stat().st_mtime)
+        if batch.rows:
+            catalog.commit(batch.rows)
+        counts[kind] = len(batch.rows)
+    return counts
+
+
+def parse_since(value):
+    """'7d' / '12h' / '30m' / '2024-05-01' → epoch"""
+    if value is None:
+        return None
+    units = {'d': 86400, 'h': 3600, 'm': 60}
+    if value[-1:] in units and value[:-1].replace('.', '', 1).isdigit():
+        return time.time() - float(value[:-1]) * units[value[-1]]
+    parsed = _parse_time(value)
+    if parsed is None:
+        raise argparse.ArgumentTypeError(f"기간 형식 오류: {value} (예: 7d, 12h, 2024-05-01)")
+    return parsed
+
+
+def _format_row(row):
+    created = datetime.fromtimestamp(row['created_at']).strftime('%Y-%m-%d %H:%M')
+    line = f"#{row['id']:<5} {created}  {row['kind']:<8} {row['language'] or '-':<3} {row['status'] or '-':<9} "
+    line += f"{row['title'] or row['topic'] or '-'}"
+    line += f"\n       {row['path']}"
+    if row.get('keywords'):
+        line += f"\n       🔑 {row['keywords']}"
+    return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='실행 카탈로그 조회')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    query = sub.add_parser('query', help='조건 검색 (최신순)')
+    query.add_argument('--kind', choices=list(KINDS))
+    query.add_argument('--language')
+    query.add_argument('--topic')
+    query.add_argument('--keyword', help='키워드 일치 (#, 공백, 대소문자 무시)')
+    query.add_argument('--title', help='제목 일부')
+    query.add_argument('--status', help='rendered / partial / simulated / failed / draft / ready')
+    query.add_argument('--since', type=parse_since, help='7d / 12h / 2024-05-01')
+    query.add_argument('--until', type=parse_since)
+    query.add_argument('--limit', type=int, default=50)
+    query.add_argument('--json', action='store_true', help='JSON으로 출력')
+
+    show = sub.add_parser('show', help='행 1개 + 파일 내용')
+    show.add_argument('id', type=int)
+
+    sub.add_parser('stats', help='종류 / 언어 / 상태별 개수')
+
+    index = sub.add_parser('index', help='기존 결과 파일 가져오기')
+    index.add_argument('--root', default='.')
+
+    args = parser.parse_args(argv)
+    settings = load_catalog_config()
+    catalog = RunCatalog(settings['path'])
+
+    if args.command == 'query':
+        start = time.perf_counter()
+        rows = catalog.query(kind=args.kind, language=args.language, topic=args.topic, keyword=args.keyword,
+                             title=args.title, status=args.status, since=args.since, until=args.until,
+                             limit=args.limit)
+        elapsed = (time.perf_counter() - start) * 1000
+        if args.json:
+            print(json.dumps(rows, ensure_ascii=False, indent=2))
+            return 0
+        for row in rows:
+            print(_format_row(row))
+        print(f"\n🔎 {len(rows)}건 ({elapsed:.1f}ms)")
+    elif args.command == 'show':
+        row = catalog.get(args.id)
+        if row is None:
+            print(f"❌ #{args.id} 없음")
+            return 1
+        print(_format_row(row))
+        if row['trace_id']:
+            print(f"       🧭 trace_id {row['trace_id']}")
+        if os.path.exists(row['path']):
+            with open(row['path'], 'r', encoding='utf-8') as f:
+                print(f.read())
+        else:
+            from retention import read_archived
+            archived = read_archived(row['path'])
+            if archived is not None:
+                print("       🗄️  보관 파일에서 읽음")
+                print(archived)
+            else:
+                print("       ⚠️  파일이 없습니다 (이동 / 삭제됨)")
+    elif args.command == 'stats':
+        print(json.dumps(catalog.stats(), ensure_ascii=False, indent=2))
+    else:
+        start = time.perf_counter()
+        counts = import_existing(catalog, args.root)
+        print(f"📚 {sum(counts.values())}개 파일 가져옴 ({time.perf_counter() - start:.1f}초): "
+              + ', '.join(f"{kind} {count}" for kind, count in counts.items()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+실행 저널 (추가 전용 JSONL)
+끝난 작업 단위(이미지 / 버전 / 언어) 1개 = JSON 한 줄. 결과 파일을 통째로 다시 쓰지 않고 줄만 덧붙임.
+한 줄은 write() 한 번으로 기록되어 tail하는 쪽은 바로 보이고, fsync는 fsync_every 줄 또는
+fsync_interval_seconds마다 한 번 (그룹 커밋). 죽어도 잃는 것은 마지막 fsync 이후 줄뿐
+
+    record('version', 'rendered', pipeline='auto', image='a.jpg', language='ko', version_id='v1', path=...)
+    record('image', 'failed', pipeline='main', image='b.jpg', error='...')
+
+파일: output/journal/journal_<시각>_<pid>_<순번>.jsonl (max_segment_mb를 넘으면 새 파일로 교체)
+쓰는 중인 파일은 flock으로 잠겨 있어 압축기가 구분함. 압축기는 파일별로 읽은 위치를 기억하고
+새 줄만 output/journal/summary.json 집계에 더한 뒤, 다 읽은 닫힌 파일은 지움
+
+    tail -F output/journal/journal_*.jsonl      # 실시간 대시보드
+    python run_journal.py tail -n 20
+    python run_journal.py compact
+    python run_journal.py summary
+"""
+
+import os
+import sys
+import time
+import atexit
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from tracing import current_span
+from event_bus import progress, warning
+from serialization import read_json, write_json, dump_bytes, loads, dumps
+
+DEFAULT_JOURNAL_CONFIG = {
+    'enabled': True,
+    'dir': 'output/journal',
+    'max_segment_mb': 16,
+    'fsync_every': 64,
+    'fsync_interval_seconds': 1.0,
+    # 파이프라인 실행 중 백그라운드 압축
+    'compact': True,
+    'compact_interval_seconds': 300,
+    # 다 읽은 닫힌 파일 삭제 (false면 남겨 둠)
+    'delete_folded': True,
+    'state': 'output/.state/journal.json'
+}
+
+
+def load_journal_config(config_path='config/config.json'):
+    """config.json의 journal 섹션 로드 (JOURNAL=0/1로 덮어쓰기)"""
+    settings = dict(DEFAULT_JOURNAL_CONFIG)
+    try:
+        settings.update(read_json(config_path).get('journal', {}))
+    except (OSError, ValueError):
+        pass
+    if os.getenv('JOURNAL'):
+        settings['enabled'] = os.getenv('JOURNAL').lower() not in ('0', 'false', 'no')
+    return settings
+
+
+def _try_lock(fd, exclusive=True):
+    """비차단 flock (잡았으면 True, fcntl이 없는 환경은 항상 True)"""
+    try:
+        import fcntl
+    except ImportError:
+        return True
+    try:
+        fcntl.flock(fd, (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+class RunJournal:
+    """프로세스마다 1개. 현재 세그먼트에 줄을 덧붙이고 fsync는 모아서"""
+
+    def __init__(self, directory, max_segment_bytes=16 * 1024 * 1024, fsync_every=64,
+                 fsync_interval=1.0, enabled=True):
+        self.directory = Path(directory)
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval = fsync_interval
+        self.enabled = enabled
+        self.path = None
+        self.entries = 0
+        self._fd = None
+        self._size = 0
+        self._segments = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._syncer = None
+
+    def _open_segment(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._segments += 1
+        self.path = self.directory / (f"journal_{datetime.now().strftime('%Y%m%d_%H%M%S')}_"
+                                      f"{os.getpid()}_{self._segments}.jsonl")
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o666)
+        # 쓰는 동안 잠가 두면 압축기가 닫힌 파일과 구분 (프로세스가 죽으면 커널이 풀어 줌)
+        _try_lock(self._fd)
+        self._size = 0
+        if self._segments == 1:
+            atexit.register(self.close)
+
+    def _close_segment(self):
+        if self._fd is None:
+            return
+        if self._pending:
+            os.fsync(self._fd)
+            self._pending = 0
+        os.close(self._fd)
+        self._fd = None
+
+    def append(self, unit, status='ok', **fields):
+        """작업 단위 1개 기록 (값이 None인 필드는 생략)"""
+        if not self.enabled:
+            return
+        entry = {'ts': round(time.time(), 3), 'unit': unit, 'status': status, 'pid': os.getpid()}
+        entry.update((key, value) for key, value in fields.items() if value is not None)
+        span = current_span()
+        if span is not None:
+            entry.setdefault('trace_id', span.trace_id)
+        line = dump_bytes(entry) + b'\n'
+        with self._lock:
+            if self._fd is None:
+                self._open_segment()
+            elif self._size and self._size + len(line) > self.max_segment_bytes:
+                self._close_segment()
+                self._open_segment()
+            os.write(self._fd, line)
+            self._size += len(line)
+            self._pending += 1
+            self.entries += 1
+            if self._pending >= self.fsync_every:
+                os.fsync(self._fd)
+                self._pending = 0
+            elif self._syncer is None:
+                self._syncer = threading.Thread(target=self._sync_loop, name='journal-fsync', daemon=True)
+                self._syncer.start()
+
+    def _sync_loop(self):
+        """fsync_every 줄이 안 차도 fsync_interval_seconds 안에는 디스크에 반영"""
+        while not self._stop.wait(self.fsync_interval):
+            with self._lock:
+                if self._fd is not None and self._pending:
+                    os.fsync(self._fd)
+                    self._pending = 0
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            self._close_segment()
+
+
+def _new_summary():
+    return {'entries': 0, 'units': {}, 'pipelines': {}, 'languages': {}, 'days': {},
+            'render_seconds': 0.0, 'first_ts': None, 'last_ts': None, 'last': None}
+
+
+def _count(table, key, status):
+    row = table.setdefault(str(key), {})
+    row[status] = row.get(status, 0) + 1
+
+
+def fold(summary, entry):
+    """저널 줄 1개를 집계에 더함"""
+    unit = entry.get('unit', '?')
+    status = entry.get('status', 'ok')
+    ts = entry.get('ts') or time.time()
+    summary['entries'] += 1
+    _count(summary['units'], unit, status)
+    if entry.get('pipeline'):
+        _count(summary['pipelines'], f"{entry['pipeline']}/{unit}", status)
+    if entry.get('language'):
+        _count(summary['languages'], entry['language'], unit)
+    _count(summary['days'], datetime.fromtimestamp(ts).strftime('%Y-%m-%d'), unit)
+    if isinstance(entry.get('render_seconds'), (int, float)):
+        summary['render_seconds'] = round(summary['render_seconds'] + entry['render_seconds'], 3)
+    if summary['first_ts'] is None or ts < summary['first_ts']:
+        summary['first_ts'] = ts
+    if summary['last_ts'] is None or ts >= summary['last_ts']:
+        summary['last_ts'] = ts
+        summary['last'] = entry
+
+
+class JournalCompactor:
+    """닫혔거나 쓰는 중인 세그먼트의 새 줄을 summary.json에 접어 넣음"""
+
+    def __init__(self, settings=None):
+        self.settings = settings or load_journal_config()
+        self.directory = Path(self.settings['dir'])
+        self.state_path = Path(self.settings['state'])
+        self.summary_path = self.directory / 'summary.json'
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def segments(self):
+        return sorted(self.directory.glob('journal_*.jsonl'))
+
+    def _load_state(self):
+        try:
+            state = read_json(self.state_path)
+        except (OSError, ValueError):
+            state = {}
+        state.setdefault('offsets', {})
+        state.setdefault('summary', _new_summary())
+        return state
+
+    def _sealed(self, path):
+        """쓰는 프로세스가 없는 세그먼트인지 (잠금을 잡아 보고 바로 놓음)"""
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return False
+        try:
+            return _try_lock(fd)
+        finally:
+            os.close(fd)
+
+    def compact_once(self):
+        """
+        한 번 압축 (다른 프로세스가 압축 중이면 건너뜀)
+
+        Returns:
+            dict: entries(새로 접은 줄) / segments / removed / torn(잘린 마지막 줄) / skipped
+        """
+        report = {'entries': 0, 'segments': 0, 'removed': 0, 'torn': 0, 'skipped': False}
+        lock_path = self.state_path.with_suffix('.lock')
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(lock_path, 'a') as lock_file:
+            if not _try_lock(lock_file.fileno()):
+                report['skipped'] = True
+                return report
+            state = self._load_state()
+            offsets, summary = state['offsets'], state['summary']
+            finished = []
+            for path in self.segments():
+                # 닫혔는지 먼저 확인해야 확인 직후 추가된 줄을 놓치지 않음
+                sealed = self._sealed(path)
+                offset = offsets.get(path.name, 0)
+                with open(path, 'rb') as f:
+                    f.seek(offset)
+                    data = f.read()
+                end = data.rfind(b'\n') + 1
+                for line in data[:end].splitlines():
+                    try:
+                        fold(summary, loads(line))
+                        report['entries'] += 1
+                    except ValueError:
+                        report['torn'] += 1
+                offsets[path.name] = offset + end
+                report['segments'] += 1
+                if sealed:
+                    if end < len(data):
+                        # 쓰다가 죽은 마지막 줄 (다시 세지 않게 건너뜀)
+                        report['torn'] += 1
+                        offsets[path.name] = offset + len(data)
+                    finished.append(path)
+            # 지워진 세그먼트의 위치 정보 정리
+            existing = {path.name for path in self.segments()}
+            state['offsets'] = {name: offset for name, offset in offsets.items() if name in existing}
+            summary['updated_at'] = datetime.now().isoformat()
+            write_json(self.state_path, state)
+            # 세그먼트가 아직 하나도 없으면 저널 폴더도 없음
+            self.summary_path.parent.mkdir(parents=True, exist_ok=True)
+            write_json(self.summary_path, summary, human=True)
+            if self.settings['delete_folded']:
+                for path in finished:
+                    try:
+                        path.unlink()
+                        report['removed'] += 1
+                    except OSError:
+                        pass
+        return report
+
+    def _loop(self):
+        while not self._stop.wait(self.settings['compact_interval_seconds']):
+            try:
+                report = self.compact_once()
+                if report['entries']:
+                    progress(f"📒 저널 압축: {report['entries']}줄 → {self.summary_path}")
+            except Exception as e:
+                warning(f"⚠️  저널 압축 실패: {e}")
+
+    def start(self):
+        """compact가 켜져 있으면 백그라운드 스레드 시작 (첫 압축은 compact_interval_seconds 뒤)"""
+        if self.settings['enabled'] and self.settings['compact'] and self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='journal-compactor', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+_journal = None
+_compactor = None
+_journal_lock = threading.Lock()
+
+
+def get_journal():
+    """공용 저널 (config.json의 journal 섹션)"""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            settings = load_journal_config()
+            _journal = RunJournal(settings['dir'], int(settings['max_segment_mb'] * 1024 * 1024),
+                                  settings['fsync_every'], settings['fsync_interval_seconds'],
+                                  settings['enabled'])
+        return _journal
+
+
+def get_compactor():
+    """공용 압축기"""
+    global _compactor
+    with _journal_lock:
+        if _compactor is None:
+            _compactor = JournalCompactor()
+        return _compactor
+
+
+def record(unit, status='ok', **fields):
+    """get_journal().append() 줄임"""
+    get_journal().append(unit, status, **fields)
+
+
+def _tail(settings, lines):
+    """최근 세그먼트부터 거꾸로 lines줄"""
+    found = []
+    for path in reversed(sorted(Path(settings['dir']).glob('journal_*.jsonl'))):
+        with open(path, 'rb') as f:
+            chunk = [line for line in f.read().splitlines() if line.strip()]
+        found = chunk[-(lines - len(found)):] + found
+        if len(found) >= lines:
+            break
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='실행 저널 (JSONL) 조회 / 압축')
+    sub = parser.add_subparsers(dest='command', required=True)
+    tail = sub.add_parser('tail', help='최근 줄 출력')
+    tail.add_argument('-n', type=int, default=20)
+    sub.add_parser('compact', help='새 줄을 summary.json에 접고 다 읽은 닫힌 파일 삭제')
+    sub.add_parser('summary', help='summary.json 출력')
+    args = parser.parse_args(argv)
+
+    settings = load_journal_config()
+    if args.command == 'tail':
+        for line in _tail(settings, args.n):
+            print(line.decode('utf-8', 'replace'))
+    elif args.command == 'compact':
+        start = time.perf_counter()
+        report = JournalCompactor(settings).compact_once()
+        if report['skipped']:
+            print("⏭️  다른 프로세스가 압축 중입니다.")
+            return 0
+        print(f"📒 {report['entries']}줄 압축 (세그먼트 {report['segments']}개, 삭제 {report['removed']}개, "
+              f"잘린 줄 {report['torn']}개, {time.perf_counter() - start:.2f}초)")
+    else:
+        try:
+            summary = read_json(Path(settings['dir']) / 'summary.json')
+        except (OSError, ValueError):
+            print("❌ 아직 압축된 저널이 없습니다 (python run_journal.py compact)")
+            return 1
+        print(dumps(summary, pretty=True))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+파이프라인 공용 레코드 (키워드 / 제목 / 분석 결과 / 버전 / 비디오)
+단계마다 dict를 복사하고 키를 다시 붙이던 것을 __slots__ 데이터클래스 하나로 통일.
+인스턴스에 __dict__가 없어 대량 배치에서 메모리가 줄고, 필드 접근도 dict 조회보다 빠름.
+
+두 선택기의 분석 형식을 하나로 읽음
+    KeywordSelector:             high_revenue_keywords[{'keyword'}] + longtail_keywords['...'] + recommended_titles[{'title'}]
+    MultilingualKeywordSelector: keywords[{'text'}] + titles[{'text'}]
+
+    analysis = Analysis.from_dict(loads(text))
+    analysis.keyword_texts([0, 2])             # 선택 번호 → 키워드 문자열
+    analysis.best_title().text
+    write_json(path, version, human=True)      # 레코드를 그대로 저장
+
+직렬화: orjson / msgspec은 데이터클래스를 중간 dict 없이 바로 JSON으로 쓰고,
+표준 json은 serialization이 필드 순서대로 변환. 파일 형식은 기존 dict와 같은 키
+"""
+
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def _field_names(cls):
+    return tuple(f.name for f in fields(cls))
+
+
+class Record:
+    """레코드 공통 기능 (슬롯이 없는 기반 클래스라 하위 클래스의 __slots__가 그대로 유지됨)"""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        """JSON에서 읽은 dict → 레코드 (모르는 키는 무시)"""
+        return cls(**{name: data[name] for name in _field_names(cls) if name in data})
+
+    def to_dict(self):
+        """얕은 변환 (안쪽 레코드는 그대로, 직렬화 계층이 다시 변환)"""
+        return {name: getattr(self, name) for name in _field_names(type(self))}
+
+    def get(self, name, default=None):
+        """파일에서 읽은 dict와 같은 코드로 읽을 수 있게 (run_catalog 추출기 등)"""
+        return getattr(self, name, default)
+
+
+@dataclass(slots=True)
+class Keyword(Record):
+    text: str
+    type: str = ''
+    cpc: str = ''
+    competition: str = ''
+    longtail: bool = False
+
+    @classmethod
+    def from_dict(cls, data):
+        """{'text'} / {'keyword'} / 롱테일 문자열 모두 허용"""
+        if isinstance(data, str):
+            return cls(data, type='longtail', longtail=True)
+        return cls(
+            str(data.get('text') or data.get('keyword') or ''),
+            type=data.get('type') or '',
+            cpc=data.get('cpc') or data.get('cpc_potential') or data.get('affiliate_potential') or '',
+            competition=data.get('competition') or '',
+            longtail=bool(data.get('longtail'))
+        )
+
+
+@dataclass(slots=True)
+class Title(Record):
+    text: str
+    hook: str = ''
+    ctr_score: int = 0
+
+    @classmethod
+    def from_dict(cls, data):
+        """{'text'} / {'title'} / 문자열 모두 허용"""
+        if isinstance(data, str):
+            return cls(data)
+        return cls(str(data.get('text') or data.get('title') or ''),
+                   hook=data.get('hook') or '',
+                   ctr_score=data.get('ctr_score') or 0)
+
+
+# Analysis.from_dict가 직접 읽는 키 (나머지는 details에 그대로 보관)
+_ANALYSIS_KEYS = frozenset((
+    'main_keyword', 'keywords', 'high_revenue_keywords', 'longtail_keywords',
+    'titles', 'recommended_titles', 'needs', 'core_needs', 'purchase_needs',
+    'queries', 'search_queries', 'purchase_queries', 'content_strategy', 'details'
+))
+
+
+@dataclass(slots=True)
+class Analysis(Record):
+    """analyze_topic() 결과 (두 선택기 공통)"""
+
+    main_keyword: str
+    keywords: list = field(default_factory=list)
+    titles: list = field(default_factory=list)
+    needs: list = field(default_factory=list)
+    queries: list = field(default_factory=list)
+    content_strategy: dict = field(default_factory=dict)
+    # 프롬프트별 추가 항목 (product_category, shopping_strategy 등)
+    details: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data):
+        """AI 응답 / 기본 키워드 / 저장된 레코드 → Analysis"""
+        if 'keywords' in data:
+            keywords = [Keyword.from_dict(item) for item in data['keywords'] or []]
+        else:
+            keywords = [Keyword.from_dict(item) for item in data.get('high_revenue_keywords') or []]
+            keywords.extend(Keyword.from_dict(item) for item in data.get('longtail_keywords') or [])
+        titles = data.get('titles') or data.get('recommended_titles') or []
+        details = dict(data.get('details') or {})
+        details.update((key, value) for key, value in data.items() if key not in _ANALYSIS_KEYS)
+        strategy = data.get('content_strategy') or details.get('shopping_strategy') or {}
+        return cls(
+            str(data.get('main_keyword') or ''),
+            keywords=keywords,
+            titles=[Title.from_dict(item) for item in titles],
+            needs=list(data.get('needs') or data.get('core_needs') or data.get('purchase_needs') or []),
+            queries=list(data.get('queries') or data.get('search_queries') or data.get('purchase_queries') or []),
+            content_strategy=strategy,
+            details=details
+        )
+
+    def keyword_texts(self, indices=None):
+        """선택 번호(0부터) → 키워드 문자열 (범위 밖 번호는 건너뜀, None이면 전체)"""
+        if indices is None:
+            return [keyword.text for keyword in self.keywords]
+        return [self.keywords[i].text for i in indices if 0 <= i < len(self.keywords)]
+
+    def best_title(self):
+        """CTR 점수가 가장 높은 제목 (없으면 None)"""
+        return max(self.titles, key=lambda title: title.ctr_score, default=None)
+
+
+@dataclass(slots=True)
+class Version(Record):
+    """multilingual_selector.generate_versions()의 버전 1개 (save_versions 파일 형식)"""
+
+    version_id: str
+    language: str
+    style: str
+    tone: str
+    title: str
+    script: str
+    duration: int
+    voice_id: str
+    created_at: str
+    description: str = ''
+
+
+@dataclass(slots=True)
+class VideoRecord(Record):
+    """auto_generate_from_image() 결과의 videos 항목 1개"""
+
+    version_id: str
+    video_path: str
+    title: str
+    script: str
+    description: str
+    style: str = None
+    tone: str = None
+    duration: int = None
+    quality: str = None
+    render_seconds: float = None
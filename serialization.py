@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+JSON 직렬화 계층
+orjson → msgspec → 표준 json 순으로 설치된 것을 사용 (config.json의 serialization.backend로 고정 가능).
+결과 파일(save_* 함수)처럼 사람이 읽는 파일은 들여쓰기, 상태 / 인덱스처럼 기계만 읽는 파일은 압축 형식.
+파일 쓰기는 같은 폴더의 임시 파일(.이름.*.tmp)에 쓴 뒤 os.replace → 읽는 쪽은 반쯤 쓴 JSON을 볼 수 없음
+
+    write_json(path, result, human=True)      # 들여쓰기 (pretty_human이 false면 압축)
+    write_json(path, state)                   # 압축
+    data = read_json(path)                    # 없으면 OSError, 깨졌으면 ValueError
+    line = dumps(event)                       # 한 줄 JSON 문자열 (JSONL / SSE)
+
+schemas의 레코드(슬롯 데이터클래스)는 어느 백엔드든 필드 순서대로 같은 JSON 객체가 됨
+
+선택 설치: pip install orjson (또는 msgspec)
+"""
+
+import os
+import json
+import itertools
+import threading
+import dataclasses
+from pathlib import Path
+
+DEFAULT_SERIALIZATION_CONFIG = {
+    # auto / orjson / msgspec / json
+    'backend': 'auto',
+    # false면 사람이 읽는 파일도 압축 형식 (대량 배치용)
+    'pretty_human': True,
+    # true면 rename 전에 fsync (전원이 나가도 내용 보장, 느림)
+    'fsync': False
+}
+
+_settings = None
+_backend = None
+_backend_lock = threading.Lock()
+_temp_counter = itertools.count()
+
+
+def load_serialization_config(config_path='config/config.json'):
+    """config.json의 serialization 섹션 로드 (순환을 피하려고 여기만 표준 json으로 읽음)"""
+    settings = dict(DEFAULT_SERIALIZATION_CONFIG)
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            settings.update(json.load(f).get('serialization', {}))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+def _orjson():
+    import orjson
+    options = orjson.OPT_NON_STR_KEYS
+
+    def encode(obj, pretty):
+        return orjson.dumps(obj, default=str, option=(options | orjson.OPT_INDENT_2) if pretty else options)
+
+    return 'orjson', encode, orjson.loads
+
+
+def _msgspec():
+    import msgspec
+    encoder = msgspec.json.Encoder(enc_hook=str)
+    decoder = msgspec.json.Decoder()
+
+    def encode(obj, pretty):
+        data = encoder.encode(obj)
+        return msgspec.json.format(data, indent=2) if pretty else data
+
+    return 'msgspec', encode, decoder.decode
+
+
+def _stdlib_default(obj):
+    """schemas 레코드 등 데이터클래스는 필드 순서대로 (orjson / msgspec은 직접 처리), 나머지는 str"""
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+    return str(obj)
+
+
+def _stdlib():
+    def encode(obj, pretty):
+        if pretty:
+            return json.dumps(obj, ensure_ascii=False, indent=2, default=_stdlib_default).encode('utf-8')
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_stdlib_default).encode('utf-8')
+
+    return 'json', encode, json.loads
+
+
+BACKENDS = {'orjson': _orjson, 'msgspec': _msgspec, 'json': _stdlib}
+
+
+def _get_backend():
+    global _backend, _settings
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _settings = load_serialization_config()
+                choice = _settings['backend']
+                names = ('orjson', 'msgspec', 'json') if choice == 'auto' else (choice, 'json')
+                for name in names:
+                    try:
+                        _backend = BACKENDS[name]()
+                        break
+                    except (ImportError, KeyError):
+                        continue
+    return _backend
+
+
+def backend_name():
+    """사용 중인 백엔드 이름 (orjson / msgspec / json)"""
+    return _get_backend()[0]
+
+
+def dump_bytes(obj, pretty=False):
+    """UTF-8 JSON bytes (비ASCII 그대로, 직렬화할 수 없는 값은 str)"""
+    return _get_backend()[1](obj, pretty)
+
+
+def dumps(obj, pretty=False):
+    """JSON 문자열 (압축 형식이면 한 줄)"""
+    return dump_bytes(obj, pretty).decode('utf-8')
+
+
+def loads(data):
+    """str / bytes → 객체 (깨진 JSON은 ValueError)"""
+    return _get_backend()[2](data)
+
+
+def read_json(path):
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def write_json(path, obj, human=False):
+    """
+    원자적 JSON 저장 (임시 파일 → os.replace)
+
+    Args:
+        human: 사람이 읽는 파일이면 True (pretty_human 설정에 따라 들여쓰기)
+    """
+    backend = _get_backend()
+    data = backend[1](obj, human and _settings['pretty_human'])
+    path = Path(path)
+    temp = path.with_name(f".{path.name}.{os.getpid()}.{next(_temp_counter)}.tmp")
+    # umask를 따르도록 os.open으로 생성 (mkstemp는 0600)
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            if _settings['fsync']:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        raise
+    return path
@@ -9,10 +9,15 @@
 """
 
 import argparse
-import json
 import os
 from pathlib import Path
 
+from metrics import stage
+from profiling import add_profile_argument, start_profiling, stop_profiling
+from run_catalog import catalog_transaction
+from serialization import write_json
+from run_journal import record
+
 
 class ShortFormCreator:
     """숏폼 영상 자동 생성기"""
@@ -98,22 +103,26 @@ class ShortFormCreator:
         
         # 1단계: 상품 분석
         print("\n### 1️⃣ 상품 분석")
-        selling_points = self._analyze_product(product_name, product_info)
+        with stage('product_analysis'):
+            selling_points = self._analyze_product(product_name, product_info)
         print(f"✅ 핵심 셀링 포인트: {', '.join(selling_points)}")
         
         # 2단계: 중국어 검색어
         print("\n### 2️⃣ 중국어 검색어 (타오바오용)")
-        chinese_keywords = self._generate_chinese_keywords(product_name)
+        with stage('chinese_keywords'):
+            chinese_keywords = self._generate_chinese_keywords(product_name)
         print(f"✅ {chinese_keywords}")
         
         # 3단계: 대본 작성
         print(f"\n### 3️⃣ {self.LANGUAGES[self.language]} 대본 ({self.video_length}초)")
-        script = self._create_script(product_name, selling_points)
+        with stage('script'):
+            script = self._create_script(product_name, selling_points)
         self._print_script_table(script)
         
         # 4단계: 썸네일
         print("\n### 4️⃣ 썸네일 디자인")
-        thumbnail = self._create_thumbnail_guide(product_name)
+        with stage('thumbnail'):
+            thumbnail = self._create_thumbnail_guide(product_name)
         print(f"✅ {thumbnail}")
         
         # 5단계: 영상 정보
@@ -125,7 +134,8 @@ class ShortFormCreator:
         
         # YouTube 자동 업로드 링크
         if self.platform == 'youtube':
-            self.youtube_upload_url = self._generate_youtube_upload_link(product_name, script, thumbnail)
+            with stage('upload_link'):
+                self.youtube_upload_url = self._generate_youtube_upload_link(product_name, script, thumbnail)
             print(f"\n### 6️⃣ YouTube 자동 업로드")
             print(f"✅ 업로드 링크:")
             print(f"   {self.youtube_upload_url}")
@@ -149,7 +159,8 @@ class ShortFormCreator:
             'youtube_upload_url': self.youtube_upload_url if self.platform == 'youtube' else None
         }
         
-        self._save_result(result)
+        with stage('save'):
+            self._save_result(result)
         
         return result
     
@@ -391,8 +402,11 @@ class ShortFormCreator:
         filename = f"{result['product']}_{self.platform}_{self.language}_{self.video_length}s.json"
         filepath = output_dir / filename
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        with catalog_transaction() as catalog:
+            write_json(filepath, result, human=True)
+            catalog.add('shorts', filepath, result)
+        record('shorts', 'ready', pipeline='shorts', language=self.language, platform=self.platform,
+               product=result['product'], path=str(filepath))
         
         print(f"\n✅ 결과 저장: {filepath}")
         
@@ -436,7 +450,7 @@ class ShortFormCreator:
             print(f"✅ YouTube 업로드 정보 저장: {upload_info_path}")
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description='🎬 쇼핑 숏폼 영상 제작',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -466,8 +480,10 @@ def main():
     parser.add_argument('--quality', type=str, choices=['high', 'ultra'],
                        default='high', help='영상 화질 (기본: high=1080p, ultra=4K)')
     parser.add_argument('--info', type=str, default='', help='상품 추가 정보')
+    add_profile_argument(parser)
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    start_profiling('shorts', args.profile)
     
     # 플랫폼별 길이 검증
     platform_config = ShortFormCreator.PLATFORMS[args.platform]
@@ -498,6 +514,8 @@ def main():
     print(f"\n{'='*60}")
     print("✅ 완료! 이제 영상을 제작하실 수 있습니다.")
     print(f"{'='*60}\n")
+    
+    stop_profiling()
 
 
 if __name__ == '__main__':
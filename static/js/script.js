@@ -52,34 +52,26 @@ function displayResults() {
     // 1. 핵심 키워드
     document.getElementById('main-keyword').textContent = analysisResult.main_keyword;
     document.getElementById('core-needs').textContent = 
-        '핵심 니즈: ' + analysisResult.core_needs.join(', ');
+        '핵심 니즈: ' + analysisResult.needs.join(', ');
     
     // 2. 고수익 키워드
     const keywordsList = document.getElementById('keywords-list');
     keywordsList.innerHTML = '';
     
-    let index = 0;
-    
-    // 고수익 키워드
-    analysisResult.high_revenue_keywords.forEach((kw, i) => {
-        const card = createKeywordCard(kw.keyword, kw.type, kw.competition, kw.cpc_potential, index);
-        keywordsList.appendChild(card);
-        index++;
-    });
-    
-    // 롱테일 키워드
-    analysisResult.longtail_keywords.forEach((kw, i) => {
-        const card = createKeywordCard(kw, '롱테일', 'low', '중간', index);
+    // 고수익 키워드 다음에 롱테일 키워드 (번호 = keywords 순서)
+    analysisResult.keywords.forEach((kw, index) => {
+        const card = kw.longtail
+            ? createKeywordCard(kw.text, '롱테일', 'low', '중간', index)
+            : createKeywordCard(kw.text, kw.type, kw.competition, kw.cpc, index);
         keywordsList.appendChild(card);
-        index++;
     });
     
     // 3. 추천 제목
     const titlesList = document.getElementById('titles-list');
     titlesList.innerHTML = '';
     
-    analysisResult.recommended_titles.forEach((title, i) => {
-        const card = createTitleCard(title.title, title.hook, title.ctr_score, i);
+    analysisResult.titles.forEach((title, i) => {
+        const card = createTitleCard(title.text, title.hook, title.ctr_score, i);
         titlesList.appendChild(card);
     });
     
@@ -175,17 +167,10 @@ function updateSelectionSummary() {
         
         const keywordsContainer = document.createElement('div');
         
-        // 모든 키워드 리스트 생성
-        const allKeywords = [];
-        analysisResult.high_revenue_keywords.forEach(kw => {
-            allKeywords.push(kw.keyword);
-        });
-        allKeywords.push(...analysisResult.longtail_keywords);
-        
         selectedKeywords.forEach(index => {
             const span = document.createElement('span');
             span.className = 'selected-item';
-            span.textContent = '✓ ' + allKeywords[index];
+            span.textContent = '✓ ' + analysisResult.keywords[index].text;
             keywordsContainer.appendChild(span);
         });
         
@@ -198,7 +183,7 @@ function updateSelectionSummary() {
             
             const span = document.createElement('span');
             span.className = 'selected-item';
-            span.textContent = '✓ ' + analysisResult.recommended_titles[selectedTitle].title;
+            span.textContent = '✓ ' + analysisResult.titles[selectedTitle].text;
             titleDisplay.appendChild(span);
         }
     } else {
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+파이프라인 추적 (span)
+이미지 1장 = 트레이스 1개, 그 안에 단계 / 대기열 / 공급자 호출 / 재시도 / 폴링 span이 중첩됨
+끝난 span은 Chrome trace event 형식으로 output/traces/ 파일에 한 줄씩 기록
+(chrome://tracing 또는 https://ui.perfetto.dev 에서 그대로 열림, 이미지마다 한 줄로 표시)
+
+    with span('image', image='a.jpg', language='ko'):
+        with stage('render'):            # metrics.stage는 훅으로 자동 span
+            annotate(version_id='v1')    # 현재 span에 속성 추가
+
+파일은 '[' 다음에 이벤트가 한 줄씩 쌓이고 정상 종료 시 ']'로 닫힘.
+중간에 죽어도 닫는 괄호 없이 열 수 있는 형식이라 실행 중에도 확인 가능
+"""
+
+import os
+import time
+import atexit
+import secrets
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from metrics import add_stage_hook
+from serialization import read_json, dumps
+
+DEFAULT_TRACING_CONFIG = {
+    'enabled': True,
+    'dir': 'output/traces',
+    'max_attribute_length': 200
+}
+
+# 벽시계 기준 시각 (여러 프로세스의 트레이스를 한 화면에 겹쳐 볼 수 있게)
+_epoch_wall = time.time()
+_epoch_mono = time.monotonic()
+
+_current = contextvars.ContextVar('current_span', default=None)
+
+
+def load_tracing_config(config_path='config/config.json'):
+    """config.json의 tracing 섹션 로드 (TRACING=0/1로 덮어쓰기)"""
+    settings = dict(DEFAULT_TRACING_CONFIG)
+    try:
+        settings.update(read_json(config_path).get('tracing', {}))
+    except (OSError, ValueError):
+        pass
+    if os.getenv('TRACING'):
+        settings['enabled'] = os.getenv('TRACING').lower() not in ('0', 'false', 'no')
+    return settings
+
+
+def _micros(monotonic):
+    return int((_epoch_wall + monotonic - _epoch_mono) * 1_000_000)
+
+
+class Span:
+    """진행 중이거나 끝난 구간 1개"""
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'track', 'start', 'end',
+                 'attributes', 'error', '_token')
+
+    def __init__(self, name, parent=None, start=None, attributes=None):
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        if parent is None:
+            self.trace_id = secrets.token_hex(16)
+            self.parent_id = None
+            self.track = None
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self.track = parent.track
+        self.start = time.monotonic() if start is None else start
+        self.end = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def finish(self, error=None, end=None):
+        self.end = time.monotonic() if end is None else end
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        get_exporter().export(self)
+
+
+class TraceExporter:
+    """끝난 span을 Chrome trace event로 파일에 추가"""
+
+    def __init__(self, directory, max_attribute_length=200, enabled=True):
+        self.directory = Path(directory)
+        self.max_attribute_length = max_attribute_length
+        self.enabled = enabled
+        self.path = None
+        self.spans = 0
+        self._file = None
+        self._tracks = {}
+        self._lock = threading.Lock()
+
+    def _open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.json"
+        self._file = open(self.path, 'w', encoding='utf-8', buffering=1)
+        self._file.write('[\n')
+        atexit.register(self.close)
+
+    def _write(self, event):
+        self._file.write(dumps(event) + ',\n')
+
+    def _track_of(self, span):
+        """트레이스(이미지)마다 viewer의 한 줄(tid) 배정, 처음이면 줄 이름 기록"""
+        if span.trace_id not in self._tracks:
+            self._tracks[span.trace_id] = len(self._tracks) + 1
+            label = span.attributes.get('image') or span.name
+            self._write({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(),
+                         'tid': self._tracks[span.trace_id], 'args': {'name': str(label)}})
+        return self._tracks[span.trace_id]
+
+    def _clip(self, value):
+        if isinstance(value, (int, float, bool)) or value is None:
+            return value
+        text = str(value)
+        if len(text) > self.max_attribute_length:
+            return text[:self.max_attribute_length] + '…'
+        return text
+
+    def export(self, span):
+        if not self.enabled:
+            return
+        args = {key: self._clip(value) for key, value in span.attributes.items()}
+        args.update(trace_id=span.trace_id, span_id=span.span_id)
+        if span.parent_id:
+            args['parent_id'] = span.parent_id
+        if span.error:
+            args['error'] = self._clip(span.error)
+        start = _micros(span.start)
+        with self._lock:
+            if self._file is None:
+                self._open()
+            self._write({
+                'name': span.name,
+                'cat': span.attributes.get('kind', 'span'),
+                'ph': 'X',
+                'ts': start,
+                'dur': max(0, _micros(span.end) - start),
+                'pid': os.getpid(),
+                'tid': self._track_of(span),
+                'args': args
+            })
+            self.spans += 1
+
+    def close(self):
+        """마지막 이벤트 뒤에 ']'를 붙여 완전한 JSON으로 닫음"""
+        with self._lock:
+            if self._file is None or self._file.closed:
+                return
+            self._file.write(dumps({'name': 'process_name', 'ph': 'M', 'pid': os.getpid(),
+                                    'args': {'name': f"pipeline ({self.spans} spans)"}}) + '\n]\n')
+            self._file.close()
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter():
+    """공용 내보내기 (config.json의 tracing 섹션)"""
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            settings = load_tracing_config()
+            _exporter = TraceExporter(settings['dir'], settings['max_attribute_length'], settings['enabled'])
+        return _exporter
+
+
+def current_span():
+    return _current.get()
+
+
+def start_span(name, **attributes):
+    """현재 span의 자식 span 시작 후 현재 span으로 설정 (end_span으로 종료)"""
+    span = Span(name, parent=_current.get(), attributes=attributes)
+    span._token = _current.set(span)
+    return span
+
+
+def end_span(span, error=None):
+    """start_span으로 시작한 span 종료 후 부모 span으로 복귀"""
+    try:
+        _current.reset(span._token)
+    except ValueError:
+        # 다른 컨텍스트에서 시작된 span (이상 상황이지만 기록은 남김)
+        pass
+    span.finish(error)
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    with span('did.wait', talk_id=...) as s: ...
+
+    현재 span이 없으면 새 트레이스 시작
+    """
+    current = start_span(name, **attributes)
+    try:
+        yield current
+    except BaseException as e:
+        end_span(current, e)
+        raise
+    end_span(current)
+
+
+def annotate(**attributes):
+    """현재 span에 속성 추가 (span 밖이면 무시)"""
+    current = _current.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+def record_span(name, start, end=None, error=None, **attributes):
+    """
+    이미 끝난 구간을 현재 span의 자식으로 기록 (대기열 / 시도 1회 등)
+
+    Args:
+        start, end: time.monotonic() 값 (end가 없으면 지금)
+    """
+    finished = Span(name, parent=_current.get(), start=start, attributes=attributes)
+    finished.finish(error, end)
+    return finished
+
+
+def _stage_hook(event, name, duration, error):
+    """metrics.stage()의 시작 / 종료를 span으로"""
+    if event == 'start':
+        start_span(name, kind='stage')
+        return
+    current = _current.get()
+    if current is not None and current.name == name and current.attributes.get('kind') == 'stage':
+        end_span(current, error)
+
+
+add_stage_hook(_stage_hook)
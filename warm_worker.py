@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""
+상주 워커 (Unix 소켓)
+파이프라인 모듈과 AI SDK(google.generativeai / openai / requests / PIL)를 미리 import해 둔 프로세스가
+요청마다 fork한 자식에서 cli 명령을 실행. 스케줄러가 명령을 수백 번 돌려도 인터프리터 시작과
+import 비용은 워커가 뜰 때 한 번만 냄
+
+    python warm_worker.py serve                              # 워커 시작 (포그라운드)
+    python warm_worker.py exec shorts --product AirPods      # 워커에서 실행 (없으면 그 자리에서 실행)
+    python warm_worker.py status
+    python warm_worker.py check                              # 자식이 클라이언트 환경대로 공급자를 고르는지 확인
+    python warm_worker.py stop
+
+자식은 요청마다 새로 fork되므로 작업끼리 전역 상태(분석 결과, 메트릭, 저널 파일)를 공유하지 않음.
+워커 부모는 모듈만 import하고 설정 / 싱글톤은 만들지 않으므로 config.json은 자식이 매번 새로 읽음.
+환경 변수는 자식에서 클라이언트 환경으로 통째로 바꾸고, 환경에서 읽어 두는 공급자 카세트
+(PROVIDER_MODE / PROVIDER_CASSETTE)를 초기화함. DID_API_URL / GEMINI_API_URL은 providers.py가 호출마다 읽음.
+공급자 클라이언트는 호출마다 만들어지므로 연결은 공유하지 않음 (fork 후 소켓 공유 방지)
+
+프로토콜: 프레임 = 종류 1바이트 + 길이 4바이트 + 내용
+    R 요청(JSON)  I 표준 입력(빈 내용 = EOF)  A 수락  O 표준 출력  E 표준 오류  X 종료(JSON)
+클라이언트가 중간에 끊기면(Ctrl+C) 자식에 SIGINT를 보내 작업을 멈춤
+"""
+
+import os
+import sys
+import time
+import atexit
+import signal
+import struct
+import socket
+import argparse
+import importlib
+import threading
+import traceback
+import socketserver
+from datetime import datetime
+from pathlib import Path
+
+from serialization import read_json, dump_bytes, loads
+
+DEFAULT_WORKER_CONFIG = {
+    'enabled': True,
+    'socket': 'output/.state/warm_worker.sock',
+    # 미리 import할 cli 명령 (이 명령만 워커에서 실행, 나머지는 클라이언트가 직접 실행)
+    'commands': ['run', 'auto', 'shorts', 'keyword'],
+    # 공급자가 호출할 때 import하는 무거운 SDK (설치되지 않은 것은 건너뜀)
+    'preload': ['requests', 'PIL.Image', 'google.generativeai', 'openai'],
+    'max_children': 8,
+    # 워커가 없거나 거절하면 클라이언트 프로세스에서 그대로 실행
+    'fallback': True
+}
+
+_FRAME = struct.Struct('>cI')
+
+# check에서 워커 자식과 클라이언트가 같은 값을 보는지 비교할 공급자 환경 변수
+PROBE_ENV = ('PROVIDER_MODE', 'PROVIDER_CASSETTE', 'PROVIDER_REPLAY_LATENCY',
+             'DID_API_URL', 'GEMINI_API_URL', 'OPENAI_BASE_URL')
+
+
+def load_worker_config(config_path='config/config.json'):
+    """config.json의 warm_worker 섹션 로드 (WARM_WORKER=0이면 클라이언트가 워커를 쓰지 않음)"""
+    settings = dict(DEFAULT_WORKER_CONFIG)
+    try:
+        settings.update(read_json(config_path).get('warm_worker', {}))
+    except (OSError, ValueError):
+        pass
+    if os.getenv('WARM_WORKER'):
+        settings['enabled'] = os.getenv('WARM_WORKER').lower() not in ('0', 'false', 'no')
+    return settings
+
+
+def _send(sock, kind, payload=b''):
+    sock.sendall(_FRAME.pack(kind, len(payload)) + payload)
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            raise EOFError('연결이 끊겼습니다')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _recv(sock):
+    """프레임 1개 → (종류, 내용)"""
+    kind, size = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    return kind, _recv_exact(sock, size)
+
+
+def _connect(path):
+    """워커 소켓 연결 (없거나 응답하지 않으면 None)"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _control(path, action):
+    """status / stop 요청 → 응답 dict (워커가 없으면 None)"""
+    sock = _connect(path)
+    if sock is None:
+        return None
+    with sock:
+        try:
+            _send(sock, b'R', dump_bytes({'control': action}))
+            return loads(_recv(sock)[1])
+        except (OSError, EOFError, ValueError, struct.error):
+            return None
+
+
+# ---------------------------------------------------------------------------
+# 워커 (부모는 연결만 받고, 작업은 fork한 자식이 실행)
+# ---------------------------------------------------------------------------
+
+def _pump(read_fd, kind, send):
+    """자식의 표준 출력 / 오류 파이프 → 클라이언트 (끊겨도 파이프는 끝까지 비워 작업이 멈추지 않게 함)"""
+    connected = True
+    while True:
+        data = os.read(read_fd, 65536)
+        if not data:
+            break
+        if connected:
+            try:
+                send(kind, data)
+            except OSError:
+                connected = False
+    os.close(read_fd)
+
+
+def _feed_stdin(sock, write_fd, finished):
+    """클라이언트 표준 입력 → 자식 fd 0 (작업 중 연결이 끊기면 SIGINT)"""
+    try:
+        while True:
+            kind, data = _recv(sock)
+            if kind != b'I' or write_fd is None:
+                continue
+            if data:
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(write_fd, view):]
+            else:
+                os.close(write_fd)
+                write_fd = None
+    except (OSError, EOFError, struct.error):
+        if not finished.is_set():
+            os.kill(os.getpid(), signal.SIGINT)
+    finally:
+        if write_fd is not None:
+            os.close(write_fd)
+
+
+def _call_cli(argv):
+    """cli.main 실행 → 종료 코드 (인터프리터가 종료할 때와 같은 규칙)"""
+    import cli
+    try:
+        return cli.main(argv) or 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        traceback.print_exc()
+        return 130
+    except Exception:
+        traceback.print_exc()
+        return 1
+
+
+def provider_settings(resolve=True):
+    """
+    이 프로세스가 공급자 호출에 쓸 설정
+
+    Args:
+        resolve: True면 카세트를 실제로 만들어 모드 확인 (워커 자식), False면 환경 변수로 예상 (클라이언트)
+    """
+    from providers import did_api_url, gemini_api_url
+    if resolve:
+        from provider_cassette import get_cassette
+        mode = get_cassette().mode
+    else:
+        mode = os.getenv('PROVIDER_MODE', 'live').lower()
+        mode = mode if mode in ('live', 'record', 'replay') else 'live'
+    return {
+        'env': {name: os.getenv(name) for name in PROBE_ENV},
+        'cassette_mode': mode,
+        'did_api_url': did_api_url(),
+        'gemini_api_url': gemini_api_url()
+    }
+
+
+def _apply_client_env(env):
+    """자식 환경을 클라이언트 환경으로 교체 (워커에만 있던 변수도 제거) + 환경에서 읽어 둔 공급자 설정 초기화"""
+    if env is not None:
+        os.environ.clear()
+        os.environ.update(env)
+    from provider_cassette import reset_cassette
+    reset_cassette()
+
+
+def _run_job(sock, job):
+    """fork된 자식: fd 0/1/2를 소켓 프레임으로 연결하고 명령 실행"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    _apply_client_env(job.get('env'))
+    argv = list(job['argv'])
+    sys.argv = ['cli.py'] + argv
+
+    send_lock = threading.Lock()
+    finished = threading.Event()
+
+    def send(kind, payload=b''):
+        with send_lock:
+            _send(sock, kind, payload)
+
+    send(b'A')
+    read_fd, write_fd = os.pipe()
+    os.dup2(read_fd, 0)
+    os.close(read_fd)
+    threading.Thread(target=_feed_stdin, args=(sock, write_fd, finished), daemon=True).start()
+    pumps = []
+    for fd, kind in ((1, b'O'), (2, b'E')):
+        read_fd, write_fd = os.pipe()
+        os.dup2(write_fd, fd)
+        os.close(write_fd)
+        pump = threading.Thread(target=_pump, args=(read_fd, kind, send), daemon=True)
+        pump.start()
+        pumps.append(pump)
+    # 부모의 버퍼를 물려받지 않도록 새로 염 (출력은 줄 단위로 바로 전달)
+    sys.stdin = open(0, 'r', encoding='utf-8', closefd=False)
+    sys.stdout = open(1, 'w', encoding='utf-8', buffering=1, closefd=False)
+    sys.stderr = open(2, 'w', encoding='utf-8', buffering=1, closefd=False)
+
+    if job.get('probe'):
+        print(dump_bytes(provider_settings()).decode('utf-8'))
+        code = 0
+    else:
+        code = _call_cli(argv)
+    # 일반 프로세스처럼 종료 훅 실행 (트레이스 / 프로파일 / 저널 저장)
+    atexit._run_exitfuncs()
+    finished.set()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.close(1)
+    os.close(2)
+    for pump in pumps:
+        # 작업이 남긴 하위 프로세스가 출력을 잡고 있어도 오래 기다리지 않음
+        pump.join(timeout=5)
+    try:
+        send(b'X', dump_bytes({'code': code}))
+    except OSError:
+        pass
+
+
+class _JobHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        _run_job(self.request, self.server.job)
+
+
+class _WorkerServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """요청 프레임은 부모가 읽고, status / stop / 거절은 부모가 바로 응답, 작업만 fork"""
+
+    timeout = 1.0
+
+    def __init__(self, worker):
+        self.worker = worker
+        self.job = None
+        self.max_children = worker.settings['max_children']
+        super().__init__(worker.settings['socket'], _JobHandler)
+
+    def process_request(self, request, client_address):
+        request.settimeout(5)
+        try:
+            kind, payload = _recv(request)
+            header = loads(payload)
+        except (OSError, EOFError, ValueError, struct.error):
+            self.shutdown_request(request)
+            return
+        request.settimeout(None)
+        reply = self.worker.control(header)
+        if reply is not None:
+            try:
+                _send(request, b'X', dump_bytes(reply))
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        self.job = header
+        self.worker.served += 1
+        super().process_request(request, client_address)
+        self.job = None
+
+
+class WarmWorker:
+    """모듈을 미리 불러 둔 상주 프로세스"""
+
+    def __init__(self, settings=None):
+        self.settings = settings or load_worker_config()
+        self.root = os.getcwd()
+        self.commands = []
+        self.preloaded = []
+        self.served = 0
+        self.started_at = None
+        self.server = None
+        self._stopping = False
+
+    def warm(self):
+        """cli 명령 모듈 + SDK import (설정 / 싱글톤은 만들지 않음: 자식이 매번 새로 읽음)"""
+        import cli
+        for name in self.settings['commands']:
+            if name not in cli.COMMANDS:
+                print(f"⚠️  알 수 없는 명령 건너뜀: {name}")
+                continue
+            start = time.perf_counter()
+            cli.load(name)
+            self.commands.append(name)
+            print(f"   📦 {name}: {(time.perf_counter() - start) * 1000:.0f}ms")
+        for module in self.settings['preload']:
+            start = time.perf_counter()
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                continue
+            self.preloaded.append(module)
+            print(f"   📦 {module}: {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    def control(self, header):
+        """부모가 바로 답할 요청의 응답 (작업으로 fork할 요청이면 None)"""
+        action = header.get('control')
+        if action == 'status':
+            self.server.collect_children()
+            return {
+                'pid': os.getpid(),
+                'started_at': self.started_at,
+                'served': self.served,
+                'running': len(self.server.active_children or ()),
+                'commands': self.commands,
+                'preloaded': self.preloaded
+            }
+        if action == 'stop':
+            self._stopping = True
+            return {'stopping': True}
+        argv = header.get('argv') or []
+        if header.get('probe'):
+            return None
+        if not argv or argv[0] not in self.commands:
+            return {'code': None, 'error': f"워커에 불러 두지 않은 명령: {argv[0] if argv else '(없음)'}"}
+        if os.path.realpath(header.get('cwd') or '') != os.path.realpath(self.root):
+            return {'code': None, 'error': f"다른 폴더의 요청 (워커: {self.root})"}
+        return None
+
+    def _request_stop(self, signum, frame):
+        self._stopping = True
+
+    def serve(self):
+        """소켓을 열고 stop / SIGTERM / Ctrl+C까지 요청 처리"""
+        path = Path(self.settings['socket'])
+        if _control(path, 'status') is not None:
+            print(f"❌ 이미 워커가 실행 중입니다: {path}")
+            return 1
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.unlink(missing_ok=True)
+
+        print("🔥 워커 준비 중...")
+        start = time.perf_counter()
+        self.warm()
+        self.server = _WorkerServer(self)
+        os.chmod(path, 0o600)
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        signal.signal(signal.SIGTERM, self._request_stop)
+        print(f"✅ 워커 대기 중: {path} (pid {os.getpid()}, 준비 {time.perf_counter() - start:.1f}초)")
+        try:
+            while not self._stopping:
+                self.server.handle_request()
+                self.server.collect_children()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            # 실행 중인 작업은 끝날 때까지 기다림
+            self.server.server_close()
+            path.unlink(missing_ok=True)
+        print(f"🛑 워커 종료 (처리 {self.served}건)")
+        return 0
+
+
+# ---------------------------------------------------------------------------
+# 클라이언트
+# ---------------------------------------------------------------------------
+
+def _forward_stdin(sock):
+    """클라이언트 표준 입력 → 워커 (EOF는 빈 프레임)"""
+    try:
+        # 버퍼 객체 대신 fd를 직접 읽음 (읽는 중에 종료해도 stdin 잠금에 걸리지 않음)
+        stdin = sys.stdin.fileno()
+        while True:
+            data = os.read(stdin, 65536)
+            _send(sock, b'I', data)
+            if not data:
+                return
+    except (OSError, ValueError):
+        pass
+
+
+def call(argv, settings=None):
+    """
+    워커에서 cli 명령 실행 (출력은 그대로 이 프로세스의 표준 출력 / 오류로)
+
+    Args:
+        argv: cli.py 인자 (예: ['shorts', '--product', 'AirPods'])
+
+    Returns:
+        int: 종료 코드 (워커가 없거나 거절하면 None → 호출자가 직접 실행)
+    """
+    settings = settings or load_worker_config()
+    if not settings['enabled']:
+        return None
+    sock = _connect(settings['socket'])
+    if sock is None:
+        return None
+    out, err = sys.stdout.buffer, sys.stderr.buffer
+    with sock:
+        try:
+            _send(sock, b'R', dump_bytes({'argv': list(argv), 'cwd': os.getcwd(), 'env': dict(os.environ)}))
+            while True:
+                kind, payload = _recv(sock)
+                if kind == b'A':
+                    threading.Thread(target=_forward_stdin, args=(sock,), daemon=True).start()
+                elif kind == b'O':
+                    out.write(payload)
+                    out.flush()
+                elif kind == b'E':
+                    err.write(payload)
+                    err.flush()
+                elif kind == b'X':
+                    reply = loads(payload)
+                    if reply.get('code') is None and not settings['fallback']:
+                        print(f"❌ {reply.get('error')}", file=sys.stderr)
+                    return reply.get('code')
+        except KeyboardInterrupt:
+            # 연결을 닫으면 워커 쪽 작업도 SIGINT로 멈춤
+            return 130
+        except (OSError, EOFError, ValueError, struct.error) as e:
+            print(f"❌ 워커 연결 끊김: {e}", file=sys.stderr)
+            return 1
+
+
+def check(settings=None):
+    """
+    워커 자식이 이 클라이언트의 환경 변수대로 공급자 설정(카세트 모드, API 주소)을 쓰는지 비교
+
+    Returns:
+        list: (항목, 클라이언트 값, 워커 값) 차이 목록 (워커가 없으면 None)
+    """
+    settings = settings or load_worker_config()
+    sock = _connect(settings['socket'])
+    if sock is None:
+        return None
+    output = []
+    with sock:
+        try:
+            _send(sock, b'R', dump_bytes({'probe': True, 'argv': [], 'cwd': os.getcwd(),
+                                          'env': dict(os.environ)}))
+            while True:
+                kind, payload = _recv(sock)
+                if kind == b'A':
+                    _send(sock, b'I')
+                elif kind == b'O':
+                    output.append(payload)
+                elif kind == b'X':
+                    break
+        except (OSError, EOFError, struct.error):
+            return None
+    # 자식의 진행 메시지(이벤트 버스 콘솔 출력)와 섞일 수 있으므로 JSON 줄만 사용
+    lines = [line for line in b''.join(output).splitlines() if line.startswith(b'{')]
+    try:
+        child = loads(lines[-1])
+    except (IndexError, ValueError):
+        return None
+    expected = provider_settings(resolve=False)
+    differences = [(f"env.{name}", value, child['env'].get(name))
+                   for name, value in expected.pop('env').items() if child['env'].get(name) != value]
+    differences += [(key, value, child.get(key)) for key, value in expected.items() if child.get(key) != value]
+    return differences
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='상주 워커 (Unix 소켓)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('serve', help='모듈을 미리 불러 두고 요청 대기 (포그라운드)')
+    sub.add_parser('status', help='워커 상태')
+    sub.add_parser('stop', help='실행 중인 작업이 끝나면 워커 종료')
+    sub.add_parser('check', help='워커 자식이 이 셸의 PROVIDER_MODE / API 주소를 그대로 쓰는지 확인')
+    execute = sub.add_parser('exec', help='워커에서 cli 명령 실행 (예: exec shorts --product AirPods)')
+    execute.add_argument('args', nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    settings = load_worker_config()
+    if args.command == 'serve':
+        return WarmWorker(settings).serve()
+    if args.command in ('status', 'stop'):
+        reply = _control(settings['socket'], args.command)
+        if reply is None:
+            print(f"❌ 실행 중인 워커가 없습니다: {settings['socket']}")
+            return 1
+        if args.command == 'stop':
+            print("🛑 워커 종료 요청")
+        else:
+            print(f"🔥 워커 pid {reply['pid']} (시작 {reply['started_at']}, 처리 {reply['served']}건, "
+                  f"실행 중 {reply['running']}건)")
+            print(f"   명령: {', '.join(reply['commands'])}")
+            print(f"   SDK: {', '.join(reply['preloaded']) or '(없음)'}")
+        return 0
+
+    if args.command == 'check':
+        differences = check(settings)
+        if differences is None:
+            print(f"❌ 실행 중인 워커가 없거나 응답이 없습니다: {settings['socket']}")
+            return 1
+        if differences:
+            print("❌ 워커 자식의 공급자 설정이 클라이언트 환경과 다릅니다:")
+            for key, client_value, worker_value in differences:
+                print(f"   {key}: 클라이언트 {client_value!r} / 워커 {worker_value!r}")
+            return 1
+        print("✅ 워커 자식이 클라이언트 환경대로 공급자 설정을 사용합니다.")
+        return 0
+
+    if not args.args:
+        parser.error('실행할 cli 명령을 지정하세요 (예: exec shorts --product AirPods)')
+    code = call(args.args, settings)
+    if code is not None:
+        return code
+    if not settings['fallback']:
+        return 1
+    import cli
+    return cli.main(args.args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+작업 선점 (여러 프로세스 / 여러 머신이 같은 input 폴더를 나눠 처리)
+처리 직전에 파일을 input/processing/<작업자 ID>/로 rename (같은 파일시스템에서 원자적)해서
+먼저 옮긴 작업자만 처리. 실패하면 원래 폴더로 되돌리고, 성공하면 completed로 이동
+
+작업자 폴더의 .heartbeat 파일을 주기적으로 갱신하고, lease_seconds 동안 갱신되지 않았거나
+같은 호스트에서 프로세스가 이미 죽은 작업자의 폴더는 다른 작업자가 원래 폴더로 되돌림
+
+    claims = get_claims()
+    claim = claims.claim(pair['image'], pair['script'])
+    if claim is None:
+        ...다른 작업자가 가져감...
+    try:
+        ...claim.paths[0] / claim.paths[1] 처리...
+    except Exception:
+        claims.release(claim)      # 원래 폴더로
+        raise
+    claims.finish(claim)           # completed로 옮긴 뒤
+"""
+
+import os
+import re
+import json
+import time
+import atexit
+import socket
+import threading
+from pathlib import Path
+
+from event_bus import warning
+from serialization import read_json, write_json
+
+DEFAULT_CLAIMS_CONFIG = {
+    'enabled': True,
+    'dir': 'input/processing',
+    # 없으면 WORKER_ID 환경 변수, 그것도 없으면 <호스트>-<pid>
+    'worker_id': None,
+    'heartbeat_interval': 10,
+    'lease_seconds': 120
+}
+
+HEARTBEAT = '.heartbeat'
+# 되돌릴 곳이 이미 차 있으면 여기로 (덮어쓰지 않음)
+ORPHANED = '.orphaned'
+
+
+def load_claims_config(config_path='config/config.json'):
+    """config.json의 work_claims 섹션 로드 (processing 폴더는 directories.processing)"""
+    settings = dict(DEFAULT_CLAIMS_CONFIG)
+    try:
+        config = read_json(config_path)
+        if config.get('directories', {}).get('processing'):
+            settings['dir'] = config['directories']['processing']
+        settings.update(config.get('work_claims', {}))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+def default_worker_id():
+    worker_id = os.getenv('WORKER_ID') or f"{socket.gethostname()}-{os.getpid()}"
+    # 폴더 이름으로 쓸 수 있게
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', worker_id).lstrip('.')
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Claim:
+    """선점한 파일들 (originals[i] → paths[i])"""
+
+    __slots__ = ('originals', 'paths')
+
+    def __init__(self, originals, paths):
+        self.originals = originals
+        self.paths = paths
+
+
+class WorkClaims:
+    """작업자 1개의 선점 / 하트비트 / 회수"""
+
+    def __init__(self, root, worker_id=None, heartbeat_interval=10, lease_seconds=120, enabled=True):
+        self.root = Path(root)
+        self.worker_id = worker_id or default_worker_id()
+        self.worker_dir = self.root / self.worker_id
+        self.heartbeat_interval = heartbeat_interval
+        self.lease_seconds = lease_seconds
+        self.enabled = enabled
+        self.hostname = socket.gethostname()
+        self.reclaimed = 0
+        # 선점 중인 파일 이름 → 원래 폴더 (하트비트 파일에도 기록해서 다른 작업자가 되돌릴 수 있게)
+        self._origins = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # 하트비트 ---------------------------------------------------------------
+
+    def _write_heartbeat(self):
+        """작업자 정보 + 원래 위치를 원자적으로 저장 (호출자가 _lock 보유)"""
+        write_json(self.worker_dir / HEARTBEAT, {'worker_id': self.worker_id, 'host': self.hostname,
+                                                 'pid': os.getpid(), 'origins': self._origins})
+
+    def _heartbeat_loop(self):
+        last_reclaim = time.monotonic()
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                os.utime(self.worker_dir / HEARTBEAT)
+            except FileNotFoundError:
+                # 다른 작업자가 죽은 것으로 보고 회수함 (일시 정지 등) → 다시 등록
+                with self._lock:
+                    self.worker_dir.mkdir(parents=True, exist_ok=True)
+                    self._write_heartbeat()
+            except OSError as e:
+                warning(f"⚠️  작업 선점 하트비트 실패: {e}")
+            if time.monotonic() - last_reclaim >= self.lease_seconds:
+                last_reclaim = time.monotonic()
+                self.reclaim_stale()
+
+    def start(self):
+        """작업자 폴더 등록, 죽은 작업자 회수, 하트비트 시작"""
+        if not self.enabled or self._thread is not None:
+            return self
+        self.worker_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._write_heartbeat()
+        self.reclaim_stale()
+        self._thread = threading.Thread(target=self._heartbeat_loop, name='claims-heartbeat', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        """하트비트 종료, 남은 선점은 원래 폴더로 되돌리고 작업자 폴더 삭제"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        with self._lock:
+            leftovers = dict(self._origins)
+        for name, origin in leftovers.items():
+            self._restore(self.worker_dir / name, Path(origin) / name)
+        with self._lock:
+            self._origins.clear()
+        self._remove_worker_dir(self.worker_dir)
+
+    # 선점 / 반환 ------------------------------------------------------------
+
+    def claim(self, *paths):
+        """
+        파일들을 작업자 폴더로 옮겨서 선점 (첫 번째 파일이 잠금 역할)
+
+        Returns:
+            Claim 또는 None (다른 작업자가 먼저 가져감)
+        """
+        originals = [Path(path) for path in paths]
+        if not self.enabled:
+            return Claim(originals, list(originals))
+        self.start()
+        claimed = []
+        # 옮기기 전에 원래 위치부터 기록 (옮긴 직후 죽어도 회수 가능)
+        with self._lock:
+            for original in originals:
+                self._origins[original.name] = str(original.parent)
+            self._write_heartbeat()
+        for original in originals:
+            target = self.worker_dir / original.name
+            try:
+                os.rename(original, target)
+            except FileNotFoundError:
+                # 다른 작업자가 먼저 옮김 → 이미 옮긴 것은 되돌리고 포기
+                for done_original, done_target in claimed:
+                    self._restore(done_target, done_original)
+                with self._lock:
+                    for path in originals:
+                        self._origins.pop(path.name, None)
+                    self._write_heartbeat()
+                return None
+            claimed.append((original, target))
+        return Claim(originals, [target for _, target in claimed])
+
+    def release(self, claim):
+        """처리 실패: 원래 폴더로 되돌려서 다음 실행 / 다른 작업자가 다시 처리"""
+        if not self.enabled:
+            return
+        for original, path in zip(claim.originals, claim.paths):
+            if path.exists():
+                self._restore(path, original)
+        self._forget(claim)
+
+    def finish(self, claim):
+        """처리 완료 (파일은 호출자가 completed로 옮김)"""
+        if self.enabled:
+            self._forget(claim)
+
+    def _forget(self, claim):
+        with self._lock:
+            for original in claim.originals:
+                self._origins.pop(original.name, None)
+            self._write_heartbeat()
+
+    def _restore(self, path, original):
+        """되돌릴 곳에 같은 이름의 새 파일이 있으면 덮어쓰지 않고 .orphaned로"""
+        original = Path(original)
+        if original.exists():
+            orphaned = self.root / ORPHANED
+            orphaned.mkdir(parents=True, exist_ok=True)
+            target = orphaned / f"{int(time.time())}_{original.name}"
+            warning(f"⚠️  {original}가 이미 있어서 선점했던 파일을 {target}로 옮깁니다.")
+        else:
+            original.parent.mkdir(parents=True, exist_ok=True)
+            target = original
+        try:
+            os.rename(path, target)
+        except FileNotFoundError:
+            pass
+
+    # 죽은 작업자 회수 ---------------------------------------------------------
+
+    def _is_stale(self, directory):
+        try:
+            info = read_json(directory / HEARTBEAT)
+            age = time.time() - os.stat(directory / HEARTBEAT).st_mtime
+        except (OSError, ValueError):
+            # 하트비트 파일을 쓰기 전이거나 깨짐 → 폴더 수정 시각 기준
+            info = {}
+            try:
+                age = time.time() - os.stat(directory).st_mtime
+            except OSError:
+                return False, {}
+        if age > self.lease_seconds:
+            return True, info
+        # 같은 호스트면 프로세스가 살아 있는지 바로 확인
+        if info.get('host') == self.hostname and info.get('pid') and not _pid_alive(info['pid']):
+            return True, info
+        return False, info
+
+    def reclaim_stale(self):
+        """죽은 작업자의 선점 파일을 원래 폴더로 되돌림. 되돌린 파일 수 반환"""
+        if not self.enabled:
+            return 0
+        try:
+            entries = [entry for entry in os.scandir(self.root)
+                       if entry.is_dir() and not entry.name.startswith('.') and entry.name != self.worker_id]
+        except FileNotFoundError:
+            return 0
+        total = 0
+        for entry in entries:
+            directory = Path(entry.path)
+            stale, info = self._is_stale(directory)
+            if not stale:
+                continue
+            # 폴더를 먼저 rename → 여러 작업자가 동시에 회수하려 해도 한 명만 성공
+            reclaiming = self.root / f".reclaiming-{entry.name}-{self.worker_id}"
+            try:
+                os.rename(directory, reclaiming)
+            except OSError:
+                continue
+            origins = info.get('origins', {})
+            restored = 0
+            for item in os.scandir(reclaiming):
+                # 하트비트 / 쓰다 만 임시 파일 (선점 파일은 숨김 파일이 아님)
+                if item.name.startswith('.'):
+                    continue
+                origin = origins.get(item.name)
+                if origin is None:
+                    # 원래 위치를 모르면 (하트비트 기록 전) 그대로 보관
+                    self._restore(Path(item.path), self.root / ORPHANED / item.name)
+                else:
+                    self._restore(Path(item.path), Path(origin) / item.name)
+                restored += 1
+            self._remove_worker_dir(reclaiming)
+            total += restored
+            warning(f"♻️  작업자 {entry.name}의 선점 {restored}개를 회수했습니다.")
+        self.reclaimed += total
+        return total
+
+    @staticmethod
+    def _remove_worker_dir(directory):
+        for entry in os.scandir(directory):
+            if entry.name.startswith('.'):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass
+
+    def status(self):
+        """processing 폴더의 작업자별 선점 수 / 하트비트 경과 시간"""
+        workers = {}
+        try:
+            entries = [entry for entry in os.scandir(self.root) if entry.is_dir() and not entry.name.startswith('.')]
+        except FileNotFoundError:
+            return workers
+        for entry in entries:
+            directory = Path(entry.path)
+            files = [name for name in os.listdir(directory) if not name.startswith('.')]
+            try:
+                age = round(time.time() - os.stat(directory / HEARTBEAT).st_mtime, 1)
+            except OSError:
+                age = None
+            workers[entry.name] = {'claims': len(files), 'heartbeat_age': age,
+                                   'stale': self._is_stale(directory)[0]}
+        return workers
+
+
+_claims = None
+_claims_lock = threading.Lock()
+
+
+def get_claims():
+    """공용 작업 선점 (config.json의 work_claims 섹션)"""
+    global _claims
+    with _claims_lock:
+        if _claims is None:
+            settings = load_claims_config()
+            _claims = WorkClaims(settings['dir'], settings['worker_id'], settings['heartbeat_interval'],
+                                 settings['lease_seconds'], settings['enabled'])
+        return _claims
+
+
+if __name__ == '__main__':
+    claims = get_claims()
+    print(json.dumps(claims.status(), ensure_ascii=False, indent=2))
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+워크플로우 엔진 (DAG)
+workflows/*.json(과 prompts.json의 batch_processing)의 "dag" 섹션을 읽어 단계 순서와 의존 관계를
+코드 대신 설정으로 정함. 의존 단계가 모두 끝난 단계는 바로 시작하므로 서로 독립인 가지는 병렬 실행
+(예: 이미지 분석 → 리서치 → 키워드 최적화가 진행되는 동안 D-ID 렌더링)
+
+    "dag": {
+      "steps": [
+        {"id": "analysis", "after": ["script_load"]},
+        {"id": "research", "after": ["analysis"], "when": "analysis.is_product"},
+        {"id": "upload", "after": ["metadata", "thumbnail"], "concurrency": 2}
+      ]
+    }
+
+단계 항목:
+    id           단계 이름 (다른 단계의 after에서 참조)
+    stage        실행할 등록된 단계 구현 (없으면 id와 같음)
+    after        먼저 끝나야 하는 단계 id 목록
+    when         작업 항목의 값 경로 (예: analysis.is_product, !research.selling). 거짓이면 건너뜀
+    concurrency  모든 항목을 합쳐 이 단계를 동시에 실행할 최대 개수 (없으면 제한 없음)
+
+단계 구현은 register_stage(이름, fn, after=...)로 등록 (main.py). fn(runner, item)은 item dict에 결과를 기록.
+after는 그 구현이 결과를 읽는 단계로, 워크플로우에 있으면 반드시 앞(조상)에 있어야 함 (show로 검증)
+AIMD 한도(stage_slot)는 단계 구현 안에서 그대로 적용되고, concurrency는 그 위의 고정 상한
+
+    python workflow_engine.py list                      # 정의된 워크플로우
+    python workflow_engine.py show complete_workflow    # 병렬로 실행되는 단계 묶음 / 검증
+"""
+
+import sys
+import argparse
+import importlib
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+from event_bus import progress, warning
+from serialization import read_json
+
+DEFAULT_WORKFLOW_CONFIG = {
+    'dir': 'workflows',
+    'prompts': 'prompts/prompts.json',
+    # main.py가 실행할 워크플로우 (dag 섹션이 없으면 DEFAULT_DAG)
+    'main': 'complete_workflow',
+    # 항목 1개 안에서 동시에 실행할 최대 단계 수
+    'max_parallel_steps': 4
+}
+
+# 예전 main.py와 같은 순차 실행 (워크플로우 파일에 dag가 없을 때)
+DEFAULT_DAG = {
+    'steps': [
+        {'id': 'script_load'},
+        {'id': 'analysis', 'after': ['script_load']},
+        {'id': 'research', 'after': ['analysis'], 'when': 'analysis.is_product'},
+        {'id': 'keywords', 'after': ['research']},
+        {'id': 'thumbnail', 'after': ['keywords']},
+        {'id': 'render', 'after': ['thumbnail']},
+        {'id': 'metadata', 'after': ['render']},
+        {'id': 'upload', 'after': ['metadata']},
+        {'id': 'move', 'after': ['upload']}
+    ]
+}
+
+_stages = {}
+_limits = {}
+_limits_lock = threading.Lock()
+
+
+def load_workflow_config(config_path='config/config.json'):
+    """config.json의 workflow 섹션 로드"""
+    settings = dict(DEFAULT_WORKFLOW_CONFIG)
+    try:
+        settings.update(read_json(config_path).get('workflow', {}))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+def register_stage(name, fn, after=()):
+    """
+    단계 구현 등록
+
+    Args:
+        fn: fn(runner, item) - runner는 Workflow.run에 넘긴 객체(YouTubeAutomation 등),
+            item은 항목 1개의 작업 dict (앞 단계 결과를 읽고 자기 결과를 기록)
+        after: fn이 결과를 읽는 단계 구현 이름 (워크플로우에 있으면 이 단계보다 앞이어야 함)
+    """
+    _stages[name] = (fn, tuple(after))
+
+
+def registered_stages():
+    return sorted(_stages)
+
+
+def _lookup(item, path):
+    """'analysis.is_product' → item['analysis']['is_product'] (중간이 없으면 None)"""
+    value = item
+    for part in path.split('.'):
+        if value is None:
+            return None
+        value = value.get(part)
+    return value
+
+
+def _step_limit(workflow, step):
+    """모든 항목이 함께 쓰는 단계별 세마포어 (concurrency가 없으면 None)"""
+    if not step.get('concurrency'):
+        return None
+    key = (workflow, step['id'])
+    with _limits_lock:
+        if key not in _limits:
+            _limits[key] = threading.BoundedSemaphore(int(step['concurrency']))
+        return _limits[key]
+
+
+class Workflow:
+    """검증된 DAG 1개"""
+
+    def __init__(self, name, dag, max_parallel_steps=4):
+        self.name = name
+        self.description = dag.get('description', '')
+        self.max_parallel_steps = max(1, int(dag.get('max_parallel_steps', max_parallel_steps)))
+        self.steps = {}
+        for raw in dag.get('steps') or []:
+            step = {
+                'id': str(raw['id']),
+                'stage': raw.get('stage') or str(raw['id']),
+                'after': [str(dep) for dep in raw.get('after') or []],
+                'when': raw.get('when'),
+                'concurrency': raw.get('concurrency')
+            }
+            if step['id'] in self.steps:
+                raise ValueError(f"{name}: 단계 id 중복: {step['id']}")
+            self.steps[step['id']] = step
+        if not self.steps:
+            raise ValueError(f"{name}: 단계가 없습니다")
+        for step in self.steps.values():
+            missing = [dep for dep in step['after'] if dep not in self.steps]
+            if missing:
+                raise ValueError(f"{name}: {step['id']}의 after에 없는 단계: {', '.join(missing)}")
+        self.levels = self._levels()
+
+    def _levels(self):
+        """위상 정렬 (같은 묶음 = 서로 의존하지 않아 함께 시작할 수 있는 단계)"""
+        remaining = {step_id: set(step['after']) for step_id, step in self.steps.items()}
+        levels = []
+        while remaining:
+            ready = [step_id for step_id, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"{self.name}: 순환 의존: {', '.join(sorted(remaining))}")
+            levels.append(ready)
+            for step_id in ready:
+                del remaining[step_id]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return levels
+
+    def _ancestors(self, step_id):
+        found, stack = set(), list(self.steps[step_id]['after'])
+        while stack:
+            dep = stack.pop()
+            if dep not in found:
+                found.add(dep)
+                stack.extend(self.steps[dep]['after'])
+        return found
+
+    def problems(self):
+        """등록되지 않은 단계 구현 / 결과를 읽는 단계보다 먼저(또는 동시에) 시작하는 단계"""
+        found = []
+        present = {step['stage'] for step in self.steps.values()}
+        for step_id, step in self.steps.items():
+            if step['stage'] not in _stages:
+                found.append(f"등록되지 않은 단계: {step['stage']} (등록됨: {', '.join(registered_stages())})")
+                continue
+            upstream = {self.steps[dep]['stage'] for dep in self._ancestors(step_id)}
+            missing = [name for name in _stages[step['stage']][1] if name in present and name not in upstream]
+            if missing:
+                found.append(f"{step_id}은(는) {', '.join(missing)} 결과를 읽으므로 after에 포함해야 합니다")
+        return found
+
+    def _run_step(self, step, runner, item):
+        if step['when']:
+            path = step['when'].lstrip('!')
+            if bool(_lookup(item, path)) == step['when'].startswith('!'):
+                progress(f"\n⏭️  {step['id']} 건너뛰기 (조건 {step['when']} 불충족)")
+                return
+        fn = _stages[step['stage']][0]
+        limit = _step_limit(self.name, step)
+        if limit is None:
+            fn(runner, item)
+            return
+        with limit:
+            fn(runner, item)
+
+    def run(self, runner, item):
+        """
+        항목 1개를 DAG 순서로 처리 (의존이 끝난 단계는 스레드에서 바로 시작)
+
+        단계가 실패하면 아직 시작하지 않은 단계는 취소하고, 실행 중인 단계가 끝나면 첫 예외를 다시 발생
+        """
+        problems = self.problems()
+        if problems:
+            raise ValueError(f"{self.name}: {problems[0]}")
+        order = [step_id for level in self.levels for step_id in level]
+        done, running, failed = set(), {}, None
+        with ThreadPoolExecutor(max_workers=self.max_parallel_steps,
+                                thread_name_prefix=f"workflow-{self.name}") as pool:
+            while order or running:
+                if failed is None:
+                    for step_id in [step_id for step_id in order
+                                    if all(dep in done for dep in self.steps[step_id]['after'])]:
+                        order.remove(step_id)
+                        # 단계마다 현재 컨텍스트(항목 span / 비용 / 이벤트 범위)를 복사해서 실행
+                        context = contextvars.copy_context()
+                        future = pool.submit(context.run, self._run_step, self.steps[step_id], runner, item)
+                        running[future] = step_id
+                else:
+                    order.clear()
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step_id = running.pop(future)
+                    try:
+                        future.result()
+                    except BaseException as e:
+                        if failed is None:
+                            failed = e
+                    else:
+                        done.add(step_id)
+        if failed is not None:
+            raise failed
+        return item
+
+
+def _definitions(settings):
+    """워크플로우 이름 → dag (없으면 None)"""
+    found = {}
+    for path in sorted(Path(settings['dir']).glob('*.json')):
+        try:
+            found[path.stem] = read_json(path).get('dag')
+        except (OSError, ValueError):
+            continue
+    try:
+        found['batch_processing'] = read_json(settings['prompts']).get('batch_processing', {}).get('dag')
+    except (OSError, ValueError):
+        pass
+    return found
+
+
+def load_workflow(name=None, settings=None):
+    """
+    이름으로 워크플로우 로드 (workflows/<이름>.json 또는 batch_processing의 dag, 없으면 workflow.main)
+
+    dag 섹션이 없으면 DEFAULT_DAG, 정의가 잘못되었거나 지정한 이름이 없으면 ValueError
+    """
+    settings = settings or load_workflow_config()
+    definitions = _definitions(settings)
+    if name is None:
+        name = settings['main']
+        if name not in definitions:
+            # 설정의 워크플로우 파일이 없는 작업 폴더에서도 예전 순서로 실행
+            warning(f"⚠️  워크플로우 {name}이(가) 없어 기본 순서로 실행합니다 ({settings['dir']})")
+            return Workflow(name, DEFAULT_DAG, settings['max_parallel_steps'])
+    if name not in definitions:
+        raise ValueError(f"워크플로우 없음: {name} ({', '.join(sorted(definitions))})")
+    return Workflow(name, definitions[name] or DEFAULT_DAG, settings['max_parallel_steps'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='워크플로우 (DAG) 조회 / 검증')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='정의된 워크플로우')
+    show = sub.add_parser('show', help='병렬로 실행되는 단계 묶음 출력 + 검증')
+    show.add_argument('name', nargs='?', help='워크플로우 이름 (기본: workflow.main)')
+    args = parser.parse_args(argv)
+
+    # 단계 구현 등록
+    importlib.import_module('main')
+
+    settings = load_workflow_config()
+    if args.command == 'list':
+        for name, dag in _definitions(settings).items():
+            marker = '*' if name == settings['main'] else ' '
+            print(f"{marker} {name:<28} {'dag ' + str(len(dag.get('steps') or [])) + '단계' if dag else '(dag 없음: 기본 순서)'}")
+        return 0
+
+    try:
+        workflow = load_workflow(args.name, settings)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"🧩 {workflow.name} (항목당 최대 {workflow.max_parallel_steps}단계 동시)")
+    if workflow.description:
+        print(f"   {workflow.description}")
+    for index, level in enumerate(workflow.levels, 1):
+        steps = []
+        for step_id in level:
+            step = workflow.steps[step_id]
+            notes = [note for note in (
+                step['stage'] if step['stage'] != step_id else None,
+                f"조건 {step['when']}" if step['when'] else None,
+                f"동시 {step['concurrency']}" if step['concurrency'] else None
+            ) if note]
+            steps.append(step_id + (f" ({', '.join(notes)})" if notes else ''))
+        print(f"   {index}. {' | '.join(steps)}")
+    problems = workflow.problems()
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        return 1
+    print("✅ 검증 완료")
+    return 0
+
+
+if __name__ == '__main__':
+    # 스크립트로 실행하면 main.py가 등록하는 모듈(workflow_engine)과 __main__이 달라지므로 그쪽 main 실행
+    sys.exit(importlib.import_module('workflow_engine').main())